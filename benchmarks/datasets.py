@@ -0,0 +1,143 @@
+"""
+Synthetic datasets for the benchmarks: N users with a chosen role mix and
+a weak password list of a chosen size, written in the flat-file formats
+(passwd.txt, roles.txt, weak_passwords.txt).
+
+    python -m benchmarks.datasets /tmp/bench-data --users 100000 --weak 1000000
+"""
+
+import argparse
+import random
+import string
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import src.Problem2c as problem2c
+from src.credential_store import append_records
+from src.Problem1c import Role
+
+# Share of users given each role set, roughly a retail bank's mix
+DEFAULT_ROLE_MIX: dict[tuple[str, ...], float] = {
+    (Role.CLIENT.value,): 0.70,
+    (Role.PREMIUM_CLIENT.value,): 0.15,
+    (Role.TELLER.value,): 0.05,
+    (Role.FINANCIAL_ADVISOR.value,): 0.04,
+    (Role.FINANCIAL_PLANNER.value,): 0.04,
+    (Role.EMPLOYEE.value, Role.CLIENT.value): 0.02,
+}
+
+# Cheap Argon2 costs so that generating and verifying stays fast; pass
+# the production costs to measure the real login latency instead.
+FAST_HASHER_PARAMS = {"time_cost": 1, "memory_cost": 8192, "parallelism": 1}
+
+# Distinct passwords (and so distinct hashes) in a dataset. Users share
+# them round-robin: every record still holds a full Argon2 hash, without
+# paying for N hashes at generation time.
+PASSWORD_POOL = 16
+
+
+@dataclass
+class DatasetSpec:
+    users: int
+    weak_passwords: int
+    role_mix: dict[tuple[str, ...], float] = field(
+        default_factory=lambda: dict(DEFAULT_ROLE_MIX)
+    )
+    seed: int = 4810
+
+
+@dataclass
+class Dataset:
+    spec: DatasetSpec
+    data_dir: Path
+    # (username, password) for every generated user
+    credentials: list[tuple[str, str]]
+    weak_sample: list[str]
+
+
+def username_for(i: int) -> str:
+    return f"user{i:08d}"
+
+
+def make_password(rng: random.Random) -> str:
+    """
+    A random password that satisfies the password policy.
+    """
+    chars = [
+        rng.choice(string.ascii_uppercase),
+        rng.choice(string.ascii_lowercase),
+        rng.choice(string.digits),
+        rng.choice("!@#$%*&"),
+    ]
+    chars += rng.choices(string.ascii_letters + string.digits, k=6)
+    rng.shuffle(chars)
+    return "".join(chars)
+
+
+def make_weak_password(rng: random.Random, i: int) -> str:
+    # Mostly policy-shaped entries, so lookups are not rejected early
+    return f"{rng.choice(string.ascii_uppercase)}{i:07d}!{rng.choice('abcxyz')}"
+
+
+def generate(data_dir: Path, spec: DatasetSpec, hasher_params=None) -> Dataset:
+    """
+    Write a dataset into data_dir, replacing any files already there.
+    """
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(spec.seed)
+    hasher = problem2c.make_hasher(**(hasher_params or FAST_HASHER_PARAMS))
+
+    pool = [make_password(rng) for _ in range(PASSWORD_POOL)]
+    hashes = [hasher.hash(password) for password in pool]
+
+    role_sets = list(spec.role_mix)
+    weights = [spec.role_mix[r] for r in role_sets]
+    assigned = rng.choices(role_sets, weights=weights, k=spec.users)
+
+    credentials = []
+    passwd_records = []
+    role_records = []
+    for i in range(spec.users):
+        username = username_for(i)
+        k = i % PASSWORD_POOL
+        credentials.append((username, pool[k]))
+        passwd_records.append((username, hashes[k]))
+        role_records.append((username, ",".join(assigned[i])))
+
+    for name in ("passwd.txt", "roles.txt", "weak_passwords.txt"):
+        (data_dir / name).unlink(missing_ok=True)
+    append_records(data_dir / "passwd.txt", passwd_records, sync=False)
+    append_records(data_dir / "roles.txt", role_records, sync=False)
+
+    weak = [make_weak_password(rng, i) for i in range(spec.weak_passwords)]
+    with (data_dir / "weak_passwords.txt").open("w", encoding="utf-8") as f:
+        f.writelines(pw + "\n" for pw in weak)
+
+    weak_sample = rng.sample(weak, min(len(weak), 1000))
+    return Dataset(spec, data_dir, credentials, weak_sample)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.datasets",
+        description="Write a synthetic justInvest dataset.",
+    )
+    parser.add_argument("data_dir", type=Path)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--weak", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=4810)
+    args = parser.parse_args(argv)
+
+    dataset = generate(
+        args.data_dir, DatasetSpec(args.users, args.weak, seed=args.seed)
+    )
+    print(
+        f"Wrote {len(dataset.credentials)} users and {args.weak} weak passwords "
+        f"to {args.data_dir}."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,119 @@
+"""
+Import-time benchmark for the justInvest modules.
+
+Each module is imported in a fresh interpreter, from an empty working
+directory, and its import statement is timed with time.perf_counter. The
+median time is reported, and the run fails if a module exceeds its
+budget, loads one of the interactive-only dependencies or creates any
+file. `python -X importtime` gives a per-module breakdown when a budget
+is exceeded.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeat 9 --max-ms 150
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+MODULES = ("src.core", "src.commands", "src.server", "src.main")
+
+# Loaded only when the interactive CLI or the vectorised helpers run
+INTERACTIVE_ONLY = ("questionary", "prompt_toolkit", "numpy")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "loaded": sorted(m for m in {forbidden!r} if m in sys.modules),
+}}))
+"""
+
+
+def measure_import(module: str) -> dict:
+    """
+    Import module in a new interpreter from an empty directory.
+    Returns its import time, any interactive-only modules it pulled in
+    and any files it created.
+    """
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    with tempfile.TemporaryDirectory() as cwd:
+        proc = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                _PROBE.format(module=module, forbidden=INTERACTIVE_ONLY),
+            ],
+            cwd=cwd,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        created = sorted(str(path.relative_to(cwd)) for path in Path(cwd).rglob("*"))
+    result = json.loads(proc.stdout.splitlines()[-1])
+    result["created"] = created
+    return result
+
+
+def run(modules=MODULES, repeat: int = 5) -> dict[str, dict]:
+    results = {}
+    for module in modules:
+        runs = [measure_import(module) for _ in range(repeat)]
+        results[module] = {
+            "median_ms": statistics.median(r["seconds"] for r in runs) * 1000,
+            "loaded": runs[0]["loaded"],
+            "created": runs[0]["created"],
+        }
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.import_time",
+        description="Measure how long the justInvest modules take to import.",
+    )
+    parser.add_argument("modules", nargs="*", default=list(MODULES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=None,
+        help="fail if any module's median import time exceeds this",
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    args = parser.parse_args(argv)
+
+    results = run(args.modules, args.repeat)
+    failed = False
+    for module, result in results.items():
+        problems = []
+        if result["loaded"]:
+            problems.append(f"loads {', '.join(result['loaded'])}")
+        if result["created"]:
+            problems.append(f"creates {', '.join(result['created'])}")
+        if args.max_ms is not None and result["median_ms"] > args.max_ms:
+            problems.append(f"over {args.max_ms:.0f} ms")
+        result["ok"] = not problems
+        failed |= bool(problems)
+        if not args.json:
+            status = "ok" if not problems else "; ".join(problems)
+            print(f"{module:<14} {result['median_ms']:8.1f} ms  {status}")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
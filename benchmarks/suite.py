@@ -0,0 +1,308 @@
+"""
+Latency and throughput benchmarks for the hot paths: verify_login,
+valid_username, validate_password and getAuthorizedOperations, each run
+against synthetic datasets (benchmarks/datasets.py) at several scales.
+
+    python -m benchmarks.suite --scales small,medium --out results.json
+    python -m benchmarks.suite --baseline results.json --tolerance 0.25
+
+Results are JSON: one entry per (scale, benchmark) with p50/p99/mean
+latency in microseconds and throughput in operations per second. With
+--baseline, entries whose p50 or p99 grew by more than the tolerance are
+reported and the exit status is 1.
+"""
+
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+import src.core as core
+import src.Problem1c as problem1c
+import src.Problem2c as problem2c
+import src.Problem3ab as problem3ab
+import src.sessions as sessions
+from benchmarks.datasets import (
+    FAST_HASHER_PARAMS,
+    Dataset,
+    DatasetSpec,
+    generate,
+    make_password,
+)
+from src.Problem1c import Role
+
+SCALES = {
+    "tiny": DatasetSpec(users=100, weak_passwords=1_000),
+    "small": DatasetSpec(users=1_000, weak_passwords=10_000),
+    "medium": DatasetSpec(users=10_000, weak_passwords=100_000),
+    "large": DatasetSpec(users=100_000, weak_passwords=1_000_000),
+}
+
+DEFAULT_ITERATIONS = 10_000
+# verify_login runs Argon2, so it gets far fewer iterations
+DEFAULT_LOGIN_ITERATIONS = 100
+
+
+def percentile(sorted_values: list[int], q: float) -> int:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def measure(
+    scale: str, name: str, fn: Callable, inputs: list[tuple]
+) -> dict[str, float | int | str]:
+    """
+    Call fn(*args) for each args in inputs and summarise the latencies.
+    The first call is timed separately as the warm-up (cold caches).
+    """
+    timer = time.perf_counter_ns
+
+    start = timer()
+    fn(*inputs[0])
+    warmup = timer() - start
+
+    latencies = []
+    append = latencies.append
+    total_start = timer()
+    for args in inputs:
+        start = timer()
+        fn(*args)
+        append(timer() - start)
+    total = timer() - total_start
+
+    latencies.sort()
+    return {
+        "scale": scale,
+        "benchmark": name,
+        "iterations": len(latencies),
+        "warmup_us": warmup / 1000,
+        "p50_us": percentile(latencies, 0.50) / 1000,
+        "p99_us": percentile(latencies, 0.99) / 1000,
+        "mean_us": sum(latencies) / len(latencies) / 1000,
+        "ops_per_s": len(latencies) / (total / 1e9) if total else 0.0,
+    }
+
+
+@contextmanager
+def isolated(data_dir: Path, hasher_params: dict[str, int]) -> Iterator[None]:
+    """
+    Point the library at data_dir for the duration, with the login
+    throttle off so repeated logins are not locked out.
+    """
+    saved = (
+        problem2c.PASSWD_FILE,
+        problem2c.HASHER_CONFIG_FILE,
+        problem2c.ph,
+        problem2c.throttle,
+        problem3ab.ROLES_FILE,
+        problem3ab.WEAK_PASSWD_FILE,
+        sessions.SESSION_SECRET_FILE,
+        sessions.SESSION_SNAPSHOT_FILE,
+    )
+    try:
+        core.configure(data_dir=data_dir, hasher_params=hasher_params)
+        problem2c.throttle = None
+        yield
+    finally:
+        (
+            problem2c.PASSWD_FILE,
+            problem2c.HASHER_CONFIG_FILE,
+            problem2c.ph,
+            problem2c.throttle,
+            problem3ab.ROLES_FILE,
+            problem3ab.WEAK_PASSWD_FILE,
+            sessions.SESSION_SECRET_FILE,
+            sessions.SESSION_SNAPSHOT_FILE,
+        ) = saved
+
+
+def _validate_password(username: str, password: str) -> None:
+    try:
+        problem3ab.validate_password(username, password)
+    except ValueError:
+        pass
+
+
+def benchmark_inputs(
+    dataset: Dataset, iterations: int, login_iterations: int, seed: int
+) -> dict[str, tuple[Callable, list[tuple]]]:
+    rng = random.Random(seed)
+    credentials = dataset.credentials
+
+    logins = []
+    for _ in range(login_iterations):
+        username, password = rng.choice(credentials)
+        # One in ten attempts uses a wrong password
+        if rng.random() < 0.1:
+            password = make_password(rng)
+        logins.append((username, password))
+
+    usernames = []
+    passwords = []
+    for _ in range(iterations):
+        # Half taken usernames, half new ones
+        if rng.random() < 0.5:
+            usernames.append((rng.choice(credentials)[0],))
+        else:
+            usernames.append((f"new{rng.randrange(10**9):09d}",))
+        # Mostly acceptable passwords, with some from the weak list
+        if dataset.weak_sample and rng.random() < 0.2:
+            passwords.append(("newuser", rng.choice(dataset.weak_sample)))
+        else:
+            passwords.append(("newuser", make_password(rng)))
+
+    roles = list(Role)
+    role_sets = [
+        (set(rng.sample(roles, rng.randint(1, 2))),) for _ in range(iterations)
+    ]
+
+    return {
+        "verify_login": (problem2c.verify_login, logins),
+        "valid_username": (problem3ab.valid_username, usernames),
+        "validate_password": (_validate_password, passwords),
+        "getAuthorizedOperations": (problem1c.getAuthorizedOperations, role_sets),
+    }
+
+
+def run(
+    scales: list[str],
+    iterations: int = DEFAULT_ITERATIONS,
+    login_iterations: int = DEFAULT_LOGIN_ITERATIONS,
+    hasher_params: dict[str, int] | None = None,
+    benchmarks: list[str] | None = None,
+    seed: int = 4810,
+) -> dict:
+    """
+    Run the benchmarks at each scale and return the JSON-ready results.
+    """
+    hasher_params = hasher_params or FAST_HASHER_PARAMS
+    results = []
+    for scale in scales:
+        spec = SCALES[scale]
+        with tempfile.TemporaryDirectory() as tmp:
+            dataset = generate(Path(tmp), spec, hasher_params)
+            inputs = benchmark_inputs(dataset, iterations, login_iterations, seed)
+            with isolated(Path(tmp), hasher_params):
+                for name, (fn, args) in inputs.items():
+                    if benchmarks and name not in benchmarks:
+                        continue
+                    if name == "getAuthorizedOperations":
+                        problem1c.DECISION_CACHE.clear()
+                    result = measure(scale, name, fn, args)
+                    result.update(users=spec.users, weak_passwords=spec.weak_passwords)
+                    results.append(result)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "hasher": hasher_params,
+            "iterations": iterations,
+            "login_iterations": login_iterations,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    List the (scale, benchmark) entries whose p50 or p99 latency is more
+    than tolerance (a fraction) above the baseline.
+    """
+    base = {(r["scale"], r["benchmark"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results["results"]:
+        old = base.get((result["scale"], result["benchmark"]))
+        if old is None:
+            continue
+        for metric in ("p50_us", "p99_us"):
+            if old[metric] > 0 and result[metric] > old[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{result['scale']} {result['benchmark']} {metric}: "
+                    f"{old[metric]:.1f} -> {result[metric]:.1f} "
+                    f"(+{result[metric] / old[metric] - 1:.0%})"
+                )
+    return regressions
+
+
+def format_table(results: dict) -> str:
+    lines = [
+        f"{'scale':<8} {'benchmark':<24} {'p50 us':>10} {'p99 us':>10} {'ops/s':>12}"
+    ]
+    for r in results["results"]:
+        lines.append(
+            f"{r['scale']:<8} {r['benchmark']:<24} {r['p50_us']:>10.1f} "
+            f"{r['p99_us']:>10.1f} {r['ops_per_s']:>12.0f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.suite",
+        description="Benchmark login, username, password and policy checks.",
+    )
+    parser.add_argument(
+        "--scales",
+        default="small,medium",
+        help=f"comma-separated, from {', '.join(SCALES)}",
+    )
+    parser.add_argument("--benchmarks", default=None, help="comma-separated subset")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument(
+        "--login-iterations", type=int, default=DEFAULT_LOGIN_ITERATIONS
+    )
+    parser.add_argument(
+        "--production-hasher",
+        action="store_true",
+        help="hash with the configured Argon2 costs instead of cheap ones",
+    )
+    parser.add_argument("--out", type=Path, help="write JSON results here")
+    parser.add_argument("--baseline", type=Path, help="JSON results to compare to")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        parser.error(f"unknown scales: {', '.join(unknown)}")
+
+    hasher_params = None
+    if args.production_hasher:
+        hasher_params = problem2c.load_hasher_params(problem2c.HASHER_CONFIG_FILE)
+
+    results = run(
+        scales,
+        iterations=args.iterations,
+        login_iterations=args.login_iterations,
+        hasher_params=hasher_params,
+        benchmarks=args.benchmarks.split(",") if args.benchmarks else None,
+    )
+    print(format_table(results))
+    if args.out is not None:
+        args.out.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
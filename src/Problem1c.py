@@ -1,5 +1,12 @@
-from enum import Enum
+from enum import Enum, IntFlag
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Hashable, Iterable, Mapping
 import datetime
+import threading
+
+import src.metrics as metrics
 
 
 class Operations(Enum):
@@ -24,6 +31,52 @@ class Role(Enum):
     TELLER = "Teller"
 
 
+# One bit per Role, for storing a user's roles in a single integer
+RoleFlag = IntFlag("RoleFlag", {role.name: 1 << i for i, role in enumerate(Role)})
+
+# Precomputed lookups for turning stored role strings into Role members
+# and for packing a set of roles into a RoleFlag bitmask.
+ROLE_BY_VALUE = {role.value: role for role in Role}
+ROLE_BITS = {role: RoleFlag[role.name] for role in Role}
+_VALUE_BITS = {role.value: int(bit) for role, bit in ROLE_BITS.items()}
+
+
+def roles_from_values(values: Iterable[str]) -> set[Role]:
+    """
+    Map role strings (Role values) to Role members, skipping unknown ones.
+    """
+    return {ROLE_BY_VALUE[v] for v in values if v in ROLE_BY_VALUE}
+
+
+def roles_to_mask(roles: Iterable[Role]) -> RoleFlag:
+    mask = RoleFlag(0)
+    for role in roles:
+        mask |= ROLE_BITS[role]
+    return mask
+
+
+def roles_from_mask(mask: int) -> set[Role]:
+    return {role for role, bit in ROLE_BITS.items() if mask & bit}
+
+
+def role_values_from_mask(mask: int) -> list[str]:
+    """
+    Role values in a bitmask, in Role declaration order.
+    """
+    return [role.value for role, bit in ROLE_BITS.items() if mask & bit]
+
+
+def parse_role_mask(value: str) -> int:
+    """
+    Parse a stored "Role1,Role2" string straight into a role bitmask
+    (a plain int with RoleFlag bits, so millions of them stay cheap).
+    """
+    mask = 0
+    for v in value.split(","):
+        mask |= _VALUE_BITS.get(v.strip(), 0)
+    return mask
+
+
 BASE_PERMS = {
     Role.CLIENT: {
         Operations.VIEW_SELF_ACCOUNT_BALANCE,
@@ -61,6 +114,12 @@ ALL_DAY_END = datetime.time(23, 59)
 WORK_DAY_START = datetime.time(9, 0)
 WORK_DAY_END = datetime.time(17, 0)
 
+# Each value is one (start, end) window, a list of windows, or a dict that
+# maps weekday numbers (Monday == 0) to a window or list of windows. Ends
+# are inclusive, but only to the exact minute: a window ending at 17:00
+# includes 17:00:00 and not 17:00:30. Days left out of a weekday dict are
+# closed.
+# A compiled minute-of-week bitmap (see compile_availability) also works.
 ROLE_AVAILABILITY = {
     Role.CLIENT: (ALL_DAY_START, ALL_DAY_END),
     Role.PREMIUM_CLIENT: (ALL_DAY_START, ALL_DAY_END),
@@ -70,64 +129,532 @@ ROLE_AVAILABILITY = {
     Role.TELLER: (WORK_DAY_START, WORK_DAY_END),
 }
 
+MINUTES_PER_DAY = 1440
+DAYS_PER_WEEK = 7
+MINUTES_PER_WEEK = DAYS_PER_WEEK * MINUTES_PER_DAY
+
+# Source of the current time. Tests and batch jobs can swap this out, or
+# pass an explicit time to the checks below.
+clock: Callable[[], datetime.datetime] = datetime.datetime.now
+
+
+def minute_of_week(when: datetime.datetime | datetime.time | None = None) -> int:
+    """
+    Convert a timestamp to its bit position in an availability bitmap.
+    A bare time of day is taken to fall on the clock's current weekday.
+    """
+    if when is None:
+        when = clock()
+    if isinstance(when, datetime.datetime):
+        weekday = when.weekday()
+    else:
+        weekday = clock().weekday()
+    return weekday * MINUTES_PER_DAY + when.hour * 60 + when.minute
+
+
+def is_available(bits: int, when: datetime.datetime | datetime.time) -> bool:
+    """
+    Check a minute-of-week availability bitmap at a time. Each bit covers
+    the first instant of its minute; a time later in the minute is only
+    covered if the next minute is too, so window ends stay inclusive to
+    the exact minute.
+    """
+    minute = minute_of_week(when)
+    if not bits >> minute & 1:
+        return False
+    if when.second or when.microsecond:
+        return bool(bits >> ((minute + 1) % MINUTES_PER_WEEK) & 1)
+    return True
+
+
+def _window_bits(window: tuple[datetime.time, datetime.time]) -> int:
+    start, end = window
+    first = start.hour * 60 + start.minute
+    last = end.hour * 60 + end.minute
+    if first <= last:
+        return ((1 << (last - first + 1)) - 1) << first
+    # Overnight window, e.g. 22:00-02:00
+    return _window_bits((start, ALL_DAY_END)) | _window_bits((ALL_DAY_START, end))
+
 
-def isOperationAvailable(roles: set[Role], time: datetime.time | None = None) -> bool:
+def _day_bits(windows) -> int:
+    if isinstance(windows, tuple) and windows and isinstance(windows[0], datetime.time):
+        windows = [windows]
+    bits = 0
+    for window in windows:
+        bits |= _window_bits(window)
+    return bits
+
+
+def compile_availability(schedule) -> int:
+    """
+    Compile one ROLE_AVAILABILITY entry into a minute-of-week bitmap:
+    seven 1440-bit minute-of-day bitmaps, Monday in the lowest bits.
+    An int is taken to be such a bitmap already.
+    """
+    if isinstance(schedule, int):
+        return schedule
+    if isinstance(schedule, Mapping):
+        days = {day: _day_bits(windows) for day, windows in schedule.items()}
+    else:
+        bits = _day_bits(schedule)
+        days = {day: bits for day in range(DAYS_PER_WEEK)}
+
+    week = 0
+    for day, bits in days.items():
+        if not 0 <= day < DAYS_PER_WEEK:
+            raise ValueError(f"Invalid weekday {day!r} in availability schedule.")
+        week |= bits << (day * MINUTES_PER_DAY)
+    return week
+
+
+def isOperationAvailable(
+    roles: set[Role], time: datetime.datetime | datetime.time | None = None
+) -> bool:
     """
     Return True if at least one of these roles is allowed to do operations
-    at the given time.
+    at the given time (defaults to the current clock reading).
     """
     if time is None:
-        time = datetime.datetime.now().time()
+        time = clock()
+    return is_available(get_compiled_policy().availability_for(roles), time)
 
-    for role in roles:
-        start, end = ROLE_AVAILABILITY[role]
-        if start <= time <= end:
-            return True
 
-    return False
+@dataclass(frozen=True)
+class CompiledPolicy:
+    """
+    BASE_PERMS, ROLE_PARENT and ROLE_AVAILABILITY flattened into integer
+    bitmasks. Each operation owns one bit, each role maps to the mask of
+    every operation it can perform (inherited ones included) and to a
+    minute-of-week availability bitmap.
+    """
+
+    op_bits: dict[Hashable, int]
+    operations: tuple[Hashable, ...]
+    role_masks: dict[Hashable, int]
+    availability: dict[Hashable, int]
 
+    def mask_for(self, roles: Iterable[Hashable]) -> int:
+        """
+        OR together the permission masks of the given roles.
+        """
+        mask = 0
+        for role in roles:
+            mask |= self.role_masks.get(role, 0)
+        return mask
 
-def getAuthorizedOperations(roles: set[Role]) -> set[Operations]:
+    def availability_for(self, roles: Iterable[Hashable]) -> int:
+        """
+        OR together the availability bitmaps of the given roles.
+        """
+        bits = 0
+        for role in roles:
+            bits |= self.availability.get(role, 0)
+        return bits
+
+    def allows(self, roles: Iterable[Hashable], operation: Hashable) -> bool:
+        return bool(self.mask_for(roles) & self.op_bits.get(operation, 0))
+
+    def operations_in(self, mask: int) -> set:
+        """
+        Decode a permission mask back into its operations.
+        """
+        ops = set()
+        while mask:
+            low = mask & -mask
+            ops.add(self.operations[low.bit_length() - 1])
+            mask ^= low
+        return ops
+
+
+def compile_policy(
+    base_perms: Mapping[Hashable, Iterable[Hashable]],
+    role_parent: Mapping[Hashable, Iterable[Hashable]],
+    role_availability: Mapping[Hashable, object] | None = None,
+) -> CompiledPolicy:
     """
-    Compute all operations allowed for any of the given roles,
-    including inherited ones through ROLE_PARENT.
+    Compile a role -> operations table and a role -> parents table into
+    per-role bitmasks with inheritance already applied, along with the
+    availability schedules if given.
+    Raises ValueError if the inheritance graph contains a cycle.
     """
-    ops: set[Operations] = set()
-    seen: set[Role] = set()
+    op_bits: dict[Hashable, int] = {}
+    operations: list[Hashable] = []
+    direct: dict[Hashable, int] = {}
 
-    def add_role(r: Role) -> None:
-        if r in seen:
-            return
-        seen.add(r)
+    for role, ops in base_perms.items():
+        mask = 0
+        for op in ops:
+            bit = op_bits.get(op)
+            if bit is None:
+                bit = op_bits[op] = 1 << len(operations)
+                operations.append(op)
+            mask |= bit
+        direct[role] = mask
 
-        ops.update(BASE_PERMS.get(r, ()))
+    roles = list(direct)
+    for role, parents in role_parent.items():
+        roles.append(role)
+        roles.extend(parents)
 
-        for parent in ROLE_PARENT.get(r, ()):
-            add_role(parent)
+    # Iterative post-order DFS so deep hierarchies don't hit the recursion
+    # limit. A role seen again while still on the stack means a cycle.
+    role_masks: dict[Hashable, int] = {}
+    on_stack: set[Hashable] = set()
+    for start in roles:
+        if start in role_masks:
+            continue
+        stack = [(start, iter(role_parent.get(start, ())))]
+        on_stack.add(start)
+        while stack:
+            role, parents = stack[-1]
+            parent = next(parents, None)
+            if parent is None:
+                stack.pop()
+                on_stack.discard(role)
+                mask = direct.get(role, 0)
+                for p in role_parent.get(role, ()):
+                    mask |= role_masks[p]
+                role_masks[role] = mask
+            elif parent in on_stack:
+                raise ValueError(f"Role inheritance cycle through {parent!r}.")
+            elif parent not in role_masks:
+                on_stack.add(parent)
+                stack.append((parent, iter(role_parent.get(parent, ()))))
+
+    return CompiledPolicy(
+        op_bits=op_bits,
+        operations=tuple(operations),
+        role_masks=role_masks,
+        availability={
+            role: compile_availability(schedule)
+            for role, schedule in (role_availability or {}).items()
+        },
+    )
+
+
+def _freeze_schedule(schedule):
+    if isinstance(schedule, Mapping):
+        return MappingProxyType(
+            {day: _freeze_schedule(windows) for day, windows in schedule.items()}
+        )
+    if isinstance(schedule, list):
+        return tuple(schedule)
+    return schedule
+
+
+def freeze_tables(
+    base_perms: Mapping, role_parent: Mapping, role_availability: Mapping
+) -> tuple[Mapping, Mapping, Mapping]:
+    """
+    Read-only copies of the three policy tables, so they can only be
+    changed by installing new ones (which moves the policy version on).
+    """
+    return (
+        MappingProxyType({role: frozenset(ops) for role, ops in base_perms.items()}),
+        MappingProxyType(
+            {role: tuple(parents) for role, parents in role_parent.items()}
+        ),
+        MappingProxyType(
+            {
+                role: _freeze_schedule(schedule)
+                for role, schedule in role_availability.items()
+            }
+        ),
+    )
+
+
+# The tables are read-only: change them with the set_role_* functions or
+# install_policy(), which compile the new tables before swapping them in.
+BASE_PERMS, ROLE_PARENT, ROLE_AVAILABILITY = freeze_tables(
+    BASE_PERMS, ROLE_PARENT, ROLE_AVAILABILITY
+)
+
+# Bumped whenever BASE_PERMS, ROLE_PARENT or ROLE_AVAILABILITY change.
+# Compiled tables and cached decisions are tagged with the version they
+# were built from and are discarded once it moves on.
+POLICY_VERSION = 0
+
+_compiled_policy: tuple[int, CompiledPolicy] | None = None
+_policy_lock = threading.RLock()
+
+
+def get_compiled_policy() -> CompiledPolicy:
+    """
+    Return the compiled form of the policy tables, compiling it
+    on first use and again after the policy version changes.
+    """
+    global _compiled_policy
+    cached = _compiled_policy
+    if cached is not None and cached[0] == POLICY_VERSION:
+        return cached[1]
+
+    with _policy_lock:
+        version = POLICY_VERSION
+        if _compiled_policy is None or _compiled_policy[0] != version:
+            _compiled_policy = (
+                version,
+                compile_policy(BASE_PERMS, ROLE_PARENT, ROLE_AVAILABILITY),
+            )
+        return _compiled_policy[1]
 
-    for role in roles:
-        add_role(role)
 
-    return ops
+def invalidate_policy() -> int:
+    """
+    Move the policy version on, so the tables are compiled again and
+    cached decisions are dropped. Returns the new version.
+    """
+    global POLICY_VERSION
+    with _policy_lock:
+        POLICY_VERSION += 1
+        return POLICY_VERSION
+
+
+def install_policy(
+    base_perms: Mapping,
+    role_parent: Mapping,
+    role_availability: Mapping,
+    compiled: CompiledPolicy | None = None,
+) -> int:
+    """
+    Replace all three policy tables at once (with read-only copies),
+    together with their compiled form if the caller already has it.
+    Concurrent checks see either the old policy or the new one, never a
+    mix of tables. Raises ValueError, leaving the current policy in
+    force, if the tables do not compile. Returns the new policy version.
+    """
+    global BASE_PERMS, ROLE_PARENT, ROLE_AVAILABILITY, POLICY_VERSION
+    global _compiled_policy
+    tables = freeze_tables(base_perms, role_parent, role_availability)
+    if compiled is None:
+        compiled = compile_policy(*tables)
+    with _policy_lock:
+        BASE_PERMS, ROLE_PARENT, ROLE_AVAILABILITY = tables
+        # Readers that see the new version before the new tables wait on
+        # the lock in get_compiled_policy
+        POLICY_VERSION += 1
+        _compiled_policy = (POLICY_VERSION, compiled)
+        return POLICY_VERSION
+
+
+def _replace_entry(table: str, role: Role, value) -> None:
+    # Under the lock so concurrent setters do not drop each other's edits
+    with _policy_lock:
+        tables = {
+            "base_perms": dict(BASE_PERMS),
+            "role_parent": dict(ROLE_PARENT),
+            "role_availability": dict(ROLE_AVAILABILITY),
+        }
+        tables[table][role] = value
+        install_policy(**tables)
+
+
+def set_role_permissions(role: Role, operations: Iterable[Operations]) -> None:
+    """
+    Replace the base operations granted to a role.
+    """
+    _replace_entry("base_perms", role, set(operations))
+
+
+def set_role_parents(role: Role, parents: Iterable[Role]) -> None:
+    """
+    Replace the roles a role inherits from. Raises ValueError, leaving
+    the policy unchanged, if that would create an inheritance cycle.
+    """
+    _replace_entry("role_parent", role, list(parents))
+
+
+def set_role_availability(role: Role, schedule) -> None:
+    """
+    Replace the availability schedule of a role (see ROLE_AVAILABILITY).
+    Raises ValueError, leaving the policy unchanged, if it is invalid.
+    """
+    _replace_entry("role_availability", role, schedule)
+
+
+class DecisionCache:
+    """
+    Bounded LRU cache of authorization decisions keyed by
+    (frozenset(roles), operation). Every entry remembers the policy
+    version it was computed under; a lookup under a newer version is a
+    miss and the stale entry is replaced.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, tuple[int, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: tuple, compute: Callable[[], object]) -> object:
+        version = POLICY_VERSION
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "policy_version": POLICY_VERSION,
+            }
+
+
+DECISION_CACHE = DecisionCache()
+
+
+def decision_cache_stats() -> dict[str, int]:
+    """
+    Hit/miss counters and occupancy of the authorization decision cache.
+    """
+    return DECISION_CACHE.stats()
+
+
+def getAuthorizedOperations(roles: set[Role]) -> set[Operations]:
+    """
+    Compute all operations allowed for any of the given roles,
+    including inherited ones through ROLE_PARENT.
+    """
+
+    def compute() -> frozenset[Operations]:
+        policy = get_compiled_policy()
+        return frozenset(policy.operations_in(policy.mask_for(roles)))
 
+    return set(DECISION_CACHE.get_or_compute((frozenset(roles), None), compute))
 
-def canPerformOperation(roles: set[Role], operation: Operations) -> bool:
+
+@metrics.timed("operation_denial")
+def operation_denial(
+    roles: set[Role],
+    operation: Operations,
+    now: datetime.datetime | datetime.time | None = None,
+) -> str | None:
     """
     Check time plus permissions for a user with multiple roles.
-    Prints a message and returns True or False.
+    Returns None if the operation is allowed, otherwise the reason.
     """
     if not roles:
-        print("Operation not allowed for your access level.")
-        return False
+        return "Operation not allowed for your access level."
 
     # Time check: at least one role must be active at this time
-    if not isOperationAvailable(roles):
-        print("Operation not allowed at this time.")
-        return False
+    if not isOperationAvailable(roles, now):
+        return "Operation not allowed at this time."
 
     # Permission check: operation must be allowed by at least one role (with inheritance)
-    if operation not in getAuthorizedOperations(roles):
-        print("Operation not allowed for your access level.")
+    key = (frozenset(roles), operation)
+    allowed = DECISION_CACHE.get_or_compute(
+        key, lambda: get_compiled_policy().allows(roles, operation)
+    )
+    if not allowed:
+        return "Operation not allowed for your access level."
+
+    return None
+
+
+@metrics.timed("canPerformOperation")
+def canPerformOperation(
+    roles: set[Role],
+    operation: Operations,
+    now: datetime.datetime | datetime.time | None = None,
+) -> bool:
+    """
+    Check time plus permissions for a user with multiple roles.
+    now defaults to a fresh clock reading.
+    Prints a message and returns True or False.
+    """
+    reason = operation_denial(roles, operation, now)
+    if reason is not None:
+        print(reason)
         return False
 
     return True
+
+
+def _mask_bits(mask: int, width: int):
+    """
+    Unpack an integer bitmask into a NumPy bool vector of length width.
+    """
+    import numpy as np
+
+    nbytes = (width + 7) // 8
+    raw = np.frombuffer(mask.to_bytes(nbytes, "little"), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder="little")[:width].astype(bool)
+
+
+def authorize_batch(
+    role_sets: Iterable[Iterable[Role]],
+    operations: Iterable[Operations],
+    times: Iterable[datetime.datetime | datetime.time],
+):
+    """
+    Evaluate canPerformOperation for every (role set, operation, time)
+    combination at once, without printing.
+
+    Returns a NumPy bool array of shape
+    (len(role_sets), len(operations), len(times)).
+    """
+    import numpy as np
+
+    policy = get_compiled_policy()
+    n_ops = len(policy.operations)
+    week = MINUTES_PER_WEEK
+
+    # Identical role sets share one row of unpacked permission and
+    # availability bits.
+    row_of: dict[frozenset, int] = {}
+    perm_rows = []
+    avail_rows = []
+    set_index = []
+    for roles in role_sets:
+        key = frozenset(roles)
+        row = row_of.get(key)
+        if row is None:
+            row = row_of[key] = len(perm_rows)
+            perm_rows.append(_mask_bits(policy.mask_for(key), n_ops + 1))
+            avail_rows.append(_mask_bits(policy.availability_for(key), week))
+        set_index.append(row)
+
+    # Unknown operations point at the spare, always-clear bit n_ops.
+    op_cols = np.array(
+        [
+            policy.op_bits[op].bit_length() - 1 if op in policy.op_bits else n_ops
+            for op in operations
+        ],
+        dtype=np.intp,
+    )
+    times = list(times)
+    minutes = np.array([minute_of_week(t) for t in times], dtype=np.intp)
+    # As in is_available: past the start of a minute, the next one counts too
+    partial = np.array([bool(t.second or t.microsecond) for t in times], dtype=bool)
+    rows = np.array(set_index, dtype=np.intp)
+
+    if not perm_rows:
+        return np.zeros((0, len(op_cols), len(minutes)), dtype=bool)
+
+    perms = np.stack(perm_rows)[:, op_cols]
+    avail_bits = np.stack(avail_rows)
+    avail = avail_bits[:, minutes] & (~partial | avail_bits[:, (minutes + 1) % week])
+    return (perms[:, :, None] & avail[:, None, :])[rows]
@@ -1,57 +1,256 @@
+from contextlib import nullcontext
 from pathlib import Path
-from argon2 import PasswordHasher
-from argon2.exceptions import VerifyMismatchError
+import json
+from argon2 import PasswordHasher, extract_parameters
+from argon2.exceptions import InvalidHashError, VerifyMismatchError
 
+import src.metrics as metrics
+import src.tracing as tracing
+from src.credential_store import CredentialStore, get_store
+from src.hash_scheduler import HashScheduler, HasherBusyError
+from src.login_throttle import LoginThrottle, LoginThrottledError
+from src.sessions import revoke_user_sessions
+from src.storage import get_backend
+
+# Nothing is read or created at import; the file is created by the first
+# enrollment and a missing file reads as having no users.
 PASSWD_FILE = Path("data/passwd.txt")
-PASSWD_FILE.touch(exist_ok=True)
-
-# Configure Argon2id hasher
-ph = PasswordHasher(
-    time_cost=3,
-    memory_cost=65536,
-    parallelism=2,
-    hash_len=32,
-    salt_len=16,
+
+# Argon2id cost parameters. Written by `python -m src.calibrate_argon2`;
+# the defaults below are used when the file does not exist.
+HASHER_CONFIG_FILE = Path("data/argon2.json")
+
+DEFAULT_HASHER_PARAMS = {
+    "time_cost": 3,
+    "memory_cost": 65536,
+    "parallelism": 2,
+}
+
+
+def load_hasher_params(path: Path) -> dict[str, int]:
+    """
+    Read Argon2 cost parameters from a JSON config file, falling back to
+    DEFAULT_HASHER_PARAMS for anything missing.
+    """
+    params = dict(DEFAULT_HASHER_PARAMS)
+    if path.exists():
+        with path.open("r", encoding="utf-8") as f:
+            stored = json.load(f)
+        for key in params:
+            if key in stored:
+                params[key] = int(stored[key])
+    return params
+
+
+def make_hasher(time_cost: int, memory_cost: int, parallelism: int) -> PasswordHasher:
+    return PasswordHasher(
+        time_cost=time_cost,
+        memory_cost=memory_cost,
+        parallelism=parallelism,
+        hash_len=32,
+        salt_len=16,
+    )
+
+
+def configure_hasher(time_cost: int, memory_cost: int, parallelism: int) -> None:
+    """
+    Switch to new Argon2 costs. Existing hashes keep verifying and are
+    upgraded on the user's next successful login.
+    """
+    global ph
+    ph = make_hasher(time_cost, memory_cost, parallelism)
+
+
+# Argon2id hasher, made from HASHER_CONFIG_FILE on first use (or set with
+# configure_hasher). Use get_hasher() rather than reading this directly.
+ph: PasswordHasher | None = None
+
+
+def get_hasher() -> PasswordHasher:
+    global ph
+    hasher = ph
+    if hasher is None:
+        hasher = ph = make_hasher(**load_hasher_params(HASHER_CONFIG_FILE))
+    return hasher
+
+
+# Admission control for hash operations: at most 1 GiB of Argon2 memory
+# in flight, with up to 128 callers queued behind it. Set to None to
+# disable, or replace with configure_scheduler().
+scheduler: HashScheduler | None = HashScheduler(
+    memory_budget_kib=16 * DEFAULT_HASHER_PARAMS["memory_cost"],
+    max_queue=128,
 )
 
 
+def configure_scheduler(
+    memory_budget_kib: int | None,
+    max_queue: int = 128,
+    timeout: float | None = None,
+) -> HashScheduler | None:
+    """
+    Replace the hash scheduler. A budget of None turns admission off.
+    """
+    global scheduler
+    if memory_budget_kib is None:
+        scheduler = None
+    else:
+        scheduler = HashScheduler(memory_budget_kib, max_queue, timeout)
+    return scheduler
+
+
+# Login throttle, consulted before any hash is verified. Set to None to
+# disable.
+throttle: LoginThrottle | None = LoginThrottle()
+
+
+def _source_keys(source: str | None) -> list[tuple[str, str]]:
+    return [] if source is None else [("source", source)]
+
+
+def check_login_allowed(username: str, source: str | None = None) -> None:
+    """
+    Spend a login attempt for username, unless it (or source, identifying
+    the caller, if given) is over the limit: then raise LoginThrottledError.
+    A source only spends attempts when they fail, so one shared by many
+    users is not capped at the per-user rate.
+    """
+    if throttle is not None:
+        throttle.acquire(("user", username), check=_source_keys(source))
+
+
+def record_login_result(username: str, source: str | None, success: bool) -> None:
+    if throttle is None:
+        return
+    if success:
+        throttle.record_success(("user", username))
+    else:
+        sources = _source_keys(source)
+        throttle.record_failure(("user", username), *sources, charge=sources)
+
+
+def _hash_slot(memory_cost: int):
+    """
+    Context manager reserving memory_cost KiB with the scheduler, if any.
+    Raises HasherBusyError if the operation is shed.
+    """
+    if scheduler is None:
+        return nullcontext()
+    return scheduler.admit(memory_cost)
+
+
+def _memory_cost_of(encoded_hash: str) -> int:
+    try:
+        return extract_parameters(encoded_hash).memory_cost
+    except InvalidHashError:
+        return get_hasher().memory_cost
+
+
+def get_credential_store() -> CredentialStore:
+    """
+    Return the in-memory credential index backing PASSWD_FILE
+    (used by the flat-file storage backend).
+    """
+    return get_store(PASSWD_FILE)
+
+
+@metrics.timed("add_user")
 def add_user(username: str, password: str) -> bool:
     """
-    Enroll a new user and append a record to passwd.txt.
+    Enroll a new user and store the record with the storage backend
+    (appended to passwd.txt by default).
     Returns True if the user was added.
+    Raises HasherBusyError if the hash scheduler sheds the request.
     """
 
-    if not PASSWD_FILE.exists():
+    # New record: username:encoded_hash
+    hasher = get_hasher()
+    with tracing.span("hash"):
+        with _hash_slot(hasher.memory_cost), metrics.stage("argon2_hash"):
+            encoded_hash = hasher.hash(password)
+    with tracing.span("file_write"):
+        return get_backend().add_user(username, encoded_hash)
+
+
+def change_password(username: str, new_password: str) -> bool:
+    """
+    Store a hash of new_password for an existing user (a new record in
+    passwd.txt that supersedes the old one). The caller validates the
+    password against the policy first (Problem3ab.change_password does).
+    The user's sessions are ended.
+    Returns False if the user does not exist.
+    Raises HasherBusyError if the hash scheduler sheds the request.
+    """
+    hasher = get_hasher()
+    with _hash_slot(hasher.memory_cost):
+        encoded_hash = hasher.hash(new_password)
+    if not get_backend().replace_hash(username, encoded_hash):
         return False
+    revoke_user_sessions(username)
+    return True
 
-    # Append new record: username:encoded_hash
-    encoded_hash = ph.hash(password)
-    with PASSWD_FILE.open("a", encoding="utf-8") as file:
-        file.write(f"{username}:{encoded_hash}\n")
 
+def delete_user(username: str) -> bool:
+    """
+    Delete a user's credentials and roles (tombstone records in the
+    flat files) and end their sessions.
+    Returns False if the user does not exist.
+    """
+    if not get_backend().delete_user(username):
+        return False
+    revoke_user_sessions(username)
     return True
 
 
-def verify_login(username: str, password: str) -> bool:
+@metrics.timed("verify_login")
+def verify_login(username: str, password: str, source: str | None = None) -> bool:
     """
-    Look up the username in passwd.txt and verify the given password.
+    Look up the username with the storage backend and verify the given password.
+    Hashes made with outdated costs are upgraded in place on success.
     Returns True if the password is correct, False otherwise.
+    Raises LoginThrottledError if the attempt is over the login limit,
+    and HasherBusyError if the hash scheduler sheds the request.
     """
-    if not PASSWD_FILE.exists():
+    check_login_allowed(username, source)
+
+    with metrics.stage("passwd_lookup"):
+        encoded_hash = get_backend().get_hash(username)
+    verified = encoded_hash is not None and verify_password(
+        username, encoded_hash, password
+    )
+    record_login_result(username, source, verified)
+    return verified
+
+
+def verify_password(username: str, encoded_hash: str, password: str) -> bool:
+    """
+    Verify a password against a hash the caller already looked up for
+    username, upgrading the stored hash if its costs are outdated.
+    Raises HasherBusyError if the hash scheduler sheds the request.
+    """
+    hasher = get_hasher()
+    try:
+        with _hash_slot(_memory_cost_of(encoded_hash)), metrics.stage("argon2_verify"):
+            hasher.verify(encoded_hash, password)
+    except VerifyMismatchError:
         return False
 
-    with PASSWD_FILE.open("r", encoding="utf-8") as file:
-        for line in file:
-            line = line.strip()
-            if not line:
-                continue
-            stored_username, encoded_hash = line.split(":", 1)
-
-            if stored_username == username:
-                try:
-                    ph.verify(encoded_hash, password)
-                    return True
-                except VerifyMismatchError:
-                    return False
-
-    return False
+    if hasher.check_needs_rehash(encoded_hash):
+        _rehash(username, encoded_hash, password)
+    return True
+
+
+def _rehash(username: str, old_hash: str, password: str) -> None:
+    """
+    Re-hash a verified password with the current costs and replace the
+    stored record, unless it no longer holds old_hash (the password was
+    changed meanwhile). Failures are ignored; the upgrade is retried on
+    the next login.
+    """
+    try:
+        hasher = get_hasher()
+        with _hash_slot(hasher.memory_cost):
+            encoded_hash = hasher.hash(password)
+        get_backend().replace_hash(username, encoded_hash, expected=old_hash)
+    except (HasherBusyError, OSError):
+        pass
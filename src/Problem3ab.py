@@ -1,25 +1,66 @@
 from pathlib import Path
-import questionary
-from dataclasses import dataclass
+import os
+import threading
+from dataclasses import dataclass, field
 
+import src.metrics as metrics
+import src.tracing as tracing
 import src.Problem1c as problem1c
 import src.Problem2c as problem2c
+from src.breach_index import BreachIndex
+from src.credential_store import valid_key
+from src.sessions import get_session_store, revoke_user_sessions
+from src.storage import get_backend
 
+# Neither file is created at import: a missing weak password list is
+# empty, and roles.txt is created with the first role record.
 WEAK_PASSWD_FILE = Path("data/weak_passwords.txt")
-WEAK_PASSWD_FILE.touch(exist_ok=True)
+
+# Optional sorted-digest index (see src/breach_index.py). When set, it is
+# used instead of WEAK_PASSWD_FILE for the weak password check.
+WEAK_PASSWD_INDEX: Path | None = None
 
 ROLES_FILE = Path("data/roles.txt")
-ROLES_FILE.touch(exist_ok=True)
 
 SPECIAL_CHARS = set("!@#$%*&")
 
+# Process-wide weak password cache: (path, file signature, entries)
+_weak_cache: tuple[Path, tuple[int, int, int], frozenset[str]] | None = None
+_weak_cache_lock = threading.Lock()
+_breach_index: BreachIndex | None = None
+
 
 @dataclass
 class User:
     username: str
     roles: set[problem1c.Role]
+    # Token of the session started by signup/login, if any
+    session_token: str | None = field(default=None, compare=False, repr=False)
+
+    def to_compact(self, password_hash: str | None = None) -> "CompactUser":
+        return CompactUser(
+            username=self.username,
+            roles=problem1c.roles_to_mask(self.roles),
+            password_hash=password_hash,
+        )
+
+
+@dataclass(slots=True)
+class CompactUser:
+    """
+    Memory-lean user record for keeping many users resident: no
+    per-instance __dict__, and roles packed into one RoleFlag.
+    """
+
+    username: str
+    roles: problem1c.RoleFlag
+    password_hash: str | None = None
 
+    def to_user(self) -> User:
+        return User(username=self.username, roles=problem1c.roles_from_mask(self.roles))
 
+
+@metrics.timed("load_weak_passwords")
 def load_weak_passwords() -> set[str]:
     """
     Load weak passwords from WEAK_PASSWD_FILE (one per line).
@@ -35,27 +76,87 @@ def load_weak_passwords() -> set[str]:
     return weak
 
 
+def get_weak_passwords() -> frozenset[str]:
+    """
+    Return the lower-cased weak password list as a cached frozenset.
+    The file is only read again when its size or mtime changes.
+    """
+    global _weak_cache
+
+    try:
+        st = os.stat(WEAK_PASSWD_FILE)
+    except FileNotFoundError:
+        return frozenset()
+    signature = (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    with _weak_cache_lock:
+        cache = _weak_cache
+        if cache is not None and cache[0] == WEAK_PASSWD_FILE and cache[1] == signature:
+            return cache[2]
+
+        weak = frozenset(load_weak_passwords())
+        _weak_cache = (WEAK_PASSWD_FILE, signature, weak)
+        return weak
+
+
+def get_breach_index() -> BreachIndex | None:
+    """
+    Return the mmap-backed index at WEAK_PASSWD_INDEX, or None if no
+    index is configured. The index is reopened if the setting changes.
+    """
+    global _breach_index
+
+    if WEAK_PASSWD_INDEX is None:
+        return None
+
+    with _weak_cache_lock:
+        index = _breach_index
+        if index is None or index.path != Path(WEAK_PASSWD_INDEX):
+            if index is not None:
+                index.close()
+            index = _breach_index = BreachIndex(WEAK_PASSWD_INDEX)
+        return index
+
+
+def is_weak_password(password: str) -> bool:
+    """
+    Case-insensitive lookup in the configured weak password backend.
+    """
+    index = get_breach_index()
+    if index is not None:
+        return password in index
+    return password.lower() in get_weak_passwords()
+
+
+def preload_weak_passwords() -> int:
+    """
+    Warm the weak password backend at startup.
+    Returns the number of entries available.
+    """
+    index = get_breach_index()
+    if index is not None:
+        return len(index)
+    return len(get_weak_passwords())
+
+
 def valid_username(username: str) -> bool:
     """
-    Check if the username is valid (no colons, not empty or whitespace).
+    Check if the username is valid (not empty, no colons, line breaks or
+    surrounding whitespace) and not taken. The lookup goes to the backend's username index, so it
+    does not grow with the number of users; add_user repeats the check
+    atomically when the record is written.
     """
-    if ":" in username or not username.strip():
+    if not isinstance(username, str) or not valid_key(username):
         return False
 
     # Check if user already exists
-    if problem2c.PASSWD_FILE.exists():
-        with problem2c.PASSWD_FILE.open("r", encoding="utf-8") as file:
-            for line in file:
-                line = line.strip()
-                if not line:
-                    continue
-                stored_username, _ = line.split(":", 1)
-                if stored_username == username:
-                    return False
+    if get_backend().has_user(username):
+        return False
 
     return True
 
 
+@metrics.timed("validate_password")
 def validate_password(username: str, password: str) -> None:
     """
     Validate password against the policy. Raises ValueError if invalid.
@@ -89,21 +190,103 @@ def validate_password(username: str, password: str) -> None:
             "Password must contain at least one special character: !, @, #, $, %, *, &."
         )
 
-    weak_passwords = load_weak_passwords()
-    if password.lower() in weak_passwords:
+    if is_weak_password(password):
         raise ValueError("This password is too common and is not allowed.")
 
 
 def store_roles(username: str, roles: list[str]) -> None:
     """
-    Store roles for a given user in roles.txt.
-    Format: username:ROLE1,ROLE2
+    Store roles for a given user with the storage backend.
+    Flat-file format (roles.txt): username:ROLE1,ROLE2
+    """
+    get_backend().store_roles(username, roles)
+
+
+def set_roles(username: str, roles: list[str]) -> None:
+    """
+    Replace the roles of an existing user and end their sessions, which
+    carry the old roles. Raises ValueError if the user does not exist or
+    a role is unknown.
+    """
+    if not get_backend().has_user(username):
+        raise ValueError("No such user.")
+    if not roles:
+        raise ValueError("No roles given.")
+    known = {role.value for role in problem1c.Role}
+    unknown = [role for role in roles if role not in known]
+    if unknown:
+        raise ValueError(f"Unknown roles: {', '.join(unknown)}.")
+    store_roles(username, roles)
+    revoke_user_sessions(username)
+
+
+def change_password(username: str, new_password: str) -> bool:
+    """
+    Validate new_password against the policy, then store it for an
+    existing user and end their sessions. Returns False if the user does
+    not exist. Raises ValueError if the password is invalid, and
+    HasherBusyError if the hash scheduler sheds the request.
+    """
+    if not isinstance(new_password, str):
+        raise ValueError("Password is invalid.")
+    validate_password(username, new_password)
+    return problem2c.change_password(username, new_password)
+
+
+def store_roles_many(entries: list[tuple[str, list[str]]], sync: bool = True) -> None:
+    """
+    Store roles for several users in one write (with a single fsync when
+    sync is set for the flat-file backend).
+    """
+    get_backend().store_roles_many(entries, sync=sync)
+
+
+def create_user(username: str, password: str, role_values: list[str]) -> User:
+    """
+    Store an already validated user (passwd.txt, then roles.txt) and
+    start a session. Raises ValueError if the username was taken in the
+    meantime or the records cannot be written, and HasherBusyError if the
+    hash scheduler sheds the request.
+    """
+    if not problem2c.add_user(username, password):
+        raise ValueError("Failed to write user to password file.")
+
+    try:
+        with tracing.span("role_store"):
+            store_roles(username, role_values)
+    except Exception:
+        raise ValueError("Failed to store user roles.")
+
+    with tracing.span("role_mapping"):
+        role_set = problem1c.roles_from_values(role_values)
+    with tracing.span("session"):
+        token = get_session_store().issue(username, role_set)
+    return User(username=username, roles=role_set, session_token=token)
+
+
+@tracing.traced("register_user")
+def register_user(username: str, password: str, role_values: list[str]) -> User:
     """
-    entry = f"{username}:{','.join(roles)}\n"
-    with ROLES_FILE.open("a", encoding="utf-8") as file:
-        file.write(entry)
+    Non-interactive signup: validate the username, roles and password,
+    then create the user. Raises ValueError with the reason if anything
+    is invalid, and HasherBusyError if the hash scheduler sheds the request.
+    """
+    with tracing.span("validate_username"):
+        if not isinstance(username, str) or not valid_username(username):
+            raise ValueError("Invalid or already existing username.")
+    if not role_values:
+        raise ValueError("No roles selected.")
+    unknown = [value for value in role_values if value not in problem1c.ROLE_BY_VALUE]
+    if unknown:
+        raise ValueError(f"Unknown roles: {', '.join(map(str, unknown))}.")
+    if not isinstance(password, str):
+        raise ValueError("Password is invalid.")
+    with tracing.span("password_policy"):
+        validate_password(username, password)
+    return create_user(username, password, role_values)
 
 
+@tracing.traced("signup")
 def signup() -> User | None:
     """
     Complete signup flow:
@@ -115,23 +298,32 @@ def signup() -> User | None:
     6. Validate password
     7. Add user to passwd.txt
     8. Add roles to roles.txt
+    9. Start a session
 
-    Returns a User dataclass on success, or None on failure.
+    Returns a User dataclass (carrying its session token) on success, or
+    None on failure.
     """
+    # Imported here so that non-interactive callers never load the prompt
+    # toolkit
+    import questionary
 
     # 1. Ask for username
-    username = questionary.text("Enter username:").ask()
+    with tracing.span("prompt", field="username"):
+        username = questionary.text("Enter username:").ask()
 
     # 2. Validate username
-    if not valid_username(username):
+    with tracing.span("validate_username"):
+        username_ok = valid_username(username)
+    if not username_ok:
         print("Invalid or already existing username.")
         return None
 
     # 3. Ask user to choose roles (strings like "Client", "Employee", etc.)
-    role_values = questionary.checkbox(
-        "Select your roles (space to select, enter to confirm):",
-        choices=[role.value for role in problem1c.Role],
-    ).ask()
+    with tracing.span("prompt", field="roles"):
+        role_values = questionary.checkbox(
+            "Select your roles (space to select, enter to confirm):",
+            choices=[role.value for role in problem1c.Role],
+        ).ask()
 
     # 4. Validate roles
     if not role_values:
@@ -139,37 +331,27 @@ def signup() -> User | None:
         return None
 
     # 5. Ask for password
-    password = questionary.password("Enter password:").ask()
+    with tracing.span("prompt", field="password"):
+        password = questionary.password("Enter password:").ask()
 
     # 6. Validate password using proactive checker
     try:
-        validate_password(username, password)
+        with tracing.span("password_policy"):
+            validate_password(username, password)
         print("Password is valid.")
     except ValueError as e:
         print(f"Password is invalid: {e}")
         return None
 
-    # 7. Add user to passwd.txt
-    added = problem2c.add_user(username, password)
-    if not added:
-        print("Error: Failed to write user to password file.")
-        return None
-
-    # 8. Store roles in roles.txt (as their string values)
+    # 7-9. Add user to passwd.txt and roles to roles.txt, start a session
     try:
-        store_roles(username, role_values)
-    except Exception:
-        print("Error: Failed to store user roles.")
+        user = create_user(username, password, role_values)
+    except problem2c.HasherBusyError:
+        print("The system is busy, please try again shortly.")
+        return None
+    except ValueError as e:
+        print(f"Error: {e}")
         return None
 
-    # 9. Map string values back to Role enums for the User dataclass
-    role_set: set[problem1c.Role] = set()
-    for rv in role_values:
-        for role in problem1c.Role:
-            if role.value == rv:
-                role_set.add(role)
-                break
-
-    user = User(username=username, roles=role_set)
     print("Signup successful.")
     return user
@@ -1,56 +1,80 @@
-import questionary
-
+import src.metrics as metrics
+import src.tracing as tracing
 import src.Problem1c as problem1c
 import src.Problem2c as problem2c
 import src.Problem3ab as problem3ab
+from src.sessions import get_session_store, save_sessions
+from src.storage import get_backend
 
 
+@metrics.timed("getUserRole")
 def getUserRole(username: str):
     """
-    Retrieve the roles associated with the given username from ROLES_FILE.
+    Retrieve the roles associated with the given username from the
+    storage backend (ROLES_FILE by default).
     Returns a list of roles or an empty list if user not found.
     """
-    roles = []
-    if problem3ab.ROLES_FILE.exists():
-        with problem3ab.ROLES_FILE.open("r", encoding="utf-8") as file:
-            for line in file:
-                line = line.strip()
-                if not line:
-                    continue
-                stored_username, stored_roles = line.split(":", 1)
-
-                if stored_username == username:
-                    roles = [
-                        role.strip() for role in stored_roles.split(",") if role.strip()
-                    ]
-                    break
-    return roles
-
-
-def login() -> problem3ab.User | None:
+    return get_backend().get_roles(username)
+
+
+@tracing.traced("authenticate")
+@metrics.timed("authenticate")
+def authenticate(
+    username: str, password: str, source: str | None = None
+) -> problem3ab.User | None:
+    """
+    Non-interactive login. Attempts over the login throttle (per username
+    and per source) are turned away before any hashing. The hash and role
+    bitmask come from a single storage backend lookup, so a concurrent
+    write cannot pair one user's hash with different roles.
+    On success a session is started and its token set on the User.
+    Returns None if the credentials are wrong.
+    Raises LoginThrottledError or HasherBusyError if the attempt is shed.
+    """
+    problem2c.check_login_allowed(username, source)
+
+    with tracing.span("user_lookup"), metrics.stage("user_lookup"):
+        record = get_backend().get_user(username)
+    with tracing.span("hash"):
+        verified = record is not None and problem2c.verify_password(
+            username, record[0], password
+        )
+    problem2c.record_login_result(username, source, verified)
+    if not verified:
+        return None
+
+    with tracing.span("role_mapping"), metrics.stage("role_mapping"):
+        roles = problem1c.roles_from_mask(record[1])
+    with tracing.span("session"):
+        token = get_session_store().issue(username, roles)
+    return problem3ab.User(username=username, roles=roles, session_token=token)
+
+
+@tracing.traced("login")
+def login(source: str | None = None) -> problem3ab.User | None:
     """
     Prompt for credentials, verify them, and return a User object if valid.
-    Loads the user's roles from roles.txt and maps them to Role enums.
     Returns None if authentication fails.
     """
-    username = questionary.text("Enter username:").ask()
-    password = questionary.password("Enter password:").ask()
+    import questionary
 
-    user = problem2c.verify_login(username, password)
-    if user is None:
-        print("Invalid username or password.")
-        return None
-
-    role_strings = getUserRole(username)
+    with tracing.span("prompt", field="username"):
+        username = questionary.text("Enter username:").ask()
+    with tracing.span("prompt", field="password"):
+        password = questionary.password("Enter password:").ask()
 
-    roles: set[problem1c.Role] = set()
-    for rs in role_strings:
-        for role in problem1c.Role:
-            if role.value == rs:
-                roles.add(role)
-                break
+    try:
+        user = authenticate(username, password, source)
+    except problem2c.LoginThrottledError as e:
+        print(f"Too many login attempts, try again in {e.retry_after:.0f} seconds.")
+        return None
+    except problem2c.HasherBusyError:
+        print("The system is busy, please try again shortly.")
+        return None
 
-    return problem3ab.User(username=username, roles=roles)
+    if user is None:
+        print("Invalid username or password.")
+    return user
 
 
 def logged_in_menu(current_user: problem3ab.User):
@@ -86,6 +110,8 @@ def justInvest_CLI():
     Handles signup/login, session management, and operation selection
     until the user logs out or exits.
     """
+    import questionary
+
     current_user: problem3ab.User | None = None
 
     while True:
@@ -115,6 +141,7 @@ def justInvest_CLI():
 
             else:  # Exit
                 print("Exiting application.")
+                save_sessions()
                 return
 
             if current_user is not None:
@@ -128,14 +155,25 @@ def justInvest_CLI():
             ).ask()
 
             if selection == "Logout":
+                if current_user.session_token is not None:
+                    get_session_store().revoke(current_user.session_token)
                 print("Logged out.\n")
                 current_user = None
                 continue
 
             if selection == "Exit":
                 print("Exiting application.\n")
+                save_sessions()
                 return
 
+            # Each operation is checked against the session, not re-verified
+            # with the password; an expired session logs the user out.
+            session = get_session_store().validate(current_user.session_token)
+            if session is None:
+                print("Your session has expired, please log in again.\n")
+                current_user = None
+                continue
+
             chosen_op = next(
                 (op for op in problem1c.Operations if op.value == selection),
                 None,
@@ -145,7 +183,7 @@ def justInvest_CLI():
                 print("Unknown operation selected.")
                 continue
 
-            if problem1c.canPerformOperation(current_user.roles, chosen_op):
+            if problem1c.canPerformOperation(session.roles, chosen_op):
                 print(f"\n-> Performing operation: {chosen_op.value} ...\n")
             else:
                 print("You are not allowed to perform this operation.\n")
@@ -0,0 +1,217 @@
+"""
+Sorted-digest index for very large breached/weak password lists.
+
+The file is a header followed by the sorted, de-duplicated fixed-width
+digests of every lower-cased password. Lookups mmap it and binary-search,
+so opening is instant and memory use does not grow with the corpus.
+
+    python -m src.breach_index build data/weak_passwords.txt data/weak.idx
+"""
+
+import argparse
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+from src.credential_store import atomic_writer
+
+MAGIC = b"JIBX"
+FORMAT_VERSION = 1
+DEFAULT_DIGEST_SIZE = 16
+
+# magic, format version, digest size, entry count
+_HEADER = struct.Struct("<4sBB2xQ")
+
+# Number of digests sorted in memory at once while building
+DEFAULT_CHUNK_SIZE = 4_000_000
+
+
+def password_digest(password: str, digest_size: int = DEFAULT_DIGEST_SIZE) -> bytes:
+    """
+    Digest used for index entries. Matching is case-insensitive, like the
+    plaintext weak password list.
+    """
+    return hashlib.blake2b(
+        password.lower().encode("utf-8"), digest_size=digest_size
+    ).digest()
+
+
+def _iter_passwords(source: Path) -> Iterator[str]:
+    with source.open("r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            pw = line.strip()
+            if pw:
+                yield pw
+
+
+def _write_run(digests: list[bytes], directory: str) -> str:
+    digests.sort()
+    fd, run_path = tempfile.mkstemp(suffix=".run", dir=directory)
+    with os.fdopen(fd, "wb") as f:
+        f.write(b"".join(digests))
+    return run_path
+
+
+def _read_run(f: BinaryIO, digest_size: int) -> Iterator[bytes]:
+    while True:
+        block = f.read(digest_size * 65536)
+        if not block:
+            return
+        for i in range(0, len(block), digest_size):
+            yield block[i : i + digest_size]
+
+
+def build_index(
+    source: Path,
+    dest: Path,
+    digest_size: int = DEFAULT_DIGEST_SIZE,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """
+    Build a sorted digest index at dest from the plaintext list at source.
+    Inputs larger than chunk_size entries are sorted in runs on disk and
+    merged, so memory use is bounded by the chunk size.
+    Returns the number of unique entries written.
+    """
+    if not 8 <= digest_size <= 64:
+        raise ValueError("digest_size must be between 8 and 64 bytes.")
+
+    source = Path(source)
+    dest = Path(dest)
+    work_dir = str(dest.parent)
+    runs: list[str] = []
+
+    try:
+        chunk: list[bytes] = []
+        for pw in _iter_passwords(source):
+            chunk.append(password_digest(pw, digest_size))
+            if len(chunk) >= chunk_size:
+                runs.append(_write_run(chunk, work_dir))
+                chunk = []
+        if chunk or not runs:
+            runs.append(_write_run(chunk, work_dir))
+
+        run_files = [open(run, "rb") for run in runs]
+        try:
+            merged = heapq.merge(*(_read_run(f, digest_size) for f in run_files))
+
+            count = 0
+            with atomic_writer(dest) as out:
+                out.write(_HEADER.pack(MAGIC, FORMAT_VERSION, digest_size, 0))
+                previous = None
+                for digest in merged:
+                    if digest != previous:
+                        out.write(digest)
+                        count += 1
+                        previous = digest
+                out.seek(0)
+                out.write(_HEADER.pack(MAGIC, FORMAT_VERSION, digest_size, count))
+        finally:
+            for f in run_files:
+                f.close()
+    finally:
+        for run in runs:
+            try:
+                os.remove(run)
+            except FileNotFoundError:
+                pass
+
+    return count
+
+
+class BreachIndex:
+    """
+    Read-only, memory-mapped view of an index produced by build_index.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError(f"{self.path} is not a password index.")
+            magic, version, digest_size, count = _HEADER.unpack(header)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"{self.path} is not a password index.")
+            if self.path.stat().st_size != _HEADER.size + count * digest_size:
+                raise ValueError(f"{self.path} is truncated or corrupt.")
+
+            self.digest_size = digest_size
+            self.count = count
+            # mmap refuses zero-length mappings; an empty index has no entries
+            self._mm = (
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if count else None
+            )
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, password: str) -> bool:
+        if self._mm is None:
+            return False
+
+        key = password_digest(password, self.digest_size)
+        mm = self._mm
+        size = self.digest_size
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = _HEADER.size + mid * size
+            probe = mm[start : start + size]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def __enter__(self) -> "BreachIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.breach_index",
+        description="Build or query a sorted-digest password index.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="build an index from a plaintext list")
+    build.add_argument("source", type=Path)
+    build.add_argument("dest", type=Path)
+    build.add_argument("--digest-size", type=int, default=DEFAULT_DIGEST_SIZE)
+    build.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    check = sub.add_parser("check", help="look up passwords in an index")
+    check.add_argument("index", type=Path)
+    check.add_argument("passwords", nargs="+")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        count = build_index(args.source, args.dest, args.digest_size, args.chunk_size)
+        print(f"Wrote {count} entries to {args.dest}.")
+        return 0
+
+    with BreachIndex(args.index) as index:
+        for pw in args.passwords:
+            print(f"{pw}: {'found' if pw in index else 'not found'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,226 @@
+"""
+Bulk user enrollment from CSV or JSONL.
+
+Each record carries a username, a password and its roles. CSV files need
+a username,password,roles header, with roles comma-separated inside the
+field. JSONL roles may be a list or a comma-separated string.
+
+    python -m src.bulk_enroll accounts.jsonl --workers 8
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, TextIO
+
+import src.Problem1c as problem1c
+import src.Problem2c as problem2c
+import src.Problem3ab as problem3ab
+from src.credential_store import valid_key
+from src.storage import get_backend
+
+ROLE_VALUES = {role.value for role in problem1c.Role}
+
+
+@dataclass
+class EnrollmentRecord:
+    username: str
+    password: str
+    roles: list[str]
+    line_no: int = 0
+
+
+@dataclass
+class EnrollmentReport:
+    enrolled: int = 0
+    # (line number, reason) for every record that was not enrolled
+    rejected: list[tuple[int, str]] = field(default_factory=list)
+
+
+def iter_rows(stream: TextIO, fmt: str) -> Iterator[tuple[int, dict | None]]:
+    """
+    Yield (line number, row) pairs from a CSV or JSONL stream.
+    Rows that cannot be parsed are yielded as None.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            row = None
+        yield line_no, row if isinstance(row, dict) else None
+
+
+def parse_record(row: dict | None) -> EnrollmentRecord:
+    """
+    Turn a parsed row into an EnrollmentRecord and check it against the
+    username, role and password policies. Raises ValueError if invalid.
+    """
+    if row is None:
+        raise ValueError("Malformed record.")
+
+    username = row.get("username")
+    password = row.get("password")
+    roles = row.get("roles") or []
+    if not isinstance(username, str) or not isinstance(password, str):
+        raise ValueError("Record needs a username and a password.")
+    if isinstance(roles, str):
+        roles = roles.split(",")
+    roles = [str(role).strip() for role in roles if str(role).strip()]
+
+    if not valid_key(username):
+        raise ValueError("Invalid username.")
+    if not roles:
+        raise ValueError("No roles given.")
+    unknown = [role for role in roles if role not in ROLE_VALUES]
+    if unknown:
+        raise ValueError(f"Unknown roles: {', '.join(unknown)}.")
+
+    problem3ab.validate_password(username, password)
+    return EnrollmentRecord(username=username, password=password, roles=roles)
+
+
+def _init_worker(hasher_params: dict[str, int]) -> None:
+    # Spawned workers do not inherit the parent's configured hasher
+    problem2c.configure_hasher(**hasher_params)
+
+
+def _hash_password(password: str) -> str:
+    return problem2c.get_hasher().hash(password)
+
+
+def _commit_batch(
+    batch: list[EnrollmentRecord],
+    pool: ProcessPoolExecutor,
+    workers: int,
+    report: EnrollmentReport,
+    sync: bool,
+) -> None:
+    if not batch:
+        return
+    chunksize = max(1, len(batch) // (workers * 4))
+    hashes = list(
+        pool.map(_hash_password, [r.password for r in batch], chunksize=chunksize)
+    )
+
+    # passwd.txt before roles.txt, in the same order as signup. A username
+    # taken since it was checked is not added, and its roles not stored.
+    added = set(
+        get_backend().add_users(
+            [(r.username, h) for r, h in zip(batch, hashes)], sync=sync
+        )
+    )
+    problem3ab.store_roles_many(
+        [(r.username, r.roles) for r in batch if r.username in added], sync=sync
+    )
+    report.enrolled += len(added)
+    for r in batch:
+        if r.username not in added:
+            report.rejected.append((r.line_no, "Username already exists."))
+
+
+def enroll(
+    rows: Iterable[tuple[int, dict | None]],
+    workers: int | None = None,
+    batch_size: int = 1000,
+    sync: bool = True,
+) -> EnrollmentReport:
+    """
+    Validate and enroll a stream of rows from iter_rows.
+
+    Passwords are hashed across a process pool with the parent's Argon2
+    costs, and every batch_size
+    accepted records are written to passwd.txt and roles.txt with one
+    append (and one fsync) per file.
+    """
+    report = EnrollmentReport()
+    backend = get_backend()
+    seen: set[str] = set()
+    batch: list[EnrollmentRecord] = []
+
+    hasher = problem2c.get_hasher()
+    hasher_params = {
+        "time_cost": hasher.time_cost,
+        "memory_cost": hasher.memory_cost,
+        "parallelism": hasher.parallelism,
+    }
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(hasher_params,)
+    ) as pool:
+        for line_no, row in rows:
+            try:
+                record = parse_record(row)
+                if record.username in seen or backend.has_user(record.username):
+                    raise ValueError("Username already exists.")
+            except ValueError as e:
+                report.rejected.append((line_no, str(e)))
+                continue
+
+            seen.add(record.username)
+            record.line_no = line_no
+            batch.append(record)
+            if len(batch) >= batch_size:
+                _commit_batch(batch, pool, workers, report, sync)
+                batch = []
+
+        _commit_batch(batch, pool, workers, report, sync)
+
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.bulk_enroll",
+        description="Enroll many users from a CSV or JSONL file.",
+    )
+    parser.add_argument("file", help="input file, or - for stdin")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--no-fsync", action="store_true", help="skip the fsync after each batch"
+    )
+    args = parser.parse_args(argv)
+
+    fmt = args.format
+    if fmt is None:
+        fmt = "csv" if args.file.lower().endswith(".csv") else "jsonl"
+
+    if args.file == "-":
+        stream = sys.stdin
+    else:
+        stream = Path(args.file).open("r", encoding="utf-8", newline="")
+
+    try:
+        report = enroll(
+            iter_rows(stream, fmt),
+            workers=args.workers,
+            batch_size=args.batch_size,
+            sync=not args.no_fsync,
+        )
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+    for line_no, reason in report.rejected:
+        print(f"line {line_no}: {reason}", file=sys.stderr)
+    print(f"Enrolled {report.enrolled} users, rejected {len(report.rejected)}.")
+    return 0 if not report.rejected else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
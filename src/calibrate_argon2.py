@@ -0,0 +1,106 @@
+"""
+Pick Argon2id costs for this machine and save them for src.Problem2c.
+
+Memory is set to the ceiling (halved while even time_cost=1 is too slow),
+then time_cost is raised until a verification takes about the target.
+
+    python -m src.calibrate_argon2 --target-ms 250 --max-memory-mib 64
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import src.Problem2c as problem2c
+
+MIN_MEMORY_KIB = 8 * 1024
+MAX_TIME_COST = 20
+
+
+def measure_verify(
+    time_cost: int, memory_cost: int, parallelism: int, rounds: int = 3
+) -> float:
+    """
+    Median wall time, in seconds, of one verification with these costs.
+    """
+    ph = problem2c.make_hasher(time_cost, memory_cost, parallelism)
+    encoded_hash = ph.hash("calibration-password")
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        ph.verify(encoded_hash, "calibration-password")
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def calibrate(
+    target_ms: float = 250,
+    max_memory_kib: int = 65536,
+    parallelism: int = 2,
+    rounds: int = 3,
+) -> dict[str, int]:
+    """
+    Return the largest costs whose verify time stays within target_ms.
+    """
+    target = target_ms / 1000
+    memory_cost = max_memory_kib
+
+    while (
+        memory_cost > MIN_MEMORY_KIB
+        and measure_verify(1, memory_cost, parallelism, rounds) > target
+    ):
+        memory_cost //= 2
+
+    time_cost = 1
+    while time_cost < MAX_TIME_COST:
+        if measure_verify(time_cost + 1, memory_cost, parallelism, rounds) > target:
+            break
+        time_cost += 1
+
+    return {
+        "time_cost": time_cost,
+        "memory_cost": memory_cost,
+        "parallelism": parallelism,
+    }
+
+
+def save_params(params: dict[str, int], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(params, f, indent=2)
+        f.write("\n")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.calibrate_argon2",
+        description="Benchmark Argon2id and save costs that hit a target latency.",
+    )
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument("--max-memory-mib", type=int, default=64)
+    parser.add_argument("--parallelism", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--out", type=Path, default=problem2c.HASHER_CONFIG_FILE)
+    args = parser.parse_args(argv)
+
+    params = calibrate(
+        target_ms=args.target_ms,
+        max_memory_kib=args.max_memory_mib * 1024,
+        parallelism=args.parallelism,
+        rounds=args.rounds,
+    )
+    latency = measure_verify(**params, rounds=args.rounds)
+    save_params(params, args.out)
+
+    print(
+        f"time_cost={params['time_cost']} memory_cost={params['memory_cost']} KiB "
+        f"parallelism={params['parallelism']} -> {latency * 1000:.0f} ms per verify"
+    )
+    print(f"Saved to {args.out}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,130 @@
+"""
+Non-interactive request handling shared by the socket service
+(src/server.py) and the scripted CLI (src/main.py).
+
+A request is a dict with an "op" and its arguments:
+
+    {"op": "signup", "username": "...", "password": "...", "roles": ["Client"]}
+    {"op": "login", "username": "...", "password": "..."}
+    {"op": "authorize", "token": "...", "operation": "..."}
+    {"op": "list-operations", "token": "..."}
+    {"op": "metrics", "format": "prometheus"}   (or "json", the default)
+
+and its response echoes "id" and carries "ok": true plus results, or
+"ok": false and an "error" message.
+"""
+
+from typing import Any
+
+import src.metrics as metrics
+import src.tracing as tracing
+import src.Problem1c as problem1c
+import src.Problem2c as problem2c
+import src.Problem3ab as problem3ab
+import src.Problem4ab as problem4ab
+from src.sessions import Session, get_session_store
+
+# Operations that run Argon2 and so may take hundreds of milliseconds
+HASHING_OPS = frozenset({"signup", "login"})
+
+
+def parse_operation(value: Any) -> problem1c.Operations:
+    """
+    Accept an operation by its value ("View money market instruments")
+    or its name ("VIEW_MONEY_MARKET_INSTRUMENTS").
+    """
+    for op in problem1c.Operations:
+        if value == op.value or value == op.name:
+            return op
+    raise ValueError("Unknown operation.")
+
+
+def _session(request: dict) -> Session:
+    session = get_session_store().validate(request.get("token"))
+    if session is None:
+        raise ValueError("Invalid or expired session.")
+    return session
+
+
+def _user_result(user: problem3ab.User) -> dict:
+    return {
+        "username": user.username,
+        "roles": problem1c.role_values_from_mask(problem1c.roles_to_mask(user.roles)),
+        "token": user.session_token,
+    }
+
+
+def execute(request: dict, source: str | None = None) -> dict:
+    """
+    Run one request and return its results. Raises ValueError for an
+    invalid request or failed login, LoginThrottledError and
+    HasherBusyError when the attempt is shed.
+    """
+    op = request.get("op")
+
+    if op == "signup":
+        roles = request.get("roles")
+        if not isinstance(roles, list):
+            raise ValueError("roles must be a list.")
+        user = problem3ab.register_user(
+            request.get("username"), request.get("password"), roles
+        )
+        return _user_result(user)
+
+    if op == "login":
+        username = request.get("username")
+        password = request.get("password")
+        if not isinstance(username, str) or not isinstance(password, str):
+            raise ValueError("username and password are required.")
+        user = problem4ab.authenticate(username, password, source)
+        if user is None:
+            raise ValueError("Invalid username or password.")
+        return _user_result(user)
+
+    if op == "authorize":
+        session = _session(request)
+        operation = parse_operation(request.get("operation"))
+        reason = problem1c.operation_denial(session.roles, operation)
+        result = {"allowed": reason is None}
+        if reason is not None:
+            result["reason"] = reason
+        return result
+
+    if op == "list-operations":
+        if request.get("token") is None:
+            return {"operations": [op.value for op in problem1c.Operations]}
+        session = _session(request)
+        allowed = problem1c.getAuthorizedOperations(set(session.roles))
+        return {
+            "operations": [op.value for op in problem1c.Operations if op in allowed]
+        }
+
+    if op == "metrics":
+        if request.get("format") == "prometheus":
+            return {"metrics": metrics.render_prometheus()}
+        return {"metrics": metrics.snapshot()}
+
+    raise ValueError(f"Unknown op: {op!r}.")
+
+
+def handle(request: Any, source: str | None = None) -> dict:
+    """
+    Answer one decoded request. Never raises.
+    """
+    if not isinstance(request, dict):
+        return {"ok": False, "error": "Malformed request."}
+
+    response: dict[str, Any] = {"id": request.get("id")}
+    try:
+        with tracing.span("request", op=request.get("op")):
+            response.update(execute(request, source))
+        response["ok"] = True
+    except (ValueError, TypeError) as e:
+        response.update(ok=False, error=str(e))
+    except problem2c.LoginThrottledError as e:
+        response.update(ok=False, error=str(e), retry_after=e.retry_after)
+    except problem2c.HasherBusyError:
+        response.update(ok=False, error="The system is busy, try again shortly.")
+    except Exception:
+        response.update(ok=False, error="Internal error.")
+    return response
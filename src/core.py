@@ -0,0 +1,93 @@
+"""
+The non-interactive justInvest API, for services, workers and scripts.
+
+Importing it reads and creates no files and does not load questionary:
+the hasher, the weak password list, the user index and the compiled
+policy are all built on first use. Call configure() first to point the
+library somewhere other than ./data:
+
+    import src.core as core
+
+    core.configure(data_dir="/var/lib/justinvest")
+    user = core.register_user("alice", "GoodPass1!", ["Client"])
+    core.operation_denial(user.roles, core.Operations.VIEW_SELF_ACCOUNT_BALANCE)
+"""
+
+from pathlib import Path
+
+import src.Problem2c as problem2c
+import src.Problem3ab as problem3ab
+import src.sessions as sessions
+from src.Problem1c import (
+    Operations,
+    Role,
+    getAuthorizedOperations,
+    operation_denial,
+)
+from src.Problem2c import (
+    HasherBusyError,
+    LoginThrottledError,
+    delete_user,
+    verify_login,
+)
+from src.Problem3ab import (
+    User,
+    change_password,
+    register_user,
+    set_roles,
+    valid_username,
+    validate_password,
+)
+from src.Problem4ab import authenticate, getUserRole
+from src.sessions import get_session_store
+
+__all__ = [
+    "HasherBusyError",
+    "LoginThrottledError",
+    "Operations",
+    "Role",
+    "User",
+    "authenticate",
+    "change_password",
+    "configure",
+    "delete_user",
+    "getAuthorizedOperations",
+    "getUserRole",
+    "get_session_store",
+    "operation_denial",
+    "register_user",
+    "set_roles",
+    "valid_username",
+    "validate_password",
+    "verify_login",
+]
+
+
+def configure(
+    data_dir: str | Path | None = None,
+    hasher_params: dict[str, int] | None = None,
+    weak_passwd_index: str | Path | None = None,
+) -> None:
+    """
+    Point the library at the files in data_dir (passwd.txt, roles.txt,
+    weak_passwords.txt, argon2.json, session.key, sessions.json) and/or
+    set the Argon2 costs explicitly instead of reading them from
+    argon2.json. A weak_passwd_index (built with src.breach_index) is
+    checked instead of weak_passwords.txt. Nothing is read until it is
+    needed.
+    """
+    if data_dir is not None:
+        data_dir = Path(data_dir)
+        problem2c.PASSWD_FILE = data_dir / "passwd.txt"
+        problem2c.HASHER_CONFIG_FILE = data_dir / "argon2.json"
+        problem3ab.ROLES_FILE = data_dir / "roles.txt"
+        problem3ab.WEAK_PASSWD_FILE = data_dir / "weak_passwords.txt"
+        sessions.SESSION_SECRET_FILE = data_dir / "session.key"
+        sessions.SESSION_SNAPSHOT_FILE = data_dir / "sessions.json"
+        # A hasher built from the old argon2.json is rebuilt on next use
+        problem2c.ph = None
+    if hasher_params is not None:
+        params = dict(problem2c.DEFAULT_HASHER_PARAMS, **hasher_params)
+        problem2c.configure_hasher(**params)
+    if weak_passwd_index is not None:
+        problem3ab.WEAK_PASSWD_INDEX = Path(weak_passwd_index)
@@ -0,0 +1,578 @@
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterator, TextIO
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+# A record whose value is TOMBSTONE deletes the username. The files are
+# logs: the last record for a username wins.
+TOMBSTONE = "!"
+
+_DELETED = object()
+
+# Characters str.splitlines() treats as line breaks. None may appear in a
+# username or value: a record smuggled in after one would be replayed as
+# the last (winning) record for another user.
+LINE_BREAKS = frozenset("\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029")
+
+# Sidecar offset index written by compact(): a header, then one u64 offset
+# per record of the sorted data file. The header pins the data file's
+# inode, the length of its sorted region and a fingerprint of that region,
+# so a stale sidecar is ignored rather than trusted.
+_INDEX_MAGIC = b"JIRX"
+_INDEX_VERSION = 1
+_INDEX_HEADER = struct.Struct("<4sB3xQQQ16s")
+_OFFSET = struct.Struct("<Q")
+_FINGERPRINT_SPAN = 4096
+
+
+def index_path(path: Path) -> Path:
+    """
+    Location of the sidecar offset index for a data file.
+    """
+    return path.with_name(path.name + ".idx")
+
+
+def _fingerprint(data, size: int) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(data[: min(size, _FINGERPRINT_SPAN)])
+    digest.update(data[max(0, size - _FINGERPRINT_SPAN) : size])
+    return digest.digest()
+
+
+class SortedBase:
+    """
+    The sorted region of a compacted data file, memory-mapped and looked
+    up by binary search over the offsets in its sidecar index.
+    """
+
+    def __init__(self, data: mmap.mmap, offsets: mmap.mmap, size: int, count: int):
+        self.size = size
+        self.count = count
+        self._data = data
+        self._offsets = offsets
+
+    @classmethod
+    def open(cls, path: Path, st: os.stat_result) -> "SortedBase | None":
+        """
+        Map the sorted region of path if a sidecar index matching the
+        file exists. Returns None otherwise.
+        """
+        try:
+            with index_path(path).open("rb") as f:
+                header = f.read(_INDEX_HEADER.size)
+                if len(header) < _INDEX_HEADER.size:
+                    return None
+                magic, version, inode, size, count, fingerprint = _INDEX_HEADER.unpack(
+                    header
+                )
+                if (
+                    magic != _INDEX_MAGIC
+                    or version != _INDEX_VERSION
+                    or inode != st.st_ino
+                    or not 0 < size <= st.st_size
+                    or os.fstat(f.fileno()).st_size
+                    != _INDEX_HEADER.size + _OFFSET.size * count
+                ):
+                    return None
+                offsets = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+
+        with path.open("rb") as f:
+            data = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        if _fingerprint(data, size) != fingerprint:
+            data.close()
+            offsets.close()
+            return None
+        return cls(data, offsets, size, count)
+
+    def _record(self, i: int) -> tuple[bytes, int]:
+        (start,) = _OFFSET.unpack_from(self._offsets, _INDEX_HEADER.size + 8 * i)
+        colon = self._data.find(b":", start)
+        return self._data[start:colon], colon
+
+    def _value(self, colon: int) -> str:
+        end = self._data.find(b"\n", colon)
+        return self._data[colon + 1 : end].decode("utf-8")
+
+    def find(self, username: str) -> str | None:
+        key = username.encode("utf-8")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probe, colon = self._record(mid)
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return self._value(colon)
+        return None
+
+    def items(self) -> Iterator[tuple[str, str]]:
+        for i in range(self.count):
+            key, colon = self._record(i)
+            yield key.decode("utf-8"), self._value(colon)
+
+    def close(self) -> None:
+        self._data.close()
+        self._offsets.close()
+
+
+@contextmanager
+def locked_append(path: Path) -> Iterator[TextIO]:
+    """
+    Open path for appending under an exclusive flock (where available).
+    If compaction replaced the file while we waited for the lock, the new
+    file is opened instead so no record lands in the discarded one.
+    """
+    while True:
+        file = path.open("a", encoding="utf-8")
+        try:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+                if os.fstat(file.fileno()).st_ino != os.stat(path).st_ino:
+                    continue
+            yield file
+            return
+        finally:
+            file.close()
+
+
+def valid_key(username: str) -> bool:
+    """
+    Check that username can be stored as a record key: not empty, no
+    colon or line break, and no surrounding whitespace (readers strip
+    each line, so " alice" would be read back as "alice").
+    """
+    return (
+        bool(username)
+        and username == username.strip()
+        and ":" not in username
+        and LINE_BREAKS.isdisjoint(username)
+    )
+
+
+def format_record(username: str, value: str) -> str:
+    """
+    Format one username:value log line. Raises ValueError if either part
+    could split into, or be read back as, a different record.
+    """
+    if not valid_key(username):
+        raise ValueError(f"Invalid record key {username!r}.")
+    if not LINE_BREAKS.isdisjoint(value):
+        raise ValueError(f"Invalid record value for {username!r}.")
+    return f"{username}:{value}\n"
+
+
+def append_records(
+    path: Path, records: list[tuple[str, str]], sync: bool = True
+) -> None:
+    """
+    Append username:value records to a log file in a single write,
+    followed by one fsync when sync is set.
+    """
+    if not records:
+        return
+    data = "".join(format_record(username, value) for username, value in records)
+    with locked_append(path) as file:
+        file.write(data)
+        if sync:
+            file.flush()
+            os.fsync(file.fileno())
+
+
+def read_log(path: Path) -> dict[str, str]:
+    """
+    Replay a username:value log into its current state: the last record
+    for each username wins and tombstones remove it.
+    """
+    records: dict[str, str] = {}
+    if not path.exists():
+        return records
+    # Records end in "\n" only; opened as text, "\r" would end one too
+    with path.open("rb") as file:
+        for raw in file:
+            line = raw.decode("utf-8").strip()
+            if not line or ":" not in line:
+                continue
+            username, value = line.split(":", 1)
+            if value == TOMBSTONE:
+                records.pop(username, None)
+            else:
+                records[username] = value
+    return records
+
+
+def compact(path: Path) -> int:
+    """
+    Rewrite a log file as its current state sorted by username and write
+    the sidecar offset index for it. Both files are replaced atomically.
+    Returns the number of records kept.
+    """
+    with locked_append(path):
+        records = read_log(path)
+        items = sorted(records.items(), key=lambda kv: kv[0].encode("utf-8"))
+
+        offsets = bytearray()
+        size = 0
+        with atomic_writer(path) as file:
+            for username, value in items:
+                line = f"{username}:{value}\n".encode("utf-8")
+                offsets += _OFFSET.pack(size)
+                file.write(line)
+                size += len(line)
+
+        st = os.stat(path)
+        fingerprint = bytes(16)
+        if size:
+            with path.open("rb") as f:
+                with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as data:
+                    fingerprint = _fingerprint(data, size)
+
+        with atomic_writer(index_path(path)) as file:
+            file.write(
+                _INDEX_HEADER.pack(
+                    _INDEX_MAGIC,
+                    _INDEX_VERSION,
+                    st.st_ino,
+                    size,
+                    len(items),
+                    fingerprint,
+                )
+            )
+            file.write(offsets)
+
+    return len(items)
+
+
+@contextmanager
+def atomic_writer(path: Path) -> Iterator[BinaryIO]:
+    """
+    Yield a binary file that replaces path once the block exits. It is
+    fsynced before the rename, and removed instead if the block raises,
+    so readers only ever see the old or the complete new contents.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=Path(path).parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """
+    Replace the contents of path with data atomically (see atomic_writer).
+    """
+    with atomic_writer(path) as file:
+        file.write(data)
+
+
+class RecordIndex:
+    """
+    In-memory index of a username:value log file such as passwd.txt or
+    roles.txt. If parse is given, values are stored as parse(value).
+
+    The file is parsed once; afterwards each lookup only stats the file.
+    If the file grew, just the appended lines are parsed. If it shrank,
+    was replaced, or was rewritten, the whole file is loaded again.
+
+    After compaction the sorted part of the file is not loaded at all: it
+    is memory-mapped and binary-searched through the sidecar index, and
+    only records appended since then are held in memory.
+    """
+
+    def __init__(self, path: Path, parse: Callable[[str], Any] | None = None):
+        self.path = Path(path)
+        self.parse = parse
+        self._records: dict[str, Any] = {}
+        self._base: SortedBase | None = None
+        self._offset = 0
+        self._signature: tuple[int, int, int] | None = None
+        self._lock = threading.RLock()
+
+    def refresh(self) -> None:
+        """
+        Bring the in-memory index in sync with the file on disk.
+        """
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                self._reset()
+                return
+
+            signature = (st.st_ino, st.st_size, st.st_mtime_ns)
+            if signature == self._signature:
+                return
+
+            if not self._can_apply_tail(st):
+                self._reset()
+                self._base = SortedBase.open(self.path, st)
+                if self._base is not None:
+                    self._offset = self._base.size
+
+            with self.path.open("rb") as file:
+                file.seek(self._offset)
+                data = file.read()
+
+            # Only consume complete lines, a half-written record is picked
+            # up on the next refresh once its newline has landed.
+            end = data.rfind(b"\n") + 1
+            self._apply(data[:end])
+            self._offset += end
+            self._signature = signature
+
+    def get(self, username: str) -> Any | None:
+        """
+        Return the value stored for username, or None.
+        """
+        with self._lock:
+            self.refresh()
+            return self._lookup(username)
+
+    def __contains__(self, username: str) -> bool:
+        return self.get(username) is not None
+
+    def __len__(self) -> int:
+        return len(self.usernames())
+
+    def usernames(self) -> list[str]:
+        with self._lock:
+            self.refresh()
+            records = self._records
+            names = []
+            if self._base is not None:
+                names.extend(u for u, _ in self._base.items() if u not in records)
+            names.extend(u for u, value in records.items() if value is not _DELETED)
+            return names
+
+    def delete(self, username: str) -> bool:
+        """
+        Append a tombstone for username.
+        Returns False if there is no record to delete.
+        """
+        return self._append_if(username, TOMBSTONE, exists=True)
+
+    def compact(self) -> int:
+        """
+        Compact the file (see compact()) and switch lookups over to the
+        memory-mapped result. Returns the number of records kept.
+        """
+        with self._lock:
+            count = compact(self.path)
+            self.refresh()
+            return count
+
+    def _lookup(self, username: str) -> Any | None:
+        value = self._records.get(username)
+        if value is _DELETED:
+            return None
+        if value is not None or self._base is None:
+            return value
+        raw = self._base.find(username)
+        if raw is None:
+            return None
+        return self.parse(raw) if self.parse else raw
+
+    def _append_if(
+        self, username: str, value: str, exists: bool, expected: Any = None
+    ) -> bool:
+        """
+        Append username:value if the username's presence matches exists
+        (and, if expected is given, its current value is expected). The
+        check and the append happen under one lock (plus an flock on the
+        file, so other processes are excluded too).
+        """
+        line = format_record(username, value)
+        with self._lock:
+            with locked_append(self.path) as file:
+                self.refresh()
+                current = self._lookup(username)
+                if (current is not None) != exists:
+                    return False
+                if expected is not None and current != expected:
+                    return False
+                file.write(line)
+            self.refresh()
+            return True
+
+    def _can_apply_tail(self, st: os.stat_result) -> bool:
+        if self._signature is None:
+            return False
+        inode, _, _ = self._signature
+        if st.st_ino != inode or st.st_size < self._offset:
+            return False
+        if self._offset == 0:
+            return True
+        # An in-place rewrite that happens to grow the file is unlikely to
+        # keep a newline exactly where our last parsed record ended.
+        with self.path.open("rb") as file:
+            file.seek(self._offset - 1)
+            return file.read(1) == b"\n"
+
+    def _apply(self, chunk: bytes) -> None:
+        records = self._records
+        parse = self.parse
+        # Split on "\n" only: splitlines() also breaks on "\r", "\x1c"-"\x1e",
+        # "\x85" and "\u2028", any of which would let a value start a record.
+        for raw in chunk.split(b"\n"):
+            line = raw.decode("utf-8").strip()
+            if not line or ":" not in line:
+                continue
+            stored_username, value = line.split(":", 1)
+            # The last record for a username wins. Tombstones are kept so
+            # they also hide the username in the sorted base.
+            if value == TOMBSTONE:
+                records[stored_username] = _DELETED
+            else:
+                records[stored_username] = parse(value) if parse else value
+
+    def _reset(self) -> None:
+        self._records.clear()
+        if self._base is not None:
+            self._base.close()
+            self._base = None
+        self._offset = 0
+        self._signature = None
+
+
+class CredentialStore(RecordIndex):
+    """
+    RecordIndex over a passwd file (username -> encoded hash), plus the
+    operations that write to it. Every change is an appended record.
+    """
+
+    def add_if_absent(self, username: str, encoded_hash: str) -> bool:
+        """
+        Append a record only if username is not taken yet, atomically.
+        Returns True if the record was added.
+        """
+        return self._append_if(username, encoded_hash, exists=False)
+
+    def add_many_if_absent(
+        self, records: list[tuple[str, str]], sync: bool = True
+    ) -> list[str]:
+        """
+        Append the records whose username is not taken yet (the first of
+        any repeats) in a single write, followed by one fsync when sync is
+        set. The check and the append are atomic, as in add_if_absent.
+        Returns the usernames that were added.
+        """
+        with self._lock:
+            with locked_append(self.path) as file:
+                self.refresh()
+                added: dict[str, str] = {}
+                for username, encoded_hash in records:
+                    if username not in added and self._lookup(username) is None:
+                        added[username] = format_record(username, encoded_hash)
+                if added:
+                    file.write("".join(added.values()))
+                    if sync:
+                        file.flush()
+                        os.fsync(file.fileno())
+            self.refresh()
+            return list(added)
+
+    def replace(
+        self, username: str, encoded_hash: str, expected: str | None = None
+    ) -> bool:
+        """
+        Append a newer hash for an existing user, which supersedes the
+        old record. With expected, only if that is still the stored hash.
+        Returns False if the user does not exist or the hash has changed.
+        """
+        return self._append_if(username, encoded_hash, exists=True, expected=expected)
+
+
+_STORES: dict[Path, CredentialStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_store(path: Path) -> CredentialStore:
+    """
+    Return the shared CredentialStore for path, creating it on first use.
+    """
+    key = Path(path).resolve()
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = _STORES[key] = CredentialStore(key)
+        return store
+
+
+_INDEXES: dict[tuple[Path, Callable | None], RecordIndex] = {}
+
+
+def get_index(path: Path, parse: Callable[[str], Any] | None = None) -> RecordIndex:
+    """
+    Return the shared RecordIndex for (path, parse).
+    """
+    key = (Path(path).resolve(), parse)
+    with _STORES_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            index = _INDEXES[key] = RecordIndex(key[0], parse)
+        return index
+
+
+class UserDirectory:
+    """
+    Joined view of passwd.txt and roles.txt:
+    username -> (encoded hash, role bitmask).
+
+    Both files are streamed into memory once (roles parsed straight into
+    bitmasks) and then kept current from appended lines, so a login needs
+    one lookup and no file reads beyond a stat of each file.
+    """
+
+    def __init__(self, passwd_file: Path, roles_file: Path, parse_roles: Callable):
+        self.credentials = get_store(passwd_file)
+        self.roles = get_index(roles_file, parse_roles)
+
+    def lookup(self, username: str) -> tuple[str, int] | None:
+        encoded_hash = self.credentials.get(username)
+        if encoded_hash is None:
+            return None
+        return encoded_hash, self.roles.get(username) or 0
+
+    def load(self) -> int:
+        """
+        Load (or re-sync) both files. Returns the number of users.
+        """
+        self.roles.refresh()
+        return len(self.credentials)
+
+
+_DIRECTORIES: dict[tuple[Path, Path, Callable], UserDirectory] = {}
+
+
+def get_directory(
+    passwd_file: Path, roles_file: Path, parse_roles: Callable
+) -> UserDirectory:
+    """
+    Return the shared UserDirectory for a passwd/roles file pair, keyed
+    by the resolved paths like get_store.
+    """
+    key = (Path(passwd_file).resolve(), Path(roles_file).resolve(), parse_roles)
+    directory = _DIRECTORIES.get(key)
+    if directory is None:
+        directory = UserDirectory(*key)
+        with _STORES_LOCK:
+            directory = _DIRECTORIES.setdefault(key, directory)
+    return directory
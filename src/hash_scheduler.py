@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class HasherBusyError(RuntimeError):
+    """
+    Raised when a hash operation is shed because the wait queue is full
+    or the caller's wait timed out.
+    """
+
+
+class HashScheduler:
+    """
+    Admit Argon2 hash operations against a memory budget (in KiB, the
+    unit of PasswordHasher.memory_cost).
+
+    Operations that do not fit wait in FIFO order. Once max_queue callers
+    are already waiting, further ones are rejected with HasherBusyError
+    instead of queueing without bound.
+    """
+
+    def __init__(
+        self,
+        memory_budget_kib: int,
+        max_queue: int = 128,
+        timeout: float | None = None,
+    ):
+        if memory_budget_kib <= 0:
+            raise ValueError("memory_budget_kib must be positive.")
+        self.memory_budget_kib = memory_budget_kib
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._cond = threading.Condition()
+        self._waiting: deque[object] = deque()
+        self._in_use_kib = 0
+        self._active = 0
+
+        self._admitted = 0
+        self._rejected = 0
+        self._max_queue_depth = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _fits(self, cost_kib: int) -> bool:
+        # An operation bigger than the whole budget may still run alone.
+        if self._active == 0:
+            return True
+        return self._in_use_kib + cost_kib <= self.memory_budget_kib
+
+    @contextmanager
+    def admit(self, cost_kib: int) -> Iterator[None]:
+        """
+        Hold cost_kib of the budget for the duration of the with block.
+        """
+        start = time.monotonic()
+        with self._cond:
+            if not self._waiting and self._fits(cost_kib):
+                self._grant(cost_kib, 0.0)
+            else:
+                if len(self._waiting) >= self.max_queue:
+                    self._rejected += 1
+                    raise HasherBusyError("Authentication service is busy.")
+
+                ticket = object()
+                self._waiting.append(ticket)
+                self._max_queue_depth = max(self._max_queue_depth, len(self._waiting))
+                deadline = None if self.timeout is None else start + self.timeout
+                try:
+                    while not (self._waiting[0] is ticket and self._fits(cost_kib)):
+                        remaining = (
+                            None if deadline is None else deadline - time.monotonic()
+                        )
+                        if remaining is not None and remaining <= 0:
+                            self._rejected += 1
+                            raise HasherBusyError("Authentication service is busy.")
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting.remove(ticket)
+                    self._cond.notify_all()
+                self._grant(cost_kib, time.monotonic() - start)
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_use_kib -= cost_kib
+                self._active -= 1
+                self._cond.notify_all()
+
+    def _grant(self, cost_kib: int, waited: float) -> None:
+        self._in_use_kib += cost_kib
+        self._active += 1
+        self._admitted += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+
+    def stats(self) -> dict[str, float]:
+        """
+        Snapshot of budget use, queue depth and wait times (seconds).
+        """
+        with self._cond:
+            return {
+                "memory_budget_kib": self.memory_budget_kib,
+                "memory_in_use_kib": self._in_use_kib,
+                "active": self._active,
+                "queued": len(self._waiting),
+                "max_queue": self.max_queue,
+                "max_queue_depth": self._max_queue_depth,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "mean_wait": (
+                    self._total_wait / self._admitted if self._admitted else 0.0
+                ),
+                "max_wait": self._max_wait,
+            }
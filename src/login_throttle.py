@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable, Iterable
+
+
+class LoginThrottledError(RuntimeError):
+    """
+    Raised when a login attempt is rejected by the throttle, before any
+    password hashing. retry_after is the number of seconds to wait.
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Too many login attempts, retry in {retry_after:.0f}s.")
+        self.retry_after = retry_after
+
+
+@dataclass(slots=True)
+class _KeyState:
+    tokens: float
+    updated: float
+    failures: int = 0
+    locked_until: float = 0.0
+
+
+class LoginThrottle:
+    """
+    Login rate limiter keyed by username and by caller (source).
+
+    Every key has a token bucket of `burst` attempts refilled at `rate`
+    attempts per second. A key passed to acquire() spends a token on each
+    attempt; a key passed only as `check` (a source shared by many users)
+    spends one per failure instead, via record_failure(charge=...).
+    Separately, each consecutive failure beyond
+    `free_failures` locks the key out for base_lockout seconds, doubling
+    per further failure up to max_lockout; a success clears the count.
+
+    At most max_keys keys are tracked; the least recently seen key is
+    evicted first, so memory stays bounded under a spray of usernames.
+    """
+
+    def __init__(
+        self,
+        burst: int = 10,
+        rate: float = 10 / 60,
+        free_failures: int = 5,
+        base_lockout: float = 1.0,
+        max_lockout: float = 15 * 60,
+        max_keys: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if burst <= 0 or rate <= 0 or max_keys <= 0:
+            raise ValueError("burst, rate and max_keys must be positive.")
+        self.burst = burst
+        self.rate = rate
+        self.free_failures = free_failures
+        self.base_lockout = base_lockout
+        self.max_lockout = max_lockout
+        self.max_keys = max_keys
+        self.clock = clock
+        self._keys: OrderedDict[Hashable, _KeyState] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _state(self, key: Hashable, now: float) -> _KeyState:
+        state = self._keys.get(key)
+        if state is None:
+            state = self._keys[key] = _KeyState(tokens=self.burst, updated=now)
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+        else:
+            self._keys.move_to_end(key)
+            state.tokens = min(
+                self.burst, state.tokens + (now - state.updated) * self.rate
+            )
+            state.updated = now
+        return state
+
+    def acquire(self, *keys: Hashable, check: Iterable[Hashable] = ()) -> None:
+        """
+        Spend one attempt from every key's bucket, or none if any key (or
+        any `check` key, which is never spent here) is locked out or
+        empty. Raises LoginThrottledError in that case.
+        """
+        now = self.clock()
+        with self._lock:
+            states = [self._state(key, now) for key in keys]
+            checked = [self._state(key, now) for key in check]
+            retry_after = 0.0
+            for state in states + checked:
+                if state.locked_until > now:
+                    retry_after = max(retry_after, state.locked_until - now)
+                if state.tokens < 1:
+                    retry_after = max(retry_after, (1 - state.tokens) / self.rate)
+            if retry_after > 0:
+                raise LoginThrottledError(retry_after)
+            for state in states:
+                state.tokens -= 1
+
+    def record_failure(self, *keys: Hashable, charge: Iterable[Hashable] = ()) -> None:
+        """
+        Count a failed attempt against keys, locking them out once they
+        are past free_failures, and spend a token from each `charge` key.
+        """
+        now = self.clock()
+        with self._lock:
+            for key in charge:
+                state = self._state(key, now)
+                state.tokens = max(0.0, state.tokens - 1)
+            for key in keys:
+                state = self._state(key, now)
+                state.failures += 1
+                excess = state.failures - self.free_failures
+                if excess > 0:
+                    backoff = self.base_lockout * 2 ** min(excess - 1, 32)
+                    state.locked_until = now + min(self.max_lockout, backoff)
+
+    def record_success(self, *keys: Hashable) -> None:
+        """
+        Clear the failure count of keys. Callers pass only the username
+        key, so a source cannot reset its own backoff by logging into an
+        account it controls.
+        """
+        now = self.clock()
+        with self._lock:
+            for key in keys:
+                state = self._state(key, now)
+                state.failures = 0
+                state.locked_until = 0.0
+
+    def reset(self) -> None:
+        """
+        Forget every key's attempts and lockouts.
+        """
+        with self._lock:
+            self._keys.clear()
+
+    def __len__(self) -> int:
+        return len(self._keys)
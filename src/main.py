@@ -1,4 +1,181 @@
+"""
+justInvest entry point.
+
+    python -m src.main                               interactive menu
+    python -m src.main signup alice --roles Client,Teller
+    python -m src.main login alice
+    python -m src.main check TOKEN "View money market instruments"
+    python -m src.main batch requests.jsonl          JSONL results on stdout
+
+Passwords are prompted for on a terminal, or read from the first line of
+stdin otherwise. The scripted commands print one JSON response (see
+src/commands.py) and exit with 0 on success, 1 otherwise. Sessions they
+start are saved to JUSTINVEST_SESSIONS (data/sessions.json by default),
+so a token from `login` can be used by a later `check`.
+"""
+
+import argparse
+import getpass
+import json
+import os
+import sys
+from pathlib import Path
+from typing import TextIO
+
+import src.commands as commands
+import src.core as core
+import src.metrics as metrics
+import src.policy_file as policy_file
+import src.Problem1c as problem1c
+import src.Problem2c as problem2c
+import src.profiling as profiling
+import src.sessions as sessions
+import src.tracing as tracing
+from src.Problem3ab import preload_weak_passwords
 from src.Problem4ab import justInvest_CLI
+from src.storage import SQLiteBackend, get_backend, set_backend
+
+
+def warm_up() -> None:
+    """
+    Load the weak password list, the user index and the compiled policy
+    once, before the first request.
+    """
+    preload_weak_passwords()
+    get_backend().preload()
+    problem1c.get_compiled_policy()
+
+
+def read_password(prompt: str = "Password: ") -> str:
+    if sys.stdin.isatty():
+        return getpass.getpass(prompt)
+    return sys.stdin.readline().rstrip("\n")
+
+
+def run_batch(stream: TextIO, out: TextIO) -> int:
+    """
+    Answer each JSONL request in stream with a JSONL response on out,
+    in order. Returns the number of requests that failed.
+    """
+    failures = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError:
+            response = {"ok": False, "error": "Malformed request."}
+        else:
+            response = commands.handle(request)
+        failures += not response["ok"]
+        out.write(json.dumps(response) + "\n")
+    out.flush()
+    return failures
+
+
+def _run_one(request: dict) -> int:
+    response = commands.handle(request)
+    print(json.dumps(response))
+    if not response["ok"]:
+        return 1
+    return 0 if response.get("allowed", True) else 1
+
+
+def _run(args: argparse.Namespace) -> int:
+    if args.command is None:
+        preload_weak_passwords()
+        justInvest_CLI()
+        return 0
+
+    # A token from one command is checked by the next process, so scripted
+    # commands keep sessions.json next to the user files by default
+    if sessions.SESSION_SNAPSHOT_FILE is None:
+        sessions.SESSION_SNAPSHOT_FILE = problem2c.PASSWD_FILE.parent / "sessions.json"
+
+    try:
+        if args.command == "signup":
+            roles = [role.strip() for role in args.roles.split(",") if role.strip()]
+            password = read_password()
+            status = _run_one(
+                {
+                    "op": "signup",
+                    "username": args.username,
+                    "password": password,
+                    "roles": roles,
+                }
+            )
+        elif args.command == "login":
+            password = read_password()
+            status = _run_one(
+                {"op": "login", "username": args.username, "password": password}
+            )
+        elif args.command == "check":
+            status = _run_one(
+                {"op": "authorize", "token": args.token, "operation": args.operation}
+            )
+        else:
+            warm_up()
+            if args.file == "-":
+                status = 1 if run_batch(sys.stdin, sys.stdout) else 0
+            else:
+                with open(args.file, "r", encoding="utf-8") as stream:
+                    status = 1 if run_batch(stream, sys.stdout) else 0
+    finally:
+        sessions.save_sessions()
+    return status
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.main",
+        description="justInvest authentication and access control.",
+    )
+    sub = parser.add_subparsers(dest="command")
+
+    p_signup = sub.add_parser("signup", help="enroll a user")
+    p_signup.add_argument("username")
+    p_signup.add_argument("--roles", required=True, help="comma-separated roles")
+
+    p_login = sub.add_parser("login", help="log in and print a session token")
+    p_login.add_argument("username")
+
+    p_check = sub.add_parser("check", help="check an operation for a session")
+    p_check.add_argument("token")
+    p_check.add_argument("operation", help="operation value or name")
+
+    p_batch = sub.add_parser("batch", help="run a JSONL file of requests")
+    p_batch.add_argument("file", help="input file, or - for stdin")
+    args = parser.parse_args(argv)
+
+    # JUSTINVEST_DATA_DIR moves passwd.txt, roles.txt etc. out of ./data
+    if os.environ.get("JUSTINVEST_DATA_DIR"):
+        core.configure(data_dir=os.environ["JUSTINVEST_DATA_DIR"])
+    # JUSTINVEST_WEAK_PASSWD_INDEX=data/weak_passwords.idx uses a breach index
+    if os.environ.get("JUSTINVEST_WEAK_PASSWD_INDEX"):
+        core.configure(weak_passwd_index=os.environ["JUSTINVEST_WEAK_PASSWD_INDEX"])
+    # JUSTINVEST_DB=data/users.db selects the SQLite storage backend
+    if os.environ.get("JUSTINVEST_DB"):
+        set_backend(SQLiteBackend(os.environ["JUSTINVEST_DB"]))
+    # JUSTINVEST_POLICY=data/policy.toml replaces the built-in policy
+    if os.environ.get("JUSTINVEST_POLICY"):
+        policy_file.apply_policy_file(Path(os.environ["JUSTINVEST_POLICY"]))
+    # JUSTINVEST_SESSIONS=data/sessions.json keeps sessions across restarts
+    if os.environ.get("JUSTINVEST_SESSIONS"):
+        sessions.SESSION_SNAPSHOT_FILE = Path(os.environ["JUSTINVEST_SESSIONS"])
+
+    metrics_file = metrics.configure_from_env()
+    trace_sink = tracing.configure_from_env()
+    try:
+        # JUSTINVEST_PROFILE=cprofile or sample[:PATH] profiles the session
+        with profiling.profile_session():
+            return _run(args)
+    finally:
+        if metrics_file is not None:
+            metrics.dump_snapshot(metrics_file)
+        if trace_sink is not None:
+            tracing.set_sink(None)
+            trace_sink.close()
+
 
 if __name__ == "__main__":
-    justInvest_CLI()
+    raise SystemExit(main())
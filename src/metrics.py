@@ -0,0 +1,243 @@
+"""
+Counters and fixed-bucket latency histograms for the auth and
+authorization stages.
+
+Metrics are off unless JUSTINVEST_METRICS=1 is set or enable() is
+called; while off, an instrumented function pays one flag check per
+call. Stages are timed with the monotonic perf_counter_ns clock.
+
+    @metrics.timed("verify_login")
+    def verify_login(...): ...
+
+    with metrics.stage("argon2_verify"):
+        hasher.verify(...)
+
+render_prometheus() gives the Prometheus text exposition format and
+snapshot() / dump_snapshot(path) a JSON-ready dict. The service and the
+scripted CLI answer {"op": "metrics"}, and write a snapshot on exit to
+JUSTINVEST_METRICS_FILE when that is set.
+"""
+
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+from src.credential_store import atomic_write
+
+# Upper bounds in seconds; the last bucket is +Inf
+DEFAULT_BUCKETS = (
+    0.00001,
+    0.00005,
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+_enabled = os.environ.get("JUSTINVEST_METRICS", "") not in ("", "0")
+
+
+def configure_from_env() -> Path | None:
+    """
+    Enable metrics if JUSTINVEST_METRICS_FILE is set and return that path.
+    """
+    path = os.environ.get("JUSTINVEST_METRICS_FILE")
+    if not path:
+        return None
+    enable()
+    return Path(path)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True) -> bool:
+    """
+    Turn recording on or off. Returns the previous setting.
+    """
+    global _enabled
+    previous, _enabled = _enabled, on
+    return previous
+
+
+class Histogram:
+    """
+    Latency histogram for one stage with fixed bucket bounds, plus call
+    and error counters.
+    """
+
+    def __init__(self, name: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.bounds = tuple(buckets)
+        self._bounds_ns = [int(b * 1e9) for b in self.bounds]
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            # One slot per bound plus the +Inf bucket, not cumulative
+            self._counts = [0] * (len(self.bounds) + 1)
+            self._sum_ns = 0
+            self.errors = 0
+
+    def observe_ns(self, elapsed_ns: int, error: bool = False) -> None:
+        i = bisect.bisect_left(self._bounds_ns, elapsed_ns)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum_ns += elapsed_ns
+            if error:
+                self.errors += 1
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """
+        (upper bound, observations <= bound) pairs, ending with "+Inf".
+        """
+        with self._lock:
+            counts = list(self._counts)
+        pairs = []
+        total = 0
+        for bound, n in zip(self.bounds + (None,), counts):
+            total += n
+            pairs.append(("+Inf" if bound is None else repr(bound), total))
+        return pairs
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            count = sum(self._counts)
+            sum_ns = self._sum_ns
+            errors = self.errors
+        return {
+            "count": count,
+            "errors": errors,
+            "sum_seconds": sum_ns / 1e9,
+            "buckets": dict(self.cumulative()),
+        }
+
+
+_histograms: dict[str, Histogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def histogram(name: str) -> Histogram:
+    """
+    Return the histogram for a stage, creating it on first use.
+    """
+    hist = _histograms.get(name)
+    if hist is None:
+        with _histograms_lock:
+            hist = _histograms.setdefault(name, Histogram(name))
+    return hist
+
+
+def timed(name: str) -> Callable:
+    """
+    Decorator recording each call's latency (and whether it raised)
+    in the stage histogram `name`.
+    """
+    hist = histogram(name)
+
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                hist.observe_ns(time.perf_counter_ns() - start, error=True)
+                raise
+            hist.observe_ns(time.perf_counter_ns() - start)
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+class stage:
+    """
+    Context manager timing a block into the stage histogram `name`.
+    """
+
+    __slots__ = ("hist", "start")
+
+    def __init__(self, name: str):
+        self.hist = histogram(name)
+        self.start = 0
+
+    def __enter__(self) -> "stage":
+        if _enabled:
+            self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.start:
+            self.hist.observe_ns(
+                time.perf_counter_ns() - self.start, error=exc_type is not None
+            )
+
+
+def reset() -> None:
+    for hist in list(_histograms.values()):
+        hist.reset()
+
+
+def snapshot() -> dict:
+    """
+    All stages as a JSON-ready dict.
+    """
+    return {
+        "enabled": _enabled,
+        "stages": {name: hist.snapshot() for name, hist in sorted(_histograms.items())},
+    }
+
+
+def render_prometheus(prefix: str = "justinvest") -> str:
+    """
+    All stages in the Prometheus text exposition format.
+    """
+    seconds = f"{prefix}_stage_duration_seconds"
+    errors = f"{prefix}_stage_errors_total"
+    lines = [
+        f"# HELP {seconds} Time spent in each auth/authorization stage.",
+        f"# TYPE {seconds} histogram",
+    ]
+    error_lines = [
+        f"# HELP {errors} Calls to each stage that raised.",
+        f"# TYPE {errors} counter",
+    ]
+    for name, hist in sorted(_histograms.items()):
+        snap = hist.snapshot()
+        label = f'stage="{name}"'
+        for bound, total in snap["buckets"].items():
+            lines.append(f'{seconds}_bucket{{{label},le="{bound}"}} {total}')
+        lines.append(f"{seconds}_sum{{{label}}} {snap['sum_seconds']!r}")
+        lines.append(f"{seconds}_count{{{label}}} {snap['count']}")
+        error_lines.append(f"{errors}{{{label}}} {snap['errors']}")
+    return "\n".join(lines + error_lines) + "\n"
+
+
+def dump_snapshot(path: Path) -> None:
+    """
+    Write snapshot() to path as JSON, replacing it atomically.
+    """
+    atomic_write(Path(path), json.dumps(snapshot(), indent=2).encode("utf-8"))
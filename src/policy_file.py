@@ -0,0 +1,357 @@
+"""
+Load the access control policy from a TOML or JSON file.
+
+Each role lists the operations it is granted directly, the roles it
+inherits from and when it is available; names may be Role/Operations
+values ("Premium Client") or names ("PREMIUM_CLIENT"):
+
+    [roles."Teller"]
+    permissions = []
+    inherits = ["Employee"]
+    availability = { mon = ["09:00", "17:00"], tue = ["09:00", "17:00"] }
+
+    [roles."Client"]
+    permissions = ["View own account balance"]
+    availability = ["00:00", "23:59"]
+
+availability is one window, a list of windows, or a table mapping
+weekdays (mon..sun) to those; a role without one is always available.
+A role missing from the file has no permissions. The file arranges the
+existing roles and operations: it cannot add new ones, which have to be
+added to Role and Operations in src/Problem1c.py.
+
+The compiled tables are cached next to the file in a binary snapshot
+keyed by the file's SHA-256, so an unchanged policy is loaded without
+parsing or compiling it again.
+
+    python -m src.policy_file compile data/policy.toml
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import struct
+import tomllib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import src.Problem1c as problem1c
+from src.credential_store import atomic_write
+from src.Problem1c import CompiledPolicy, Operations, Role
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+_SNAPSHOT_MAGIC = b"JIPS"
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("<4sH2x32sII")
+
+
+@dataclass
+class PolicyTables:
+    """
+    The three policy tables in the shape of Problem1c's module globals.
+    """
+
+    base_perms: dict[Role, set[Operations]]
+    role_parent: dict[Role, list[Role]]
+    role_availability: dict[Role, Any]
+
+
+def snapshot_path(path: Path) -> Path:
+    return path.with_name(path.name + ".bin")
+
+
+def _lookup(enum, name: Any, what: str, where: str):
+    for member in enum:
+        if name == member.value or name == member.name:
+            return member
+    raise ValueError(
+        f"{where}: unknown {what} {name!r} (policy files cannot add new "
+        f"{what}s; see {enum.__name__} in src/Problem1c.py)."
+    )
+
+
+def _parse_time(value: Any, where: str) -> datetime.time:
+    try:
+        return datetime.time.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{where}: invalid time {value!r}, expected HH:MM.")
+
+
+def _parse_windows(value: Any, where: str) -> list[tuple[datetime.time, datetime.time]]:
+    if not isinstance(value, list) or not value:
+        raise ValueError(f"{where}: expected a [start, end] window or a list of them.")
+    if all(isinstance(v, str) for v in value):
+        value = [value]
+    windows = []
+    for window in value:
+        if not isinstance(window, list) or len(window) != 2:
+            raise ValueError(f"{where}: a window is a [start, end] pair.")
+        windows.append((_parse_time(window[0], where), _parse_time(window[1], where)))
+    return windows
+
+
+def _parse_schedule(value: Any, where: str):
+    if isinstance(value, dict):
+        schedule = {}
+        for day, windows in value.items():
+            if day not in WEEKDAYS:
+                raise ValueError(f"{where}: unknown weekday {day!r}.")
+            schedule[WEEKDAYS.index(day)] = _parse_windows(windows, f"{where}.{day}")
+        return schedule
+    return _parse_windows(value, where)
+
+
+def parse_policy(data: Any, source: str = "policy") -> PolicyTables:
+    """
+    Validate a decoded policy document and turn it into PolicyTables.
+    Raises ValueError naming the offending entry.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("roles"), dict):
+        raise ValueError(f"{source}: expected a 'roles' table.")
+
+    tables = PolicyTables(base_perms={}, role_parent={}, role_availability={})
+    all_day = [(problem1c.ALL_DAY_START, problem1c.ALL_DAY_END)]
+
+    for name, entry in data["roles"].items():
+        where = f"{source}: roles.{name}"
+        role = _lookup(Role, name, "role", source)
+        if role in tables.base_perms:
+            raise ValueError(f"{where}: role defined twice.")
+        if not isinstance(entry, dict):
+            raise ValueError(f"{where}: expected a table.")
+        unknown = set(entry) - {"permissions", "inherits", "availability"}
+        if unknown:
+            raise ValueError(f"{where}: unknown keys {sorted(unknown)}.")
+
+        permissions = entry.get("permissions", [])
+        parents = entry.get("inherits", [])
+        if not isinstance(permissions, list) or not isinstance(parents, list):
+            raise ValueError(f"{where}: permissions and inherits must be lists.")
+
+        tables.base_perms[role] = {
+            _lookup(Operations, op, "operation", where) for op in permissions
+        }
+        tables.role_parent[role] = [
+            _lookup(Role, parent, "role", where) for parent in parents
+        ]
+        if "availability" in entry:
+            schedule = _parse_schedule(entry["availability"], f"{where}.availability")
+        else:
+            schedule = all_day
+        tables.role_availability[role] = schedule
+
+    return tables
+
+
+def read_policy_file(path: Path) -> tuple[PolicyTables, bytes]:
+    """
+    Parse a .toml or .json policy file. Returns the tables and the
+    SHA-256 of the file's contents.
+    """
+    raw = Path(path).read_bytes()
+    try:
+        if Path(path).suffix == ".json":
+            data = json.loads(raw)
+        else:
+            data = tomllib.loads(raw.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"{path}: {e}")
+    return parse_policy(data, str(path)), hashlib.sha256(raw).digest()
+
+
+def compile_tables(tables: PolicyTables) -> CompiledPolicy:
+    return problem1c.compile_policy(
+        tables.base_perms, tables.role_parent, tables.role_availability
+    )
+
+
+def _put_str(out: bytearray, value: str) -> None:
+    data = value.encode("utf-8")
+    out += struct.pack("<H", len(data)) + data
+
+
+def _put_int(out: bytearray, value: int) -> None:
+    data = value.to_bytes((value.bit_length() + 7) // 8, "little")
+    out += struct.pack("<I", len(data)) + data
+
+
+def encode_snapshot(
+    tables: PolicyTables, policy: CompiledPolicy, source_digest: bytes
+) -> bytes:
+    """
+    Serialise the tables and their compiled form. Schedules are stored
+    as their compiled bitmaps, which Problem1c accepts in place of windows.
+    """
+    roles = list(tables.base_perms)
+    out = bytearray(
+        _SNAPSHOT_HEADER.pack(
+            _SNAPSHOT_MAGIC,
+            SNAPSHOT_VERSION,
+            source_digest,
+            len(policy.operations),
+            len(roles),
+        )
+    )
+    for op in policy.operations:
+        _put_str(out, op.name)
+    for role in roles:
+        direct = 0
+        for op in tables.base_perms[role]:
+            direct |= policy.op_bits[op]
+        _put_str(out, role.name)
+        _put_int(out, direct)
+        _put_int(out, policy.role_masks.get(role, 0))
+        _put_int(out, policy.availability.get(role, 0))
+        parents = tables.role_parent.get(role, [])
+        out += struct.pack("<H", len(parents))
+        for parent in parents:
+            _put_str(out, parent.name)
+    return bytes(out)
+
+
+class _Reader:
+    def __init__(self, data: bytes, offset: int):
+        self.data = memoryview(data)
+        self.offset = offset
+
+    def take(self, n: int) -> memoryview:
+        if self.offset + n > len(self.data):
+            raise ValueError("Truncated policy snapshot.")
+        chunk = self.data[self.offset : self.offset + n]
+        self.offset += n
+        return chunk
+
+    def read_u16(self) -> int:
+        return struct.unpack("<H", self.take(2))[0]
+
+    def read_str(self) -> str:
+        return str(self.take(self.read_u16()), "utf-8")
+
+    def read_int(self) -> int:
+        (size,) = struct.unpack("<I", self.take(4))
+        return int.from_bytes(self.take(size), "little")
+
+
+def decode_snapshot(
+    data: bytes, source_digest: bytes | None = None
+) -> tuple[PolicyTables, CompiledPolicy] | None:
+    """
+    Rebuild tables and compiled policy from encode_snapshot output.
+    Returns None if the snapshot is of another format version or (when
+    source_digest is given) was built from a different source file.
+    """
+    if len(data) < _SNAPSHOT_HEADER.size:
+        return None
+    magic, version, digest, n_ops, n_roles = _SNAPSHOT_HEADER.unpack_from(data)
+    if magic != _SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        return None
+    if source_digest is not None and digest != source_digest:
+        return None
+
+    reader = _Reader(data, _SNAPSHOT_HEADER.size)
+    try:
+        operations = tuple(Operations[reader.read_str()] for _ in range(n_ops))
+        op_bits = {op: 1 << i for i, op in enumerate(operations)}
+        tables = PolicyTables(base_perms={}, role_parent={}, role_availability={})
+        role_masks = {}
+        availability = {}
+        for _ in range(n_roles):
+            role = Role[reader.read_str()]
+            direct = reader.read_int()
+            role_masks[role] = reader.read_int()
+            availability[role] = reader.read_int()
+            parents = [Role[reader.read_str()] for _ in range(reader.read_u16())]
+            tables.base_perms[role] = {
+                op for op, bit in op_bits.items() if direct & bit
+            }
+            tables.role_parent[role] = parents
+            tables.role_availability[role] = availability[role]
+    except KeyError:
+        # Names no longer in the enums: rebuild from the source instead
+        return None
+
+    # Parents that define nothing themselves still get a (zero) mask
+    for parents in tables.role_parent.values():
+        for parent in parents:
+            role_masks.setdefault(parent, 0)
+
+    policy = CompiledPolicy(
+        op_bits=op_bits,
+        operations=operations,
+        role_masks=role_masks,
+        availability=availability,
+    )
+    return tables, policy
+
+
+def load_policy(
+    path: Path, cache: Path | None = None
+) -> tuple[PolicyTables, CompiledPolicy]:
+    """
+    Load a policy file, reusing its snapshot (at cache, by default next
+    to the file) when the file is unchanged and refreshing it otherwise.
+    """
+    path = Path(path)
+    cache = snapshot_path(path) if cache is None else Path(cache)
+
+    raw = path.read_bytes()
+    digest = hashlib.sha256(raw).digest()
+    try:
+        loaded = decode_snapshot(cache.read_bytes(), digest)
+    except (OSError, ValueError):
+        loaded = None
+    if loaded is not None:
+        return loaded
+
+    tables, digest = read_policy_file(path)
+    policy = compile_tables(tables)
+    try:
+        atomic_write(cache, encode_snapshot(tables, policy, digest))
+    except OSError:
+        pass  # A read-only location just means no snapshot next time
+    return tables, policy
+
+
+def apply_policy_file(path: Path, cache: Path | None = None) -> CompiledPolicy:
+    """
+    Load a policy file and swap it in for the running process. On any
+    error the current policy stays in force.
+    """
+    tables, policy = load_policy(path, cache)
+    problem1c.install_policy(
+        tables.base_perms, tables.role_parent, tables.role_availability, policy
+    )
+    return policy
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.policy_file",
+        description="Validate a policy file and build its snapshot.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    comp = sub.add_parser("compile", help="validate and write the snapshot")
+    comp.add_argument("policy", type=Path)
+    comp.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    try:
+        tables, digest = read_policy_file(args.policy)
+    except ValueError as e:
+        print(e)
+        return 1
+    policy = compile_tables(tables)
+    out = args.out or snapshot_path(args.policy)
+    _write_atomic(out, encode_snapshot(tables, policy, digest))
+    print(
+        f"{len(tables.base_perms)} roles, {len(policy.operations)} operations "
+        f"compiled to {out}."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
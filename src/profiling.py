@@ -0,0 +1,122 @@
+"""
+Opt-in profiling of a whole session (the interactive CLI, a scripted
+command or the service), switched on with JUSTINVEST_PROFILE:
+
+    JUSTINVEST_PROFILE=cprofile python -m src.main login alice
+    JUSTINVEST_PROFILE=sample:data/login.folded python -m src.server
+
+"cprofile" writes pstats data (read it with `python -m pstats FILE`),
+"sample" writes stacks sampled every few milliseconds in the collapsed
+format flame graph tools take ("frame;frame;frame count" per line). The
+output file defaults to justinvest.prof or justinvest.folded.
+"""
+
+import cProfile
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from types import FrameType
+from typing import Iterator
+
+DEFAULT_OUTPUT = {"cprofile": "justinvest.prof", "sample": "justinvest.folded"}
+
+
+class SamplingProfiler:
+    """
+    Sample the stack of one thread from a background thread every
+    `interval` seconds, counting identical stacks.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: int | None = None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @staticmethod
+    def _fold(frame: FrameType | None) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{Path(code.co_filename).name}:{code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[self._fold(frame)] += 1
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="justinvest-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write(self, path: Path) -> None:
+        with Path(path).open("w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def parse_setting(value: str | None) -> tuple[str, Path] | None:
+    """
+    Parse JUSTINVEST_PROFILE ("cprofile", "sample" or either followed by
+    ":PATH"). Returns (mode, output path), or None if profiling is off.
+    """
+    if not value:
+        return None
+    mode, _, path = value.partition(":")
+    if mode not in DEFAULT_OUTPUT:
+        raise ValueError(
+            f"JUSTINVEST_PROFILE must start with cprofile or sample, not {mode!r}."
+        )
+    return mode, Path(path or DEFAULT_OUTPUT[mode])
+
+
+@contextmanager
+def profile_session(setting: str | None = None) -> Iterator[Path | None]:
+    """
+    Profile the with block as JUSTINVEST_PROFILE (or setting) says and
+    write the result when it exits. Yields the output path, or None.
+    """
+    parsed = parse_setting(
+        setting if setting is not None else os.environ.get("JUSTINVEST_PROFILE")
+    )
+    if parsed is None:
+        yield None
+        return
+
+    mode, path = parsed
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield path
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+            print(f"Profile written to {path}.", file=sys.stderr)
+    else:
+        sampler = SamplingProfiler()
+        sampler.start()
+        try:
+            yield path
+        finally:
+            sampler.stop()
+            sampler.write(path)
+            print(
+                f"Profile written to {path} "
+                f"({sum(sampler.samples.values())} samples).",
+                file=sys.stderr,
+            )
@@ -0,0 +1,297 @@
+"""
+Newline-delimited JSON service for signup, login and authorization.
+
+Each request is one JSON object per line and gets one JSON response line,
+in request order. Clients may pipeline: requests are read and started as
+they arrive, without waiting for earlier responses. Logins and checks on
+one connection run concurrently; a signup waits for the requests before
+it, and the requests after it wait for the signup.
+
+    {"id": 1, "op": "signup", "username": "...", "password": "...",
+     "roles": ["Client"]}
+    {"id": 2, "op": "login", "username": "...", "password": "..."}
+    {"id": 3, "op": "authorize", "token": "...", "operation": "..."}
+    {"id": 4, "op": "list-operations", "token": "..."}
+
+Logins over TCP are throttled by the caller's address as well as by
+username. Local callers (loopback or the Unix socket) are often proxies
+for many users, so they are not throttled by address; a proxy can pass
+its own client's identifier as "client" in a login request instead.
+
+Requests and responses are those of src/commands.py. Argon2 work runs
+in a thread pool, so the event loop only ever does parsing, HMAC checks
+and bitmask lookups.
+
+    python -m src.server --unix data/justinvest.sock
+    python -m src.server --port 8765
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import src.commands as commands
+import src.core as core
+import src.metrics as metrics
+import src.policy_file as policy_file
+import src.Problem3ab as problem3ab
+import src.profiling as profiling
+import src.tracing as tracing
+
+# Longest accepted request line, in bytes
+MAX_REQUEST_BYTES = 64 * 1024
+
+
+def peer_source(peer: Any) -> str | None:
+    """
+    The throttle source for a connection's peer: the remote address, or
+    None for a Unix socket or loopback peer.
+    """
+    if not isinstance(peer, tuple):
+        return None
+    try:
+        if ipaddress.ip_address(peer[0]).is_loopback:
+            return None
+    except ValueError:
+        pass
+    return peer[0]
+
+
+def request_source(request: Any, peer: str | None) -> str | None:
+    """
+    The throttle source for one request: the peer's address for remote
+    callers, otherwise the "client" the local caller names, if any.
+    """
+    if peer is not None:
+        return peer
+    client = request.get("client") if isinstance(request, dict) else None
+    return f"client:{client}" if isinstance(client, str) and client else None
+
+
+class AuthServer:
+    """
+    The request handlers plus connection handling for asyncio streams.
+
+    max_pipeline bounds how many requests of one connection may be in
+    flight at once; reading pauses until earlier responses are written.
+    """
+
+    def __init__(self, max_workers: int | None = None, max_pipeline: int = 64):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or os.cpu_count() or 1,
+            thread_name_prefix="argon2",
+        )
+        self.max_pipeline = max_pipeline
+        self._connections: set[asyncio.Task] = set()
+
+    async def handle(self, request: Any, source: str | None = None) -> dict:
+        """
+        Answer one decoded request, running Argon2 work in the thread pool.
+        Never raises.
+        """
+        if isinstance(request, dict) and request.get("op") in commands.HASHING_OPS:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, commands.handle, request, source
+            )
+        return commands.handle(request, source)
+
+    async def _handle_after(
+        self, request: Any, source: str | None, after: list[asyncio.Task]
+    ) -> dict:
+        if after:
+            await asyncio.wait(after)
+        return await self.handle(request, source)
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        current = asyncio.current_task()
+        self._connections.add(current)
+        current.add_done_callback(self._connections.discard)
+
+        peer = peer_source(writer.get_extra_info("peername"))
+
+        # Holds request tasks (or ready responses) in arrival order
+        pending: asyncio.Queue = asyncio.Queue(self.max_pipeline)
+        responder = asyncio.create_task(self._write_responses(pending, writer))
+        # The last signup, and the requests started since then
+        last_write: asyncio.Task | None = None
+        since_write: list[asyncio.Task] = []
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    await pending.put({"ok": False, "error": "Request too large."})
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    await pending.put({"ok": False, "error": "Malformed request."})
+                    continue
+
+                is_write = isinstance(request, dict) and request.get("op") == "signup"
+                since_write = [t for t in since_write if not t.done()]
+                after = [last_write] if last_write and not last_write.done() else []
+                if is_write:
+                    after += since_write
+                source = request_source(request, peer)
+                task = asyncio.create_task(self._handle_after(request, source, after))
+                if is_write:
+                    last_write, since_write = task, []
+                else:
+                    since_write.append(task)
+                await pending.put(task)
+        finally:
+            await pending.put(None)
+            await responder
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _write_responses(
+        self, pending: asyncio.Queue, writer: asyncio.StreamWriter
+    ) -> None:
+        # Responses go out in request order, however the work finishes
+        while (item := await pending.get()) is not None:
+            response = item if isinstance(item, dict) else await item
+            try:
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+            except ConnectionError:
+                break
+
+        # The client went away: keep draining so the reader never blocks,
+        # and drop work nobody will read
+        while item is not None:
+            if isinstance(item, asyncio.Future):
+                item.cancel()
+            item = await pending.get()
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0):
+        return await asyncio.start_server(
+            self.handle_connection, host, port, limit=MAX_REQUEST_BYTES
+        )
+
+    async def start_unix(self, path: Path):
+        return await asyncio.start_unix_server(
+            self.handle_connection, str(path), limit=MAX_REQUEST_BYTES
+        )
+
+    async def wait_connections(self) -> None:
+        """
+        Wait until every open connection has been handled to the end.
+        """
+        if self._connections:
+            await asyncio.wait(list(self._connections))
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+async def serve(
+    unix_path: Path | None = None,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    max_workers: int | None = None,
+    policy: Path | None = None,
+) -> None:
+    server = AuthServer(max_workers=max_workers)
+    if policy is not None and hasattr(signal, "SIGHUP"):
+        # kill -HUP reloads the policy file; a bad edit keeps the old policy
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGHUP, reload_policy, policy
+        )
+    if unix_path is not None:
+        listener = await server.start_unix(unix_path)
+        where = str(unix_path)
+    else:
+        listener = await server.start_tcp(host, port)
+        where = f"{host}:{port}"
+    print(f"Listening on {where}.")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def reload_policy(path: Path) -> bool:
+    try:
+        policy_file.apply_policy_file(path)
+    except (OSError, ValueError) as e:
+        print(f"Policy not reloaded: {e}")
+        return False
+    print(f"Policy reloaded from {path}.")
+    return True
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.server",
+        description="Serve signup, login and authorization over a local socket.",
+    )
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument("--unix", type=Path, help="Unix socket path")
+    where.add_argument("--port", type=int, default=8765, help="TCP port")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--policy",
+        type=Path,
+        default=os.environ.get("JUSTINVEST_POLICY"),
+        help="policy file to load (reloaded on SIGHUP)",
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=os.environ.get("JUSTINVEST_DATA_DIR"),
+        help="directory holding passwd.txt, roles.txt etc. (default: data)",
+    )
+    parser.add_argument(
+        "--weak-passwd-index",
+        type=Path,
+        default=os.environ.get("JUSTINVEST_WEAK_PASSWD_INDEX"),
+        help="weak password index to check instead of weak_passwords.txt",
+    )
+    args = parser.parse_args(argv)
+
+    core.configure(data_dir=args.data_dir, weak_passwd_index=args.weak_passwd_index)
+    if args.policy is not None:
+        policy_file.apply_policy_file(args.policy)
+    metrics_file = metrics.configure_from_env()
+    trace_sink = tracing.configure_from_env()
+    problem3ab.preload_weak_passwords()
+    try:
+        with profiling.profile_session():
+            asyncio.run(
+                serve(args.unix, args.host, args.port, args.workers, args.policy)
+            )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if metrics_file is not None:
+            metrics.dump_snapshot(metrics_file)
+        if trace_sink is not None:
+            tracing.set_sink(None)
+            trace_sink.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
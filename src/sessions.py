@@ -0,0 +1,281 @@
+"""
+Signed, expiring session tokens.
+
+A successful login or signup issues a token; later requests present it
+instead of a password, so they are answered with an HMAC check and a
+dictionary lookup rather than an Argon2 verification.
+
+Token format: <session id>.<expiry>.<signature>, where the signature is
+an HMAC-SHA256 over "<session id>.<expiry>". The signature only proves
+the token was issued here; the session itself must also still be in the
+store, so evicted or revoked sessions stop working immediately.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable
+
+import src.Problem1c as problem1c
+from src.credential_store import atomic_write
+
+SESSION_SECRET_FILE = Path("data/session.key")
+
+# Set to a path to keep sessions across restarts (see SessionStore.save)
+SESSION_SNAPSHOT_FILE: Path | None = None
+
+DEFAULT_TTL = 30 * 60
+DEFAULT_MAX_SESSIONS = 10000
+
+
+@dataclass(frozen=True)
+class Session:
+    session_id: str
+    username: str
+    roles: frozenset[problem1c.Role]
+    expires: float
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+class SessionStore:
+    """
+    In-memory session table with a per-session TTL and LRU eviction once
+    max_sessions are live.
+    """
+
+    def __init__(
+        self,
+        secret: bytes,
+        ttl: float = DEFAULT_TTL,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        clock: Callable[[], float] = time.time,
+    ):
+        if ttl <= 0 or max_sessions <= 0:
+            raise ValueError("ttl and max_sessions must be positive.")
+        self._secret = secret
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _sign(self, message: str) -> str:
+        digest = hmac.new(self._secret, message.encode("ascii"), hashlib.sha256)
+        return _b64(digest.digest())
+
+    def issue(self, username: str, roles: Iterable[problem1c.Role]) -> str:
+        """
+        Start a session for an authenticated user and return its token.
+        """
+        session_id = _b64(secrets.token_bytes(16))
+        expires = self.clock() + self.ttl
+        session = Session(session_id, username, frozenset(roles), expires)
+        message = f"{session_id}.{int(expires)}"
+
+        with self._lock:
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return f"{message}.{self._sign(message)}"
+
+    def validate(self, token: str) -> Session | None:
+        """
+        Return the live session a token belongs to, or None if the token
+        is forged, expired, revoked or evicted.
+        """
+        # UnicodeEncodeError (a non-ASCII token) is a ValueError too
+        try:
+            session_id, expiry, signature = token.split(".")
+            expected = self._sign(f"{session_id}.{expiry}")
+        except (AttributeError, ValueError):
+            return None
+        if not hmac.compare_digest(
+            signature.encode("ascii", "replace"), expected.encode("ascii")
+        ):
+            return None
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if session.expires <= self.clock():
+                del self._sessions[session_id]
+                return None
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def authorize(self, token: str, operation: problem1c.Operations) -> bool:
+        """
+        Check a session token and whether its user may perform operation
+        now. No password hashing is involved.
+        """
+        session = self.validate(token)
+        if session is None:
+            return False
+        return problem1c.operation_denial(session.roles, operation) is None
+
+    def revoke(self, token: str) -> bool:
+        """
+        End the session a token belongs to. Returns False if it is not live.
+        """
+        session = self.validate(token)
+        if session is None:
+            return False
+        with self._lock:
+            return self._sessions.pop(session.session_id, None) is not None
+
+    def revoke_user(self, username: str) -> int:
+        """
+        End every session of username. Returns how many were ended.
+        """
+        with self._lock:
+            ids = [
+                s.session_id for s in self._sessions.values() if s.username == username
+            ]
+            for session_id in ids:
+                del self._sessions[session_id]
+            return len(ids)
+
+    def purge_expired(self) -> int:
+        """
+        Drop expired sessions. Returns how many were dropped.
+        """
+        now = self.clock()
+        with self._lock:
+            ids = [s.session_id for s in self._sessions.values() if s.expires <= now]
+            for session_id in ids:
+                del self._sessions[session_id]
+            return len(ids)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def save(self, path: Path) -> int:
+        """
+        Write the live sessions to path (atomically, readable by the owner
+        only). Returns the number saved.
+        """
+        now = self.clock()
+        with self._lock:
+            rows = [
+                {
+                    "id": s.session_id,
+                    "user": s.username,
+                    "roles": [role.value for role in s.roles],
+                    "expires": s.expires,
+                }
+                for s in self._sessions.values()
+                if s.expires > now
+            ]
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # The temporary file is created readable by the owner only
+        atomic_write(path, json.dumps(rows).encode("utf-8"))
+        return len(rows)
+
+    def load(self, path: Path) -> int:
+        """
+        Restore unexpired sessions saved by save(). A missing file loads
+        nothing. Returns the number restored.
+        """
+        path = Path(path)
+        if not path.exists():
+            return 0
+        with path.open("r", encoding="utf-8") as f:
+            rows = json.load(f)
+
+        now = self.clock()
+        with self._lock:
+            for row in rows:
+                if row["expires"] <= now:
+                    continue
+                self._sessions[row["id"]] = Session(
+                    session_id=row["id"],
+                    username=row["user"],
+                    roles=frozenset(problem1c.roles_from_values(row["roles"])),
+                    expires=row["expires"],
+                )
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return len(self._sessions)
+
+
+def load_secret(path: Path) -> bytes:
+    """
+    Read the token signing key from path, creating a random one (mode
+    0600) on first use. JUSTINVEST_SESSION_SECRET overrides the file.
+    """
+    env = os.environ.get("JUSTINVEST_SESSION_SECRET")
+    if env:
+        return env.encode("utf-8")
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        pass
+
+    key = secrets.token_bytes(32)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return path.read_bytes()
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+_store: SessionStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """
+    Return the process-wide session store, creating it on first use from
+    SESSION_SECRET_FILE and, if set, SESSION_SNAPSHOT_FILE.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore(load_secret(SESSION_SECRET_FILE))
+            if SESSION_SNAPSHOT_FILE is not None:
+                _store.load(SESSION_SNAPSHOT_FILE)
+        return _store
+
+
+def set_session_store(store: SessionStore | None) -> SessionStore | None:
+    """
+    Replace the process-wide session store. Returns the previous one.
+    """
+    global _store
+    with _store_lock:
+        previous, _store = _store, store
+        return previous
+
+
+def revoke_user_sessions(username: str) -> int:
+    """
+    End username's sessions in the process-wide store, if it exists.
+    """
+    if _store is None:
+        return 0
+    return _store.revoke_user(username)
+
+
+def save_sessions() -> int:
+    """
+    Snapshot the live sessions to SESSION_SNAPSHOT_FILE, if one is set.
+    """
+    if SESSION_SNAPSHOT_FILE is None or _store is None:
+        return 0
+    return _store.save(SESSION_SNAPSHOT_FILE)
@@ -0,0 +1,492 @@
+"""
+Pluggable storage for user credentials and roles.
+
+FlatFileBackend keeps the original passwd.txt / roles.txt files and is the
+default. SQLiteBackend stores the same data in an indexed SQLite database
+in WAL mode. Import the flat files into a database with:
+
+    python -m src.storage migrate data/users.db
+
+The flat files are append-only logs, so compact them from time to time:
+
+    python -m src.storage compact
+"""
+
+import argparse
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterable
+
+from src.credential_store import (
+    CredentialStore,
+    UserDirectory,
+    append_records,
+    get_directory,
+    read_log,
+)
+from src.Problem1c import parse_role_mask, role_values_from_mask
+from src.username_index import BloomFilter
+
+
+class UserBackend(ABC):
+    """
+    Storage operations used by signup, login and role lookup.
+    """
+
+    @abstractmethod
+    def get_hash(self, username: str) -> str | None:
+        """
+        Return the encoded password hash for username, or None.
+        """
+
+    @abstractmethod
+    def has_user(self, username: str) -> bool:
+        """
+        Return True if a credential record exists for username.
+        """
+
+    @abstractmethod
+    def usernames(self) -> Iterable[str]:
+        """
+        Iterate over every stored username.
+        """
+
+    @abstractmethod
+    def add_user(self, username: str, encoded_hash: str) -> bool:
+        """
+        Store a new credential record unless the username is already
+        taken; the check and the insert are atomic.
+        Returns True if it was stored.
+        """
+
+    @abstractmethod
+    def add_users(self, records: list[tuple[str, str]], sync: bool = True) -> list[str]:
+        """
+        Store many (username, encoded_hash) records in one write, skipping
+        usernames that are already taken (checked atomically with the
+        write). Returns the usernames that were added.
+        """
+
+    @abstractmethod
+    def replace_hash(
+        self, username: str, encoded_hash: str, expected: str | None = None
+    ) -> bool:
+        """
+        Replace the stored hash of an existing user. If expected is given,
+        replace it only while the stored hash is still expected.
+        Returns False if nothing was replaced.
+        """
+
+    @abstractmethod
+    def delete_user(self, username: str) -> bool:
+        """
+        Remove a user's credential record and roles.
+        Returns False if the user does not exist.
+        """
+
+    def get_user(self, username: str) -> tuple[str, int] | None:
+        """
+        Return (encoded hash, role bitmask) for username in one lookup,
+        or None if the user does not exist.
+        """
+        encoded_hash = self.get_hash(username)
+        if encoded_hash is None:
+            return None
+        return encoded_hash, parse_role_mask(",".join(self.get_roles(username)))
+
+    @abstractmethod
+    def get_roles(self, username: str) -> list[str]:
+        """
+        Return the role values stored for username (empty if none).
+        """
+
+    @abstractmethod
+    def store_roles(self, username: str, roles: list[str]) -> None:
+        """
+        Record the role values of a user, replacing any earlier ones.
+        """
+
+    @abstractmethod
+    def store_roles_many(
+        self, entries: list[tuple[str, list[str]]], sync: bool = True
+    ) -> None:
+        """
+        Record roles for many users in one write.
+        """
+
+    def preload(self) -> None:
+        """
+        Load whatever the backend keeps in memory ahead of the first request.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class FlatFileBackend(UserBackend):
+    """
+    The passwd.txt / roles.txt text files, used as append-only logs: a
+    password change, a role change or a deletion (a tombstone record) is
+    appended, and the last record for a username wins.
+
+    Paths default to problem2c.PASSWD_FILE and problem3ab.ROLES_FILE and
+    are read on every call, so reassigning those module settings is
+    honoured.
+    """
+
+    def __init__(self, passwd_file: Path | None = None, roles_file: Path | None = None):
+        self._passwd_file = passwd_file
+        self._roles_file = roles_file
+
+    @property
+    def passwd_file(self) -> Path:
+        if self._passwd_file is not None:
+            return self._passwd_file
+        import src.Problem2c as problem2c
+
+        return problem2c.PASSWD_FILE
+
+    @property
+    def roles_file(self) -> Path:
+        if self._roles_file is not None:
+            return self._roles_file
+        import src.Problem3ab as problem3ab
+
+        return problem3ab.ROLES_FILE
+
+    def credential_store(self) -> CredentialStore:
+        return self.directory().credentials
+
+    def directory(self) -> UserDirectory:
+        return get_directory(self.passwd_file, self.roles_file, parse_role_mask)
+
+    def preload(self) -> None:
+        self.directory().load()
+
+    def get_user(self, username: str) -> tuple[str, int] | None:
+        if not self.passwd_file.exists():
+            return None
+        return self.directory().lookup(username)
+
+    def get_hash(self, username: str) -> str | None:
+        if not self.passwd_file.exists():
+            return None
+        return self.credential_store().get(username)
+
+    def has_user(self, username: str) -> bool:
+        return self.get_hash(username) is not None
+
+    def usernames(self) -> Iterable[str]:
+        if not self.passwd_file.exists():
+            return []
+        return self.credential_store().usernames()
+
+    def add_user(self, username: str, encoded_hash: str) -> bool:
+        # The first enrollment creates passwd.txt
+        return self.credential_store().add_if_absent(username, encoded_hash)
+
+    def add_users(self, records: list[tuple[str, str]], sync: bool = True) -> list[str]:
+        return self.credential_store().add_many_if_absent(records, sync=sync)
+
+    def replace_hash(
+        self, username: str, encoded_hash: str, expected: str | None = None
+    ) -> bool:
+        return self.credential_store().replace(username, encoded_hash, expected)
+
+    def delete_user(self, username: str) -> bool:
+        if not self.credential_store().delete(username):
+            return False
+        self.directory().roles.delete(username)
+        return True
+
+    def get_roles(self, username: str) -> list[str]:
+        # Roles are indexed as bitmasks, so only known Role values survive
+        mask = self.directory().roles.get(username) or 0
+        return role_values_from_mask(mask)
+
+    def store_roles(self, username: str, roles: list[str]) -> None:
+        self.store_roles_many([(username, roles)], sync=False)
+
+    def store_roles_many(
+        self, entries: list[tuple[str, list[str]]], sync: bool = True
+    ) -> None:
+        records = [(username, ",".join(roles)) for username, roles in entries]
+        append_records(self.roles_file, records, sync=sync)
+
+    def compact(self) -> tuple[int, int]:
+        """
+        Compact passwd.txt and roles.txt into sorted files with sidecar
+        offset indexes. Returns (users kept, role records kept).
+        """
+        users = self.credential_store().compact()
+        roles = self.directory().roles.compact()
+        return users, roles
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username      TEXT PRIMARY KEY,
+    password_hash TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS user_roles (
+    username TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    role     TEXT NOT NULL,
+    PRIMARY KEY (username, position)
+) WITHOUT ROWID;
+"""
+
+
+class SQLiteBackend(UserBackend):
+    """
+    Users and roles in an SQLite database running in WAL mode.
+
+    Usernames are primary keys, so lookups are index seeks, and all
+    queries are parameterised so sqlite3's statement cache reuses the
+    prepared statements. Each thread gets its own connection.
+
+    With bloom_capacity set, a Bloom filter of every username is kept in
+    memory so that checks for names that are not taken (the usual case
+    at signup) are answered without touching the database.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        bloom_capacity: int | None = None,
+        bloom_error_rate: float = 0.001,
+    ):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+        self._bloom: BloomFilter | None = None
+        if bloom_capacity is not None:
+            self._bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+            self._bloom.update(self.usernames())
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Each thread uses only its own connection, but close() may be
+            # called from any thread
+            conn = sqlite3.connect(
+                self.path,
+                timeout=30,
+                cached_statements=256,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def get_hash(self, username: str) -> str | None:
+        row = (
+            self._connect()
+            .execute("SELECT password_hash FROM users WHERE username = ?", (username,))
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def has_user(self, username: str) -> bool:
+        if self._bloom is not None and username not in self._bloom:
+            return False
+        return self.get_hash(username) is not None
+
+    def usernames(self) -> Iterable[str]:
+        cur = self._connect().execute("SELECT username FROM users")
+        return (row[0] for row in cur)
+
+    def add_user(self, username: str, encoded_hash: str) -> bool:
+        # The primary key makes check-and-insert a single atomic statement
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO users (username, password_hash) VALUES (?, ?)",
+                (username, encoded_hash),
+            )
+        if self._bloom is not None:
+            self._bloom.add(username)
+        return cur.rowcount == 1
+
+    def add_users(self, records: list[tuple[str, str]], sync: bool = True) -> list[str]:
+        added = []
+        # One transaction; a row another writer got to first is ignored
+        with self._connect() as conn:
+            for username, encoded_hash in records:
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO users (username, password_hash) "
+                    "VALUES (?, ?)",
+                    (username, encoded_hash),
+                )
+                if cur.rowcount == 1:
+                    added.append(username)
+        if self._bloom is not None:
+            self._bloom.update(added)
+        return added
+
+    def replace_hash(
+        self, username: str, encoded_hash: str, expected: str | None = None
+    ) -> bool:
+        with self._connect() as conn:
+            if expected is None:
+                cur = conn.execute(
+                    "UPDATE users SET password_hash = ? WHERE username = ?",
+                    (encoded_hash, username),
+                )
+            else:
+                cur = conn.execute(
+                    "UPDATE users SET password_hash = ? "
+                    "WHERE username = ? AND password_hash = ?",
+                    (encoded_hash, username, expected),
+                )
+        return cur.rowcount == 1
+
+    def delete_user(self, username: str) -> bool:
+        with self._connect() as conn:
+            cur = conn.execute("DELETE FROM users WHERE username = ?", (username,))
+            conn.execute("DELETE FROM user_roles WHERE username = ?", (username,))
+        return cur.rowcount == 1
+
+    def get_user(self, username: str) -> tuple[str, int] | None:
+        row = (
+            self._connect()
+            .execute(
+                "SELECT u.password_hash, group_concat(r.role, ',') "
+                "FROM users u LEFT JOIN user_roles r ON r.username = u.username "
+                "WHERE u.username = ? GROUP BY u.username",
+                (username,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return row[0], parse_role_mask(row[1] or "")
+
+    def get_roles(self, username: str) -> list[str]:
+        rows = (
+            self._connect()
+            .execute(
+                "SELECT role FROM user_roles WHERE username = ? ORDER BY position",
+                (username,),
+            )
+            .fetchall()
+        )
+        return [row[0] for row in rows]
+
+    def store_roles(self, username: str, roles: list[str]) -> None:
+        self.store_roles_many([(username, roles)])
+
+    def store_roles_many(
+        self, entries: list[tuple[str, list[str]]], sync: bool = True
+    ) -> None:
+        with self._connect() as conn:
+            for username, roles in entries:
+                conn.execute("DELETE FROM user_roles WHERE username = ?", (username,))
+                conn.executemany(
+                    "INSERT INTO user_roles (username, position, role) VALUES (?, ?, ?)",
+                    [(username, i, role) for i, role in enumerate(roles)],
+                )
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+_backend: UserBackend = FlatFileBackend()
+
+
+def get_backend() -> UserBackend:
+    """
+    Return the storage backend used by signup, login and role lookup.
+    """
+    return _backend
+
+
+def set_backend(backend: UserBackend) -> UserBackend:
+    """
+    Select the storage backend. Returns the previously selected one.
+    """
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
+
+
+def migrate(
+    passwd_file: Path, roles_file: Path, backend: UserBackend, batch_size: int = 10000
+) -> tuple[int, int]:
+    """
+    Copy flat-file users and roles into backend. The logs are replayed
+    first, so only the current record of each username is imported and
+    deleted users are skipped.
+    Users already in backend are left as they are and not counted.
+    Returns (users imported, role records imported).
+    """
+    users = 0
+    batch: list[tuple[str, str]] = []
+    for record in read_log(passwd_file).items():
+        batch.append(record)
+        if len(batch) >= batch_size:
+            users += len(backend.add_users(batch))
+            batch = []
+    users += len(backend.add_users(batch))
+
+    role_records = 0
+    entries: list[tuple[str, list[str]]] = []
+    for username, value in read_log(roles_file).items():
+        roles = [role.strip() for role in value.split(",") if role.strip()]
+        entries.append((username, roles))
+        if len(entries) >= batch_size:
+            backend.store_roles_many(entries)
+            role_records += len(entries)
+            entries = []
+    backend.store_roles_many(entries)
+    role_records += len(entries)
+
+    return users, role_records
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.storage",
+        description="Manage the user storage backend.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    mig = sub.add_parser("migrate", help="import passwd.txt and roles.txt into SQLite")
+    mig.add_argument("database", type=Path)
+    mig.add_argument("--passwd", type=Path, default=Path("data/passwd.txt"))
+    mig.add_argument("--roles", type=Path, default=Path("data/roles.txt"))
+
+    com = sub.add_parser("compact", help="rewrite passwd.txt and roles.txt sorted")
+    com.add_argument("--passwd", type=Path, default=Path("data/passwd.txt"))
+    com.add_argument("--roles", type=Path, default=Path("data/roles.txt"))
+    args = parser.parse_args(argv)
+
+    if args.command == "compact":
+        users, roles = FlatFileBackend(args.passwd, args.roles).compact()
+        print(f"Compacted {users} users and {roles} role records.")
+        return 0
+
+    backend = SQLiteBackend(args.database)
+    try:
+        users, roles = migrate(args.passwd, args.roles, backend)
+    finally:
+        backend.close()
+    print(f"Imported {users} users and {roles} role records into {args.database}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
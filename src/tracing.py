@@ -0,0 +1,220 @@
+"""
+Lightweight per-request tracing: nested, timed spans for the stages of
+signup, login and the service requests.
+
+    with tracing.span("hash"):
+        encoded_hash = hasher.hash(password)
+
+    @tracing.traced("signup")
+    def signup(): ...
+
+Finished spans go to the installed sink: a RingBufferSink keeps the last
+N in memory, a JsonlSink appends one JSON object per span to a file (set
+JUSTINVEST_TRACE_FILE to use one from src.main or src.server). Children
+finish, and so are emitted, before their parent; "parent" and "trace"
+link them up. With no sink installed, span() returns a shared no-op.
+"""
+
+import functools
+import itertools
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Protocol
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    trace_id: str
+    span_id: int
+    parent_id: int | None
+    # Wall-clock start (for correlating with logs) and monotonic timing
+    start: float
+    start_ns: int
+    duration_ns: int = 0
+    error: str | None = None
+    attrs: dict[str, Any] = field(default_factory=dict)
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> dict[str, Any]:
+        record = {
+            "trace": self.trace_id,
+            "span": self.span_id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": self.duration_ns / 1e6,
+        }
+        if self.error is not None:
+            record["error"] = self.error
+        if self.attrs:
+            record["attrs"] = self.attrs
+        return record
+
+
+class SpanSink(Protocol):
+    def emit(self, span: Span) -> None: ...
+
+
+class RingBufferSink:
+    """
+    Keep the most recent `capacity` finished spans in memory.
+    """
+
+    def __init__(self, capacity: int = 10_000):
+        self._spans: deque[Span] = deque(maxlen=capacity)
+
+    def emit(self, span: Span) -> None:
+        self._spans.append(span)
+
+    def spans(self) -> list[Span]:
+        return list(self._spans)
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+
+class JsonlSink:
+    """
+    Append each finished span to a file as one line of JSON.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = None
+        self._lock = threading.Lock()
+
+    def emit(self, span: Span) -> None:
+        line = json.dumps(span.to_dict()) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = self.path.open("a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_sink: SpanSink | None = None
+_current: ContextVar[Span | None] = ContextVar("justinvest_span", default=None)
+_span_ids = itertools.count(1)
+
+
+def get_sink() -> SpanSink | None:
+    return _sink
+
+
+def set_sink(sink: SpanSink | None) -> SpanSink | None:
+    """
+    Install the sink finished spans are sent to (None turns tracing off).
+    Returns the previous sink.
+    """
+    global _sink
+    previous, _sink = _sink, sink
+    return previous
+
+
+def configure_from_env() -> SpanSink | None:
+    """
+    Install a JsonlSink for JUSTINVEST_TRACE_FILE, if set.
+    """
+    path = os.environ.get("JUSTINVEST_TRACE_FILE")
+    if not path:
+        return None
+    sink = JsonlSink(Path(path))
+    set_sink(sink)
+    return sink
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _SpanContext:
+    __slots__ = ("sink", "span", "token")
+
+    def __init__(self, sink: SpanSink, name: str, attrs: dict[str, Any]):
+        self.sink = sink
+        parent = _current.get()
+        self.span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent is not None else secrets.token_hex(8),
+            span_id=next(_span_ids),
+            parent_id=parent.span_id if parent is not None else None,
+            start=0.0,
+            start_ns=0,
+            attrs=attrs,
+        )
+
+    def __enter__(self) -> Span:
+        self.token = _current.set(self.span)
+        self.span.start = time.time()
+        self.span.start_ns = time.perf_counter_ns()
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        span = self.span
+        span.duration_ns = time.perf_counter_ns() - span.start_ns
+        if exc_type is not None:
+            span.error = exc_type.__name__
+        _current.reset(self.token)
+        self.sink.emit(span)
+
+
+def span(name: str, **attrs: Any):
+    """
+    Context manager timing a stage as a child of the current span.
+    Yields the Span (or a no-op stand-in when tracing is off), whose
+    set() adds attributes.
+    """
+    sink = _sink
+    if sink is None:
+        return _NOOP
+    return _SpanContext(sink, name, attrs)
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorator running each call of the function in a span.
+    """
+
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _sink is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
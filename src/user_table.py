@@ -0,0 +1,96 @@
+import sys
+from array import array
+from typing import Iterable, Iterator
+
+import src.Problem1c as problem1c
+from src.Problem3ab import CompactUser, User
+from src.storage import UserBackend
+
+
+class UserTable:
+    """
+    Columnar, array-backed table of resident users.
+
+    Usernames are interned and mapped to a row number. Role bitmasks sit
+    in an unsigned int array, and encoded hashes are packed back to back
+    in one bytearray with an offsets array marking where each row's hash
+    starts. A row costs a few dozen bytes plus its username and hash,
+    instead of a full object graph per user.
+    """
+
+    def __init__(self):
+        self._rows: dict[str, int] = {}
+        self._usernames: list[str] = []
+        self._roles = array("I")
+        self._offsets = array("Q", [0])
+        self._hashes = bytearray()
+
+    def __len__(self) -> int:
+        return len(self._usernames)
+
+    def __contains__(self, username: str) -> bool:
+        return username in self._rows
+
+    def __iter__(self) -> Iterator[CompactUser]:
+        for row in range(len(self._usernames)):
+            yield self._record(row)
+
+    def add(self, username: str, password_hash: str | None, roles: int) -> int:
+        """
+        Append a user and return its row number.
+        Raises ValueError if the username is already in the table.
+        """
+        if username in self._rows:
+            raise ValueError(f"User {username!r} is already in the table.")
+
+        username = sys.intern(username)
+        row = len(self._usernames)
+        self._rows[username] = row
+        self._usernames.append(username)
+        self._roles.append(int(roles))
+        self._hashes += (password_hash or "").encode("ascii")
+        self._offsets.append(len(self._hashes))
+        return row
+
+    def add_compact(self, user: CompactUser) -> int:
+        return self.add(user.username, user.password_hash, user.roles)
+
+    def add_user(self, user: User, password_hash: str | None = None) -> int:
+        return self.add_compact(user.to_compact(password_hash))
+
+    def get(self, username: str) -> CompactUser | None:
+        row = self._rows.get(username)
+        if row is None:
+            return None
+        return self._record(row)
+
+    def get_user(self, username: str) -> User | None:
+        record = self.get(username)
+        return record.to_user() if record is not None else None
+
+    def _record(self, row: int) -> CompactUser:
+        start, end = self._offsets[row], self._offsets[row + 1]
+        return CompactUser(
+            username=self._usernames[row],
+            roles=problem1c.RoleFlag(self._roles[row]),
+            password_hash=self._hashes[start:end].decode("ascii") or None,
+        )
+
+    @classmethod
+    def from_records(cls, records: Iterable[CompactUser]) -> "UserTable":
+        table = cls()
+        for record in records:
+            table.add_compact(record)
+        return table
+
+    @classmethod
+    def from_backend(cls, backend: UserBackend) -> "UserTable":
+        """
+        Load every user, with hash and role bitmask, from a storage backend.
+        """
+        table = cls()
+        for username in backend.usernames():
+            found = backend.get_user(username)
+            if found is not None:
+                table.add(username, found[0], found[1])
+        return table
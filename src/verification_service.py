@@ -0,0 +1,60 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable
+
+import src.Problem2c as problem2c
+
+
+class VerificationService:
+    """
+    Run verify_login on a bounded pool of worker threads.
+
+    argon2-cffi releases the GIL while hashing, so several verifications
+    proceed in parallel and throughput scales with the number of cores.
+    At most max_pending calls are queued or running at once; submit blocks
+    once that limit is reached.
+    """
+
+    def __init__(self, max_workers: int | None = None, max_pending: int | None = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 4
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="verify"
+        )
+
+    def submit(self, username: str, password: str) -> Future:
+        """
+        Queue one verification. The future resolves to verify_login's result.
+        """
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(problem2c.verify_login, username, password)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def submit_many(self, pairs: Iterable[tuple[str, str]]) -> list[Future]:
+        """
+        Queue a verification for every (username, password) pair.
+        """
+        return [self.submit(username, password) for username, password in pairs]
+
+    def verify_many(self, pairs: Iterable[tuple[str, str]]) -> list[bool]:
+        """
+        Verify every (username, password) pair and return the results in
+        input order.
+        """
+        return [future.result() for future in self.submit_many(pairs)]
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "VerificationService":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
@@ -1,5 +1,7 @@
 import unittest
+import contextlib
 import datetime
+import io
 
 from src.Problem1c import (
     Role,
@@ -7,7 +9,9 @@ from src.Problem1c import (
     getAuthorizedOperations,
     isOperationAvailable,
     canPerformOperation,
+    compile_policy,
 )
+import src.Problem1c as problem1c
 
 
 class TestAccessControlPermissions(unittest.TestCase):
@@ -109,6 +113,23 @@ class TestAccessControlTimeRestrictions(unittest.TestCase):
         eight_pm = datetime.time(20, 0)
         self.assertFalse(isOperationAvailable({Role.TELLER}, time=eight_pm))
 
+    def test_window_end_is_inclusive_to_the_exact_minute(self):
+        """As with start <= time <= end, 17:00:00 is in and 17:00:30 is out."""
+        monday = datetime.datetime(2024, 1, 1)
+        for when, expected in [
+            (monday.replace(hour=9), True),
+            (monday.replace(hour=16, minute=59, second=59), True),
+            (monday.replace(hour=17), True),
+            (monday.replace(hour=17, microsecond=1), False),
+            (monday.replace(hour=17, second=30), False),
+        ]:
+            with self.subTest(when=when):
+                self.assertEqual(isOperationAvailable({Role.TELLER}, when), expected)
+
+        # All-day roles run on across midnight, Sunday into Monday included
+        sunday = datetime.datetime(2024, 1, 7, 23, 59, 30)
+        self.assertTrue(isOperationAvailable({Role.CLIENT}, sunday))
+
     def test_other_roles_available_all_day(self):
         """Non-teller roles should be available at arbitrary times (assuming ROLE_AVAILABILITY is all day)."""
         two_am = datetime.time(2, 0)
@@ -126,6 +147,55 @@ class TestAccessControlTimeRestrictions(unittest.TestCase):
             with self.subTest(role=role, when="10pm"):
                 self.assertTrue(isOperationAvailable({role}, time=ten_pm))
 
+    def test_multiple_windows_and_weekday_schedules(self):
+        policy = compile_policy(
+            {},
+            {},
+            {
+                "split": [
+                    (datetime.time(8, 0), datetime.time(12, 0)),
+                    (datetime.time(13, 0), datetime.time(17, 0)),
+                ],
+                # Monday to Friday 09:00-17:00 only
+                "weekdays": {
+                    day: (datetime.time(9, 0), datetime.time(17, 0)) for day in range(5)
+                },
+            },
+        )
+        monday = datetime.datetime(2024, 1, 1)
+        saturday = datetime.datetime(2024, 1, 6)
+
+        def available(role, day, hour, minute=0):
+            when = day.replace(hour=hour, minute=minute)
+            bits = policy.availability_for({role})
+            return bool(bits >> problem1c.minute_of_week(when) & 1)
+
+        self.assertTrue(available("split", monday, 12, 0))
+        self.assertFalse(available("split", monday, 12, 30))
+        self.assertTrue(available("split", saturday, 13, 0))
+        self.assertTrue(available("weekdays", monday, 10))
+        self.assertFalse(available("weekdays", saturday, 10))
+
+    def test_injected_clock_controls_default_time(self):
+        orig_clock = problem1c.clock
+        problem1c.clock = lambda: datetime.datetime(2024, 1, 1, 20, 0)
+        try:
+            self.assertFalse(isOperationAvailable({Role.TELLER}))
+            self.assertFalse(
+                canPerformOperation(
+                    {Role.TELLER}, Operations.VIEW_CLIENT_ACCOUNT_BALANCE
+                )
+            )
+        finally:
+            problem1c.clock = orig_clock
+
+        ten_am = datetime.datetime(2024, 1, 1, 10, 0)
+        self.assertTrue(
+            canPerformOperation(
+                {Role.TELLER}, Operations.VIEW_CLIENT_ACCOUNT_BALANCE, now=ten_am
+            )
+        )
+
 
 class TestPerformOperation(unittest.TestCase):
     def test_perform_operation_success_for_authorized_role(self):
@@ -145,5 +215,139 @@ class TestPerformOperation(unittest.TestCase):
         self.assertFalse(result)
 
 
+class TestCompiledPolicy(unittest.TestCase):
+    def test_inheritance_closure_is_precomputed(self):
+        policy = compile_policy(
+            {"base": {"read"}, "mid": {"write"}, "top": {"admin"}},
+            {"top": ["mid"], "mid": ["base"]},
+        )
+
+        self.assertEqual(
+            policy.operations_in(policy.mask_for({"top"})), {"read", "write", "admin"}
+        )
+        self.assertTrue(policy.allows({"mid"}, "read"))
+        self.assertFalse(policy.allows({"base"}, "write"))
+        self.assertFalse(policy.allows({"unknown"}, "read"))
+
+    def test_cycle_detected_at_compile_time(self):
+        with self.assertRaises(ValueError):
+            compile_policy({"a": {"x"}}, {"a": ["b"], "b": ["c"], "c": ["a"]})
+
+    def test_scales_to_many_dynamic_roles(self):
+        n = 3000
+        base = {f"role{i}": {f"op{i}"} for i in range(n)}
+        parents = {f"role{i}": [f"role{i - 1}"] for i in range(1, n)}
+
+        policy = compile_policy(base, parents)
+
+        self.assertTrue(policy.allows({f"role{n - 1}"}, "op0"))
+        self.assertFalse(policy.allows({"role0"}, f"op{n - 1}"))
+        self.assertEqual(len(policy.operations_in(policy.mask_for({"role9"}))), 10)
+
+
+class TestDecisionCache(unittest.TestCase):
+    def setUp(self):
+        self._orig_client_perms = set(problem1c.BASE_PERMS[Role.CLIENT])
+        problem1c.DECISION_CACHE.clear()
+
+    def tearDown(self):
+        problem1c.set_role_permissions(Role.CLIENT, self._orig_client_perms)
+        problem1c.DECISION_CACHE.clear()
+
+    def test_repeated_lookups_hit_the_cache(self):
+        getAuthorizedOperations({Role.CLIENT})
+        getAuthorizedOperations({Role.CLIENT})
+        getAuthorizedOperations({Role.PREMIUM_CLIENT})
+
+        stats = problem1c.decision_cache_stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["size"], 2)
+
+    def test_policy_change_invalidates_entries(self):
+        self.assertNotIn(
+            Operations.VIEW_MONEY_MARKET_INSTRUMENTS,
+            getAuthorizedOperations({Role.PREMIUM_CLIENT}),
+        )
+
+        problem1c.set_role_permissions(
+            Role.CLIENT,
+            self._orig_client_perms | {Operations.VIEW_MONEY_MARKET_INSTRUMENTS},
+        )
+
+        self.assertIn(
+            Operations.VIEW_MONEY_MARKET_INSTRUMENTS,
+            getAuthorizedOperations({Role.PREMIUM_CLIENT}),
+        )
+        self.assertEqual(problem1c.decision_cache_stats()["misses"], 2)
+
+    def test_invalid_change_leaves_policy_in_force(self):
+        version = problem1c.POLICY_VERSION
+        with self.assertRaises(ValueError):
+            problem1c.set_role_parents(Role.CLIENT, [Role.PREMIUM_CLIENT])
+
+        self.assertEqual(problem1c.POLICY_VERSION, version)
+        self.assertNotIn(Role.CLIENT, problem1c.ROLE_PARENT)
+        self.assertIn(
+            Operations.VIEW_SELF_ACCOUNT_BALANCE,
+            getAuthorizedOperations({Role.PREMIUM_CLIENT}),
+        )
+
+    def test_tables_cannot_be_edited_in_place(self):
+        with self.assertRaises(TypeError):
+            problem1c.BASE_PERMS[Role.TELLER] = set(Operations)
+        with self.assertRaises(AttributeError):
+            problem1c.BASE_PERMS[Role.CLIENT].add(Operations.VIEW_SELF_ACCOUNT_BALANCE)
+        with self.assertRaises(AttributeError):
+            problem1c.ROLE_PARENT[Role.TELLER].append(Role.CLIENT)
+
+    def test_cache_is_bounded(self):
+        cache = problem1c.DecisionCache(maxsize=2)
+        for i in range(5):
+            cache.get_or_compute((i,), lambda: i)
+
+        self.assertEqual(cache.stats()["size"], 2)
+        self.assertEqual(cache.get_or_compute((4,), lambda: None), 4)
+        self.assertIsNone(cache.get_or_compute((0,), lambda: None))
+
+
+class TestAuthorizeBatch(unittest.TestCase):
+    def test_matches_single_checks(self):
+        role_sets = [
+            {Role.CLIENT},
+            {Role.TELLER},
+            set(),
+            {Role.PREMIUM_CLIENT, Role.TELLER},
+            {Role.CLIENT},
+        ]
+        operations = list(Operations)
+        times = [
+            datetime.datetime(2024, 1, 1, 3, 0),
+            datetime.datetime(2024, 1, 1, 10, 0),
+            datetime.datetime(2024, 1, 6, 17, 0),
+            datetime.datetime(2024, 1, 6, 17, 0, 30),
+            datetime.datetime(2024, 1, 6, 17, 1),
+            datetime.datetime(2024, 1, 7, 23, 59, 30),
+        ]
+
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            result = problem1c.authorize_batch(role_sets, operations, times)
+        self.assertEqual(out.getvalue(), "")
+        self.assertEqual(result.shape, (5, len(operations), len(times)))
+
+        for i, roles in enumerate(role_sets):
+            for j, op in enumerate(operations):
+                for k, when in enumerate(times):
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        expected = canPerformOperation(roles, op, now=when)
+                    self.assertEqual(bool(result[i, j, k]), expected, (roles, op, when))
+
+    def test_unknown_operation_is_denied(self):
+        result = problem1c.authorize_batch(
+            [{Role.CLIENT}], ["not an operation"], [datetime.datetime(2024, 1, 1)]
+        )
+        self.assertFalse(result.any())
+
+
 if __name__ == "__main__":
     unittest.main()
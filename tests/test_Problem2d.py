@@ -1,6 +1,7 @@
 import unittest
 from pathlib import Path
 import tempfile
+import threading
 
 import src.Problem2c as problem2c
 
@@ -55,6 +56,90 @@ class TestBasicPasswordFile(unittest.TestCase):
             "Incorrect password should not verify",
         )
 
+    def test_add_user_rejects_taken_username_atomically(self):
+        store = problem2c.get_credential_store()
+        results = []
+
+        def claim(i):
+            results.append(store.add_if_absent("dave", f"hash-{i}"))
+
+        threads = [threading.Thread(target=claim, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results.count(True), 1)
+        self.assertFalse(problem2c.add_user("dave", "secret123"))
+        lines = problem2c.PASSWD_FILE.read_text(encoding="utf-8").splitlines()
+        self.assertEqual(len(lines), 1)
+
+    def test_outdated_hash_is_upgraded_on_login(self):
+        orig_ph = problem2c.ph
+        try:
+            problem2c.configure_hasher(time_cost=1, memory_cost=8192, parallelism=1)
+            problem2c.add_user("carol", "secret123")
+            old_hash = problem2c.get_credential_store().get("carol")
+
+            problem2c.configure_hasher(time_cost=2, memory_cost=8192, parallelism=1)
+
+            # A failed login must not touch the stored hash
+            self.assertFalse(problem2c.verify_login("carol", "wrongpass"))
+            self.assertEqual(problem2c.get_credential_store().get("carol"), old_hash)
+
+            self.assertTrue(problem2c.verify_login("carol", "secret123"))
+            new_hash = problem2c.get_credential_store().get("carol")
+            self.assertNotEqual(new_hash, old_hash)
+            self.assertIn("t=2", new_hash)
+            self.assertFalse(problem2c.ph.check_needs_rehash(new_hash))
+            self.assertTrue(problem2c.verify_login("carol", "secret123"))
+        finally:
+            problem2c.ph = orig_ph
+
+    def test_upgrade_does_not_revert_concurrent_password_change(self):
+        orig_ph = problem2c.ph
+        try:
+            problem2c.configure_hasher(time_cost=1, memory_cost=8192, parallelism=1)
+            problem2c.add_user("carol", "secret123")
+            old_hash = problem2c.get_credential_store().get("carol")
+
+            problem2c.configure_hasher(time_cost=2, memory_cost=8192, parallelism=1)
+            # The login looked up old_hash, then the password changed
+            # before its upgrade was written
+            self.assertTrue(problem2c.change_password("carol", "newsecret1"))
+            self.assertTrue(problem2c.verify_password("carol", old_hash, "secret123"))
+
+            self.assertFalse(problem2c.verify_login("carol", "secret123"))
+            self.assertTrue(problem2c.verify_login("carol", "newsecret1"))
+        finally:
+            problem2c.ph = orig_ph
+
+    def test_change_password_and_delete_user(self):
+        problem2c.add_user("erin", "secret123")
+
+        self.assertTrue(problem2c.change_password("erin", "newsecret1"))
+        self.assertFalse(problem2c.verify_login("erin", "secret123"))
+        self.assertTrue(problem2c.verify_login("erin", "newsecret1"))
+        self.assertFalse(problem2c.change_password("nobody", "newsecret1"))
+
+        self.assertTrue(problem2c.delete_user("erin"))
+        self.assertFalse(problem2c.verify_login("erin", "newsecret1"))
+        self.assertFalse(problem2c.delete_user("erin"))
+
+    def test_hasher_params_loaded_from_config(self):
+        config = problem2c.PASSWD_FILE.parent / "argon2.json"
+        config.write_text('{"time_cost": 4, "memory_cost": 16384}', encoding="utf-8")
+
+        params = problem2c.load_hasher_params(config)
+
+        self.assertEqual(
+            params, {"time_cost": 4, "memory_cost": 16384, "parallelism": 2}
+        )
+        self.assertEqual(
+            problem2c.load_hasher_params(config.with_name("missing.json")),
+            problem2c.DEFAULT_HASHER_PARAMS,
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -5,6 +5,7 @@ import tempfile
 import src.Problem1c as problem1c
 import src.Problem2c as problem2c
 import src.Problem3ab as problem3ab  # <-- change to your actual module name
+from src.sessions import SessionStore, set_session_store
 
 import questionary
 
@@ -28,6 +29,8 @@ class TestSignupFlow(unittest.TestCase):
         # Also redirect Problem2c's PASSWD_FILE so add_user writes there
         problem2c.PASSWD_FILE = problem3ab.PASSWD_FILE
 
+        self._orig_sessions = set_session_store(SessionStore(b"test-secret"))
+
         # Save original questionary functions to restore later
         self._orig_text = questionary.text
         self._orig_password = questionary.password
@@ -48,6 +51,7 @@ class TestSignupFlow(unittest.TestCase):
         if hasattr(self, "_orig_role_list_values"):
             problem1c.Role.list_values = self._orig_role_list_values
 
+        set_session_store(self._orig_sessions)
         self.tmpdir.cleanup()
 
     # Helpers to fake questionary prompts
@@ -241,5 +245,30 @@ class TestSignupFlow(unittest.TestCase):
         attempt_with("GoodPass1!")  # lower() == "goodpass1!" in weak_passwords.txt
 
 
+class TestWeakPasswordCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self._orig_weak_file = problem3ab.WEAK_PASSWD_FILE
+        problem3ab.WEAK_PASSWD_FILE = Path(self.tmpdir.name) / "weak_passwords.txt"
+        problem3ab.WEAK_PASSWD_FILE.write_text("Password1!\n", encoding="utf-8")
+
+    def tearDown(self):
+        problem3ab.WEAK_PASSWD_FILE = self._orig_weak_file
+        self.tmpdir.cleanup()
+
+    def test_cached_until_file_changes(self):
+        first = problem3ab.get_weak_passwords()
+        self.assertEqual(first, frozenset({"password1!"}))
+        self.assertIs(problem3ab.get_weak_passwords(), first)
+
+        with problem3ab.WEAK_PASSWD_FILE.open("a", encoding="utf-8") as f:
+            f.write("Summer2024!\n")
+
+        self.assertIn("summer2024!", problem3ab.get_weak_passwords())
+
+    def test_preload_reports_entry_count(self):
+        self.assertEqual(problem3ab.preload_weak_passwords(), 1)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,78 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import src.Problem2c as problem2c
+import src.Problem3ab as problem3ab
+from benchmarks.datasets import DatasetSpec, generate
+from benchmarks.suite import compare, percentile, run
+from src.credential_store import read_log
+
+
+class TestDatasets(unittest.TestCase):
+    def test_generate_writes_valid_users(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            spec = DatasetSpec(
+                users=20, weak_passwords=50, role_mix={("Client", "Teller"): 1.0}
+            )
+            dataset = generate(Path(tmp), spec)
+
+            hashes = read_log(Path(tmp) / "passwd.txt")
+            roles = read_log(Path(tmp) / "roles.txt")
+            self.assertEqual(len(hashes), 20)
+            self.assertEqual(set(roles.values()), {"Client,Teller"})
+            weak = (Path(tmp) / "weak_passwords.txt").read_text().splitlines()
+            self.assertEqual(len(weak), 50)
+
+            username, password = dataset.credentials[3]
+            hasher = problem2c.make_hasher(1, 8192, 1)
+            self.assertTrue(hasher.verify(hashes[username], password))
+            problem3ab.validate_password(username, password)
+
+
+class TestSuite(unittest.TestCase):
+    def test_run_reports_every_benchmark(self):
+        orig = (problem2c.PASSWD_FILE, problem2c.ph, problem2c.throttle)
+
+        results = run(["tiny"], iterations=50, login_iterations=3)
+
+        self.assertEqual(
+            (problem2c.PASSWD_FILE, problem2c.ph, problem2c.throttle), orig
+        )
+        names = {r["benchmark"] for r in results["results"]}
+        self.assertEqual(
+            names,
+            {
+                "verify_login",
+                "valid_username",
+                "validate_password",
+                "getAuthorizedOperations",
+            },
+        )
+        for r in results["results"]:
+            self.assertLessEqual(r["p50_us"], r["p99_us"])
+            self.assertGreater(r["ops_per_s"], 0)
+
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.99), 7)
+
+    def test_compare_flags_regressions_beyond_tolerance(self):
+        def results(p50, p99):
+            return {
+                "results": [
+                    {"scale": "s", "benchmark": "b", "p50_us": p50, "p99_us": p99}
+                ]
+            }
+
+        baseline = results(10.0, 20.0)
+        self.assertEqual(compare(results(12.0, 24.0), baseline, 0.25), [])
+        regressions = compare(results(10.0, 30.0), baseline, 0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("p99_us", regressions[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from pathlib import Path
+import tempfile
+
+import src.Problem3ab as problem3ab
+from src.breach_index import BreachIndex, build_index
+
+
+class TestBreachIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        self.source = self.dir / "weak.txt"
+        self.source.write_text(
+            "Password1!\nqwerty\nletmein\nQWERTY\n\nsummer2024\n", encoding="utf-8"
+        )
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_build_and_lookup(self):
+        dest = self.dir / "weak.idx"
+        count = build_index(self.source, dest)
+
+        # "qwerty" and "QWERTY" collapse to one entry
+        self.assertEqual(count, 4)
+        with BreachIndex(dest) as index:
+            self.assertEqual(len(index), 4)
+            self.assertIn("password1!", index)
+            self.assertIn("LetMeIn", index)
+            self.assertNotIn("GoodPass1!", index)
+
+    def test_merges_sorted_runs(self):
+        dest = self.dir / "weak.idx"
+        count = build_index(self.source, dest, chunk_size=2)
+
+        self.assertEqual(count, 4)
+        with BreachIndex(dest) as index:
+            for pw in ["Password1!", "qwerty", "letmein", "summer2024"]:
+                self.assertIn(pw, index)
+        self.assertEqual(
+            sorted(p.name for p in self.dir.iterdir()), ["weak.idx", "weak.txt"]
+        )
+
+    def test_empty_source(self):
+        self.source.write_text("", encoding="utf-8")
+        dest = self.dir / "weak.idx"
+
+        self.assertEqual(build_index(self.source, dest), 0)
+        with BreachIndex(dest) as index:
+            self.assertNotIn("anything", index)
+
+    def test_rejects_non_index_file(self):
+        with self.assertRaises(ValueError):
+            BreachIndex(self.source)
+
+    def test_validate_password_uses_index(self):
+        dest = self.dir / "weak.idx"
+        self.source.write_text("GoodPass1!\n", encoding="utf-8")
+        build_index(self.source, dest)
+
+        orig_index = problem3ab.WEAK_PASSWD_INDEX
+        problem3ab.WEAK_PASSWD_INDEX = dest
+        try:
+            with self.assertRaises(ValueError):
+                problem3ab.validate_password("alice", "goodPASS1!")
+            problem3ab.validate_password("alice", "OtherPass1!")
+        finally:
+            problem3ab.WEAK_PASSWD_INDEX = orig_index
+
+
+if __name__ == "__main__":
+    unittest.main()
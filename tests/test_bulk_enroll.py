@@ -0,0 +1,115 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import io
+import multiprocessing
+from pathlib import Path
+import tempfile
+from unittest import mock
+
+import src.Problem2c as problem2c
+import src.Problem3ab as problem3ab
+import src.bulk_enroll as bulk_enroll
+
+
+class TestBulkEnroll(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        data_dir = Path(self.tmpdir.name)
+
+        self._orig = (
+            problem2c.PASSWD_FILE,
+            problem3ab.ROLES_FILE,
+            problem3ab.WEAK_PASSWD_FILE,
+            problem2c.ph,
+        )
+        problem2c.PASSWD_FILE = data_dir / "passwd.txt"
+        problem3ab.ROLES_FILE = data_dir / "roles.txt"
+        problem3ab.WEAK_PASSWD_FILE = data_dir / "weak_passwords.txt"
+        problem2c.PASSWD_FILE.write_text("existing:fakehash\n", encoding="utf-8")
+        problem3ab.ROLES_FILE.touch()
+        problem3ab.WEAK_PASSWD_FILE.write_text("Password1!\n", encoding="utf-8")
+        problem2c.throttle.reset()
+
+    def tearDown(self):
+        (
+            problem2c.PASSWD_FILE,
+            problem3ab.ROLES_FILE,
+            problem3ab.WEAK_PASSWD_FILE,
+            problem2c.ph,
+        ) = self._orig
+        self.tmpdir.cleanup()
+
+    def test_jsonl_enrollment(self):
+        stream = io.StringIO(
+            '{"username": "alice", "password": "GoodPass1!", "roles": ["Client"]}\n'
+            '{"username": "bob", "password": "GoodPass2!", "roles": "Employee,Teller"}\n'
+            '{"username": "existing", "password": "GoodPass3!", "roles": ["Client"]}\n'
+            '{"username": "alice", "password": "GoodPass4!", "roles": ["Client"]}\n'
+            '{"username": "carol", "password": "Password1!", "roles": ["Client"]}\n'
+            '{"username": "dave", "password": "GoodPass5!", "roles": ["Janitor"]}\n'
+            "not json\n"
+        )
+
+        report = bulk_enroll.enroll(
+            bulk_enroll.iter_rows(stream, "jsonl"), workers=2, batch_size=1
+        )
+
+        self.assertEqual(report.enrolled, 2)
+        self.assertEqual([line for line, _ in report.rejected], [3, 4, 5, 6, 7])
+        self.assertTrue(problem2c.verify_login("alice", "GoodPass1!"))
+        self.assertTrue(problem2c.verify_login("bob", "GoodPass2!"))
+        self.assertEqual(
+            problem3ab.ROLES_FILE.read_text(encoding="utf-8").splitlines(),
+            ["alice:Client", "bob:Employee,Teller"],
+        )
+
+    def test_concurrent_signup_is_kept(self):
+        def rows():
+            yield 1, {"username": "alice", "password": "GoodPass1!", "roles": "Client"}
+            # alice signs up after her row was checked, before the write
+            problem2c.add_user("alice", "OwnPass1!")
+            problem3ab.store_roles("alice", ["Teller"])
+            yield 2, {"username": "bob", "password": "GoodPass2!", "roles": "Client"}
+
+        report = bulk_enroll.enroll(rows(), workers=1, batch_size=10)
+
+        self.assertEqual(report.enrolled, 1)
+        self.assertEqual(report.rejected, [(1, "Username already exists.")])
+        self.assertTrue(problem2c.verify_login("alice", "OwnPass1!"))
+        self.assertEqual(problem3ab.get_backend().get_roles("alice"), ["Teller"])
+        self.assertEqual(problem3ab.get_backend().get_roles("bob"), ["Client"])
+
+    def test_spawned_workers_use_configured_hasher(self):
+        problem2c.configure_hasher(time_cost=1, memory_cost=8192, parallelism=1)
+        spawn_pool = functools.partial(
+            ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn")
+        )
+        rows = [(1, {"username": "gina", "password": "GoodPass1!", "roles": "Client"})]
+
+        with mock.patch.object(bulk_enroll, "ProcessPoolExecutor", spawn_pool):
+            report = bulk_enroll.enroll(rows, workers=1)
+
+        self.assertEqual(report.enrolled, 1)
+        encoded_hash = problem3ab.get_backend().get_hash("gina")
+        self.assertIn("$m=8192,t=1,p=1$", encoded_hash)
+
+    def test_csv_enrollment(self):
+        stream = io.StringIO(
+            "username,password,roles\n"
+            'erin,GoodPass1!,"Client,Premium Client"\n'
+            "frank,short,Client\n"
+        )
+
+        report = bulk_enroll.enroll(bulk_enroll.iter_rows(stream, "csv"), workers=1)
+
+        self.assertEqual(report.enrolled, 1)
+        self.assertEqual(len(report.rejected), 1)
+        self.assertEqual(
+            problem3ab.ROLES_FILE.read_text(encoding="utf-8"),
+            "erin:Client,Premium Client\n",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
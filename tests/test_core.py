@@ -0,0 +1,101 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import src.core as core
+import src.Problem2c as problem2c
+import src.Problem3ab as problem3ab
+import src.sessions as sessions
+from benchmarks.import_time import measure_import
+from src.breach_index import build_index
+from src.sessions import SessionStore, set_session_store
+
+
+class TestImportSideEffects(unittest.TestCase):
+    def test_core_import_touches_no_files_and_skips_prompts(self):
+        for module in ("src.core", "src.commands"):
+            with self.subTest(module):
+                result = measure_import(module)
+                self.assertEqual(result["created"], [])
+                self.assertEqual(result["loaded"], [])
+
+
+class TestConfigure(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self._orig = (
+            problem2c.PASSWD_FILE,
+            problem2c.HASHER_CONFIG_FILE,
+            problem2c.ph,
+            problem3ab.ROLES_FILE,
+            problem3ab.WEAK_PASSWD_FILE,
+            problem3ab.WEAK_PASSWD_INDEX,
+            sessions.SESSION_SECRET_FILE,
+            sessions.SESSION_SNAPSHOT_FILE,
+        )
+        self._orig_sessions = set_session_store(SessionStore(b"test-secret"))
+        problem2c.throttle.reset()
+
+    def tearDown(self):
+        set_session_store(self._orig_sessions)
+        (
+            problem2c.PASSWD_FILE,
+            problem2c.HASHER_CONFIG_FILE,
+            problem2c.ph,
+            problem3ab.ROLES_FILE,
+            problem3ab.WEAK_PASSWD_FILE,
+            problem3ab.WEAK_PASSWD_INDEX,
+            sessions.SESSION_SECRET_FILE,
+            sessions.SESSION_SNAPSHOT_FILE,
+        ) = self._orig
+        self.tmpdir.cleanup()
+
+    def test_files_are_created_on_first_use_in_data_dir(self):
+        data_dir = Path(self.tmpdir.name)
+        core.configure(data_dir=data_dir, hasher_params={"time_cost": 1})
+        self.assertEqual(problem2c.get_hasher().time_cost, 1)
+        self.assertEqual(list(data_dir.iterdir()), [])
+
+        core.register_user("alice", "GoodPass1!", ["Client"])
+        user = core.authenticate("alice", "GoodPass1!")
+
+        self.assertEqual(user.roles, {core.Role.CLIENT})
+        self.assertEqual(
+            sorted(p.name for p in data_dir.iterdir()), ["passwd.txt", "roles.txt"]
+        )
+
+    def test_hasher_is_built_lazily_from_config_file(self):
+        data_dir = Path(self.tmpdir.name)
+        (data_dir / "argon2.json").write_text('{"time_cost": 2}', encoding="utf-8")
+        core.configure(data_dir=data_dir)
+
+        self.assertIsNone(problem2c.ph)
+        self.assertEqual(problem2c.get_hasher().time_cost, 2)
+
+    def test_weak_password_index(self):
+        data_dir = Path(self.tmpdir.name)
+        source = data_dir / "breached.txt"
+        source.write_text("Breached1!\n", encoding="utf-8")
+        build_index(source, data_dir / "breached.idx")
+
+        core.configure(data_dir=data_dir, weak_passwd_index=data_dir / "breached.idx")
+
+        self.assertEqual(problem3ab.WEAK_PASSWD_INDEX, data_dir / "breached.idx")
+        with self.assertRaises(ValueError):
+            problem3ab.validate_password("alice", "Breached1!")
+        problem3ab.validate_password("alice", "GoodPass1!")
+
+    def test_change_password_enforces_policy(self):
+        core.configure(data_dir=self.tmpdir.name, hasher_params={"time_cost": 1})
+        core.register_user("alice", "GoodPass1!", ["Client"])
+
+        with self.assertRaises(ValueError):
+            core.change_password("alice", "a")
+        self.assertTrue(core.verify_login("alice", "GoodPass1!"))
+
+        self.assertTrue(core.change_password("alice", "NewPass2@"))
+        self.assertTrue(core.verify_login("alice", "NewPass2@"))
+
+
+if __name__ == "__main__":
+    unittest.main()
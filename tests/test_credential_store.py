@@ -0,0 +1,241 @@
+import unittest
+from pathlib import Path
+import tempfile
+
+from src.credential_store import (
+    CredentialStore,
+    UserDirectory,
+    append_records,
+    atomic_write,
+    atomic_writer,
+    index_path,
+    read_log,
+)
+from src.Problem1c import Role, parse_role_mask, roles_from_mask
+
+
+class TestCredentialStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name) / "passwd.txt"
+        self.path.write_text("alice:hash-a\nbob:hash-b\n", encoding="utf-8")
+        self.store = CredentialStore(self.path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_lookup_loaded_records(self):
+        self.assertEqual(self.store.get("alice"), "hash-a")
+        self.assertEqual(self.store.get("bob"), "hash-b")
+        self.assertIsNone(self.store.get("carol"))
+        self.assertEqual(len(self.store), 2)
+
+    def test_picks_up_externally_appended_lines(self):
+        self.assertIsNone(self.store.get("carol"))
+
+        with self.path.open("a", encoding="utf-8") as file:
+            file.write("carol:hash-c\n")
+
+        self.assertEqual(self.store.get("carol"), "hash-c")
+        self.assertEqual(self.store.get("alice"), "hash-a")
+
+    def test_reloads_after_rewrite(self):
+        self.assertIn("alice", self.store)
+
+        self.path.write_text("dave:hash-d\n", encoding="utf-8")
+
+        self.assertNotIn("alice", self.store)
+        self.assertEqual(self.store.get("dave"), "hash-d")
+
+    def test_last_record_wins(self):
+        with self.path.open("a", encoding="utf-8") as file:
+            file.write("alice:hash-new\n")
+
+        self.assertEqual(self.store.get("alice"), "hash-new")
+
+    def test_replace_and_delete_are_appended(self):
+        self.assertTrue(self.store.replace("alice", "hash-a2"))
+        self.assertFalse(self.store.replace("carol", "hash-c"))
+        self.assertFalse(self.store.replace("alice", "hash-x", expected="hash-a"))
+        self.assertTrue(self.store.delete("bob"))
+        self.assertFalse(self.store.delete("bob"))
+
+        self.assertEqual(self.store.get("alice"), "hash-a2")
+        self.assertNotIn("bob", self.store)
+        self.assertEqual(self.store.usernames(), ["alice"])
+        self.assertEqual(
+            self.path.read_text(encoding="utf-8"),
+            "alice:hash-a\nbob:hash-b\nalice:hash-a2\nbob:!\n",
+        )
+
+        # A deleted username can be taken again
+        self.assertTrue(self.store.add_if_absent("bob", "hash-b2"))
+        self.assertEqual(CredentialStore(self.path).get("bob"), "hash-b2")
+
+    def test_records_split_on_newline_only(self):
+        with self.path.open("a", encoding="utf-8") as file:
+            for sep in ("\r", "\x1c", "\x85", "\u2028", "\u2029"):
+                file.write(f"x{sep}alice:hash-evil\n")
+
+        self.assertEqual(self.store.get("alice"), "hash-a")
+        self.assertEqual(CredentialStore(self.path).get("alice"), "hash-a")
+        self.assertEqual(read_log(self.path)["alice"], "hash-a")
+        self.assertEqual(self.store.get("x\u2028alice"), "hash-evil")
+
+    def test_rejects_records_that_would_split(self):
+        # Each would be read back as a record for alice (or a bad record)
+        for username in ("x\nalice", "x\ralice", "x\u2028alice", " alice", "a:b", ""):
+            with self.subTest(username=username):
+                with self.assertRaises(ValueError):
+                    self.store.add_if_absent(username, "hash-evil")
+                with self.assertRaises(ValueError):
+                    append_records(self.path, [(username, "hash-evil")])
+        with self.assertRaises(ValueError):
+            self.store.replace("alice", "hash\nalice:hash-evil")
+
+        self.assertEqual(
+            self.path.read_text(encoding="utf-8"), "alice:hash-a\nbob:hash-b\n"
+        )
+        self.assertEqual(self.store.get("alice"), "hash-a")
+
+    def test_add_many_indexes_new_records(self):
+        added = self.store.add_many_if_absent(
+            [("erin", "hash-e"), ("alice", "hash-x"), ("erin", "hash-e2")]
+        )
+
+        self.assertEqual(added, ["erin"])
+        self.assertEqual(self.store.get("erin"), "hash-e")
+        self.assertEqual(self.store.get("alice"), "hash-a")
+        self.assertTrue(
+            self.path.read_text(encoding="utf-8").endswith("bob:hash-b\nerin:hash-e\n")
+        )
+
+
+class TestAtomicWrite(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        self.path = self.dir / "data.bin"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_replaces_contents(self):
+        self.path.write_bytes(b"old")
+        atomic_write(self.path, b"new")
+
+        self.assertEqual(self.path.read_bytes(), b"new")
+        self.assertEqual(list(self.dir.iterdir()), [self.path])
+
+    def test_failed_write_keeps_old_contents(self):
+        self.path.write_bytes(b"old")
+        with self.assertRaises(RuntimeError):
+            with atomic_writer(self.path) as file:
+                file.write(b"partial")
+                raise RuntimeError("interrupted")
+
+        self.assertEqual(self.path.read_bytes(), b"old")
+        self.assertEqual(list(self.dir.iterdir()), [self.path])
+
+
+class TestCompaction(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name) / "passwd.txt"
+        self.path.write_text(
+            "zoe:hash-z\nalice:hash-a\nbob:hash-b\nalice:hash-a2\nzoe:!\n",
+            encoding="utf-8",
+        )
+        self.store = CredentialStore(self.path)
+
+    def tearDown(self):
+        self.store._reset()
+        self.tmpdir.cleanup()
+
+    def test_compact_rewrites_sorted(self):
+        self.assertEqual(self.store.compact(), 2)
+
+        self.assertEqual(
+            self.path.read_text(encoding="utf-8"), "alice:hash-a2\nbob:hash-b\n"
+        )
+        self.assertTrue(index_path(self.path).exists())
+        self.assertEqual(self.store.get("alice"), "hash-a2")
+        self.assertIsNone(self.store.get("zoe"))
+
+    def test_lookups_use_memory_mapped_base(self):
+        names = [f"user{i:04d}" for i in range(500)]
+        with self.path.open("a", encoding="utf-8") as file:
+            file.writelines(f"{name}:hash-{name}\n" for name in reversed(names))
+        self.store.compact()
+
+        fresh = CredentialStore(self.path)
+        try:
+            fresh.refresh()
+            self.assertEqual(fresh._records, {})
+            for name in names[::37]:
+                self.assertEqual(fresh.get(name), f"hash-{name}")
+            self.assertIsNone(fresh.get("user9999"))
+            self.assertEqual(len(fresh), 502)
+        finally:
+            fresh._reset()
+
+    def test_appends_after_compaction_override_base(self):
+        self.store.compact()
+        self.store.add_if_absent("carol", "hash-c")
+        self.store.replace("alice", "hash-a3")
+        self.store.delete("bob")
+
+        fresh = CredentialStore(self.path)
+        try:
+            self.assertEqual(fresh.get("carol"), "hash-c")
+            self.assertEqual(fresh.get("alice"), "hash-a3")
+            self.assertIsNone(fresh.get("bob"))
+            self.assertEqual(sorted(fresh.usernames()), ["alice", "carol"])
+        finally:
+            fresh._reset()
+
+    def test_stale_sidecar_is_ignored(self):
+        self.store.compact()
+        self.path.write_text("alice:other\nbob:hash-b\n", encoding="utf-8")
+
+        fresh = CredentialStore(self.path)
+        try:
+            self.assertEqual(fresh.get("alice"), "other")
+            self.assertIsNone(fresh._base)
+        finally:
+            fresh._reset()
+
+
+class TestUserDirectory(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.passwd = Path(self.tmpdir.name) / "passwd.txt"
+        self.roles = Path(self.tmpdir.name) / "roles.txt"
+        self.passwd.write_text("alice:hash-a\nbob:hash-b\n", encoding="utf-8")
+        self.roles.write_text("alice:Client,Teller\nghost:Client\n", encoding="utf-8")
+        self.directory = UserDirectory(self.passwd, self.roles, parse_role_mask)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_joined_lookup(self):
+        self.assertEqual(self.directory.load(), 2)
+
+        encoded_hash, mask = self.directory.lookup("alice")
+        self.assertEqual(encoded_hash, "hash-a")
+        self.assertEqual(roles_from_mask(mask), {Role.CLIENT, Role.TELLER})
+
+        self.assertEqual(self.directory.lookup("bob"), ("hash-b", 0))
+        self.assertIsNone(self.directory.lookup("ghost"))
+
+    def test_appended_roles_are_picked_up(self):
+        self.directory.load()
+        with self.roles.open("a", encoding="utf-8") as file:
+            file.write("bob:Employee\n")
+
+        _, mask = self.directory.lookup("bob")
+        self.assertEqual(roles_from_mask(mask), {Role.EMPLOYEE})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import threading
+
+from src.hash_scheduler import HashScheduler, HasherBusyError
+
+
+class TestHashScheduler(unittest.TestCase):
+    def test_admits_within_budget(self):
+        scheduler = HashScheduler(memory_budget_kib=100)
+        with scheduler.admit(50):
+            with scheduler.admit(50):
+                stats = scheduler.stats()
+                self.assertEqual(stats["memory_in_use_kib"], 100)
+                self.assertEqual(stats["active"], 2)
+        self.assertEqual(scheduler.stats()["memory_in_use_kib"], 0)
+
+    def test_waits_for_budget_then_runs(self):
+        scheduler = HashScheduler(memory_budget_kib=100)
+        entered = threading.Event()
+
+        def worker():
+            with scheduler.admit(80):
+                entered.set()
+
+        with scheduler.admit(80):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            self.assertFalse(entered.wait(0.1))
+            self.assertEqual(scheduler.stats()["queued"], 1)
+
+        thread.join(timeout=5)
+        self.assertTrue(entered.is_set())
+        stats = scheduler.stats()
+        self.assertEqual(stats["admitted"], 2)
+        self.assertEqual(stats["max_queue_depth"], 1)
+        self.assertGreater(stats["max_wait"], 0)
+
+    def test_sheds_load_when_queue_full(self):
+        scheduler = HashScheduler(memory_budget_kib=100, max_queue=0)
+        with scheduler.admit(100):
+            with self.assertRaises(HasherBusyError):
+                with scheduler.admit(10):
+                    pass
+        self.assertEqual(scheduler.stats()["rejected"], 1)
+
+    def test_wait_timeout_sheds_load(self):
+        scheduler = HashScheduler(memory_budget_kib=100, timeout=0.05)
+        with scheduler.admit(100):
+            with self.assertRaises(HasherBusyError):
+                with scheduler.admit(10):
+                    pass
+        self.assertEqual(scheduler.stats()["queued"], 0)
+
+    def test_oversized_operation_runs_alone(self):
+        scheduler = HashScheduler(memory_budget_kib=10)
+        with scheduler.admit(50):
+            self.assertEqual(scheduler.stats()["active"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+from pathlib import Path
+import tempfile
+
+import questionary
+
+import src.Problem1c as problem1c
+import src.Problem2c as problem2c
+import src.Problem3ab as problem3ab
+import src.Problem4ab as problem4ab
+from src.login_throttle import LoginThrottle
+from src.sessions import SessionStore, get_session_store, set_session_store
+
+
+class TestLoginFlow(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        data_dir = Path(self.tmpdir.name)
+
+        self._orig_files = (problem2c.PASSWD_FILE, problem3ab.ROLES_FILE)
+        problem2c.PASSWD_FILE = data_dir / "passwd.txt"
+        problem3ab.ROLES_FILE = data_dir / "roles.txt"
+        problem2c.PASSWD_FILE.touch()
+        problem3ab.ROLES_FILE.touch()
+
+        self._orig_sessions = set_session_store(SessionStore(b"test-secret"))
+        self._orig_throttle = problem2c.throttle
+        problem2c.throttle = LoginThrottle(burst=100, free_failures=2)
+
+        self._orig_text = questionary.text
+        self._orig_password = questionary.password
+
+        problem2c.add_user("alice", "GoodPass1!")
+        problem3ab.store_roles("alice", ["Premium Client", "Teller"])
+
+    def tearDown(self):
+        questionary.text = self._orig_text
+        questionary.password = self._orig_password
+        problem2c.PASSWD_FILE, problem3ab.ROLES_FILE = self._orig_files
+        set_session_store(self._orig_sessions)
+        problem2c.throttle = self._orig_throttle
+        self.tmpdir.cleanup()
+
+    class _DummyPrompt:
+        def __init__(self, value):
+            self._value = value
+
+        def ask(self):
+            return self._value
+
+    def _login(self, username, password, source=None):
+        questionary.text = lambda msg: self._DummyPrompt(username)
+        questionary.password = lambda msg: self._DummyPrompt(password)
+        return problem4ab.login(source)
+
+    def test_login_success_maps_roles(self):
+        user = self._login("alice", "GoodPass1!")
+
+        self.assertIsNotNone(user)
+        self.assertEqual(user.username, "alice")
+        self.assertEqual(
+            user.roles, {problem1c.Role.PREMIUM_CLIENT, problem1c.Role.TELLER}
+        )
+
+    def test_login_starts_session(self):
+        user = self._login("alice", "GoodPass1!")
+
+        session = get_session_store().validate(user.session_token)
+        self.assertEqual(session.username, "alice")
+        self.assertEqual(session.roles, frozenset(user.roles))
+
+    def test_role_change_ends_sessions(self):
+        user = self._login("alice", "GoodPass1!")
+
+        problem3ab.set_roles("alice", ["Client"])
+
+        self.assertIsNone(get_session_store().validate(user.session_token))
+        user = self._login("alice", "GoodPass1!")
+        self.assertEqual(user.roles, {problem1c.Role.CLIENT})
+
+    def test_wrong_password_is_rejected(self):
+        self.assertIsNone(self._login("alice", "WrongPass1!"))
+
+    def test_unknown_user_is_rejected(self):
+        self.assertIsNone(self._login("nobody", "GoodPass1!"))
+
+    def test_username_with_line_break_cannot_take_over_account(self):
+        for username in ("x\nalice", "x\r\nalice", "x\u2028alice"):
+            with self.subTest(username=username):
+                with self.assertRaises(ValueError):
+                    problem3ab.register_user(
+                        username, "Evil1234!", ["Financial Planner"]
+                    )
+                with self.assertRaises(ValueError):
+                    problem2c.add_user(username, "Evil1234!")
+
+        self.assertIsNone(problem4ab.authenticate("alice", "Evil1234!"))
+        user = problem4ab.authenticate("alice", "GoodPass1!")
+        self.assertEqual(
+            user.roles, {problem1c.Role.PREMIUM_CLIENT, problem1c.Role.TELLER}
+        )
+
+    def test_shared_source_is_not_capped_by_successful_logins(self):
+        for username in ("bob", "carol"):
+            problem2c.add_user(username, "GoodPass1!")
+            problem3ab.store_roles(username, ["Client"])
+        problem2c.throttle = LoginThrottle(burst=2, rate=0.001, free_failures=2)
+
+        # Six logins through one source, two per user
+        for username in ("alice", "bob", "carol") * 2:
+            self.assertIsNotNone(self._login(username, "GoodPass1!", source="proxy"))
+
+    def test_throttled_login_skips_hashing(self):
+        for _ in range(3):
+            self.assertIsNone(self._login("alice", "WrongPass1!", source="10.0.0.1"))
+
+        verify = problem2c.verify_password
+        problem2c.verify_password = lambda *args: self.fail("hasher was called")
+        try:
+            self.assertIsNone(self._login("alice", "GoodPass1!"))
+            with self.assertRaises(problem2c.LoginThrottledError):
+                problem2c.verify_login("alice", "GoodPass1!")
+            # The source is locked out too, whichever account it tries
+            self.assertIsNone(self._login("bob", "GoodPass1!", source="10.0.0.1"))
+        finally:
+            problem2c.verify_password = verify
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+
+from src.login_throttle import LoginThrottle, LoginThrottledError
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestLoginThrottle(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def make(self, **kwargs):
+        params = dict(burst=3, rate=1.0, free_failures=100, clock=self.clock)
+        params.update(kwargs)
+        return LoginThrottle(**params)
+
+    def test_bucket_limits_burst_and_refills(self):
+        throttle = self.make()
+        for _ in range(3):
+            throttle.acquire("alice")
+
+        with self.assertRaises(LoginThrottledError) as ctx:
+            throttle.acquire("alice")
+        self.assertAlmostEqual(ctx.exception.retry_after, 1.0)
+
+        throttle.acquire("bob")
+        self.clock.now += 1
+        throttle.acquire("alice")
+
+    def test_rejection_spends_no_tokens(self):
+        throttle = self.make()
+        for _ in range(3):
+            throttle.acquire(("source", "x"))
+
+        # The source is exhausted, so bob's bucket must stay untouched
+        for _ in range(5):
+            with self.assertRaises(LoginThrottledError):
+                throttle.acquire(("user", "bob"), ("source", "x"))
+        for _ in range(3):
+            throttle.acquire(("user", "bob"))
+
+    def test_checked_keys_spend_only_on_failure(self):
+        throttle = self.make()
+        # Successful attempts leave a shared source's bucket alone
+        for i in range(10):
+            throttle.acquire(("user", f"user{i}"), check=[("source", "x")])
+
+        for i in range(3):
+            throttle.record_failure(("source", "x"), charge=[("source", "x")])
+        with self.assertRaises(LoginThrottledError):
+            throttle.acquire(("user", "bob"), check=[("source", "x")])
+        throttle.acquire(("user", "bob"))
+
+    def test_lockout_backs_off_exponentially(self):
+        throttle = self.make(burst=100, free_failures=2, base_lockout=1, max_lockout=5)
+
+        throttle.record_failure("alice")
+        throttle.record_failure("alice")
+        throttle.acquire("alice")
+
+        expected = [1, 2, 4, 5, 5]
+        for lockout in expected:
+            throttle.record_failure("alice")
+            with self.assertRaises(LoginThrottledError) as ctx:
+                throttle.acquire("alice")
+            self.assertAlmostEqual(ctx.exception.retry_after, lockout)
+
+        self.clock.now += 5
+        throttle.acquire("alice")
+        throttle.record_success("alice")
+        throttle.record_failure("alice")
+        throttle.acquire("alice")
+
+    def test_state_is_bounded(self):
+        throttle = self.make(max_keys=10)
+        for i in range(100):
+            throttle.acquire(f"user{i}")
+
+        self.assertEqual(len(throttle), 10)
+
+    def test_reset_clears_lockouts(self):
+        throttle = self.make(free_failures=0)
+        throttle.record_failure("alice")
+        with self.assertRaises(LoginThrottledError):
+            throttle.acquire("alice")
+
+        throttle.reset()
+
+        throttle.acquire("alice")
+        self.assertEqual(len(throttle), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import io
+import json
+import tempfile
+import unittest
+import unittest.mock
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import src.main as main
+import src.Problem2c as problem2c
+import src.Problem3ab as problem3ab
+import src.sessions as sessions
+from src.sessions import SessionStore, set_session_store
+
+
+class TestScriptedCLI(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        data_dir = Path(self.tmpdir.name)
+
+        self._orig = (
+            problem2c.PASSWD_FILE,
+            problem3ab.ROLES_FILE,
+            problem3ab.WEAK_PASSWD_FILE,
+            problem2c.ph,
+            sessions.SESSION_SNAPSHOT_FILE,
+            main.read_password,
+        )
+        problem2c.PASSWD_FILE = data_dir / "passwd.txt"
+        problem3ab.ROLES_FILE = data_dir / "roles.txt"
+        problem3ab.WEAK_PASSWD_FILE = data_dir / "weak_passwords.txt"
+        for path in (
+            problem2c.PASSWD_FILE,
+            problem3ab.ROLES_FILE,
+            problem3ab.WEAK_PASSWD_FILE,
+        ):
+            path.touch()
+        problem2c.configure_hasher(time_cost=1, memory_cost=8192, parallelism=1)
+        problem2c.throttle.reset()
+        sessions.SESSION_SNAPSHOT_FILE = data_dir / "sessions.json"
+        self._orig_sessions = set_session_store(SessionStore(b"test-secret"))
+
+    def tearDown(self):
+        set_session_store(self._orig_sessions)
+        (
+            problem2c.PASSWD_FILE,
+            problem3ab.ROLES_FILE,
+            problem3ab.WEAK_PASSWD_FILE,
+            problem2c.ph,
+            sessions.SESSION_SNAPSHOT_FILE,
+            main.read_password,
+        ) = self._orig
+        self.tmpdir.cleanup()
+
+    def run_main(self, *argv, password=None):
+        main.read_password = lambda prompt="": password
+        out = io.StringIO()
+        with redirect_stdout(out):
+            status = main.main(list(argv))
+        return status, json.loads(out.getvalue())
+
+    def test_signup_login_check_across_processes(self):
+        status, signup = self.run_main(
+            "signup", "alice", "--roles", "Client", password="GoodPass1!"
+        )
+        self.assertEqual(status, 0, signup)
+
+        status, login = self.run_main("login", "alice", password="GoodPass1!")
+        self.assertEqual(status, 0, login)
+
+        # A new process starts with an empty store and loads the snapshot
+        set_session_store(None)
+        with unittest.mock.patch.object(
+            sessions, "load_secret", return_value=b"test-secret"
+        ):
+            status, allowed = self.run_main(
+                "check", login["token"], "VIEW_SELF_ACCOUNT_BALANCE"
+            )
+        self.assertEqual((status, allowed["allowed"]), (0, True))
+
+        status, denied = self.run_main(
+            "check", login["token"], "VIEW_MONEY_MARKET_INSTRUMENTS"
+        )
+        self.assertEqual((status, denied["allowed"]), (1, False))
+
+        status, failed = self.run_main("login", "alice", password="WrongPass1!")
+        self.assertEqual(status, 1)
+        self.assertFalse(failed["ok"])
+
+    def test_sessions_are_kept_next_to_the_user_files(self):
+        data_dir = problem2c.PASSWD_FILE.parent
+        sessions.SESSION_SNAPSHOT_FILE = None
+
+        status, signup = self.run_main(
+            "signup", "carol", "--roles", "Client", password="GoodPass1!"
+        )
+
+        self.assertEqual(status, 0, signup)
+        self.assertEqual(sessions.SESSION_SNAPSHOT_FILE, data_dir / "sessions.json")
+        self.assertTrue(sessions.SESSION_SNAPSHOT_FILE.exists())
+
+    def test_snapshot_directory_is_created(self):
+        snapshot = problem2c.PASSWD_FILE.parent / "state" / "sessions.json"
+        sessions.SESSION_SNAPSHOT_FILE = snapshot
+
+        status, signup = self.run_main(
+            "signup", "dave", "--roles", "Client", password="GoodPass1!"
+        )
+
+        self.assertEqual(status, 0, signup)
+        self.assertTrue(snapshot.exists())
+
+    def test_batch_streams_results_in_order(self):
+        requests = [
+            {
+                "id": 1,
+                "op": "signup",
+                "username": "bob",
+                "password": "GoodPass1!",
+                "roles": ["Teller"],
+            },
+            {"id": 2, "op": "login", "username": "bob", "password": "GoodPass1!"},
+            {"id": 3, "op": "list-operations"},
+        ]
+        stream = io.StringIO(
+            "\n".join(json.dumps(r) for r in requests) + "\n\nnot json\n"
+        )
+        out = io.StringIO()
+
+        failures = main.run_batch(stream, out)
+
+        responses = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([r.get("id") for r in responses], [1, 2, 3, None])
+        self.assertEqual([r["ok"] for r in responses], [True, True, True, False])
+        self.assertEqual(responses[1]["roles"], ["Teller"])
+        self.assertEqual(failures, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import src.commands as commands
+import src.metrics as metrics
+import src.Problem2c as problem2c
+import src.Problem1c as problem1c
+import src.Problem3ab as problem3ab
+import src.Problem4ab as problem4ab
+from src.metrics import Histogram
+from src.Problem1c import Operations, Role, canPerformOperation
+from src.sessions import SessionStore, set_session_store
+
+
+class TestHistogram(unittest.TestCase):
+    def test_buckets_are_cumulative_with_inf(self):
+        hist = Histogram("h", buckets=(0.001, 0.01))
+        for elapsed_ns in (500_000, 1_000_000, 5_000_000, 2_000_000_000):
+            hist.observe_ns(elapsed_ns)
+        hist.observe_ns(100, error=True)
+
+        self.assertEqual(hist.cumulative(), [("0.001", 3), ("0.01", 4), ("+Inf", 5)])
+        snap = hist.snapshot()
+        self.assertEqual((snap["count"], snap["errors"]), (5, 1))
+        self.assertAlmostEqual(snap["sum_seconds"], 2.0065001)
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        data_dir = Path(self.tmpdir.name)
+        self._orig = (
+            problem2c.PASSWD_FILE,
+            problem3ab.ROLES_FILE,
+            problem3ab.WEAK_PASSWD_FILE,
+            problem2c.ph,
+        )
+        problem2c.PASSWD_FILE = data_dir / "passwd.txt"
+        problem3ab.ROLES_FILE = data_dir / "roles.txt"
+        problem3ab.WEAK_PASSWD_FILE = data_dir / "weak_passwords.txt"
+        problem2c.configure_hasher(time_cost=1, memory_cost=8192, parallelism=1)
+        problem2c.throttle.reset()
+        self._was_enabled = metrics.enable(False)
+        metrics.reset()
+
+    def tearDown(self):
+        metrics.enable(self._was_enabled)
+        metrics.reset()
+        (
+            problem2c.PASSWD_FILE,
+            problem3ab.ROLES_FILE,
+            problem3ab.WEAK_PASSWD_FILE,
+            problem2c.ph,
+        ) = self._orig
+        self.tmpdir.cleanup()
+
+    def count(self, stage):
+        return metrics.snapshot()["stages"][stage]["count"]
+
+    def test_nothing_is_recorded_while_disabled(self):
+        problem3ab.validate_password("alice", "GoodPass1!")
+        canPerformOperation({Role.CLIENT}, Operations.VIEW_SELF_ACCOUNT_BALANCE)
+
+        self.assertEqual(self.count("validate_password"), 0)
+        self.assertEqual(self.count("canPerformOperation"), 0)
+
+    def test_login_stages_are_recorded(self):
+        metrics.enable()
+        problem2c.add_user("alice", "GoodPass1!")
+        self.assertTrue(problem2c.verify_login("alice", "GoodPass1!"))
+        with self.assertRaises(ValueError):
+            problem3ab.validate_password("alice", "short")
+
+        stages = metrics.snapshot()["stages"]
+        for stage in ("add_user", "argon2_hash", "verify_login", "argon2_verify"):
+            self.assertEqual(stages[stage]["count"], 1, stage)
+        self.assertEqual(stages["passwd_lookup"]["count"], 1)
+        self.assertEqual(stages["validate_password"]["errors"], 1)
+        self.assertGreater(stages["argon2_verify"]["sum_seconds"], 0)
+
+    def test_service_login_and_authorize_are_recorded(self):
+        metrics.enable()
+        problem2c.add_user("alice", "GoodPass1!")
+        problem3ab.store_roles("alice", ["Client"])
+        previous = set_session_store(SessionStore(b"test-secret"))
+        try:
+            self.assertIsNone(problem4ab.authenticate("alice", "WrongPass1!"))
+            user = problem4ab.authenticate("alice", "GoodPass1!")
+        finally:
+            set_session_store(previous)
+        problem1c.operation_denial(user.roles, Operations.VIEW_SELF_ACCOUNT_BALANCE)
+
+        stages = metrics.snapshot()["stages"]
+        self.assertEqual(stages["authenticate"]["count"], 2)
+        self.assertEqual(stages["user_lookup"]["count"], 2)
+        # Roles are only mapped after a correct password
+        self.assertEqual(stages["role_mapping"]["count"], 1)
+        self.assertEqual(stages["operation_denial"]["count"], 1)
+
+    def test_prometheus_export(self):
+        metrics.enable()
+        canPerformOperation({Role.CLIENT}, Operations.VIEW_SELF_ACCOUNT_BALANCE)
+
+        response = commands.handle({"op": "metrics", "format": "prometheus"})
+        text = response["metrics"]
+
+        self.assertIn("# TYPE justinvest_stage_duration_seconds histogram", text)
+        self.assertIn(
+            'justinvest_stage_duration_seconds_count{stage="canPerformOperation"} 1',
+            text,
+        )
+        self.assertIn(
+            'justinvest_stage_duration_seconds_bucket{stage="canPerformOperation",'
+            'le="+Inf"} 1',
+            text,
+        )
+        self.assertIn('justinvest_stage_errors_total{stage="verify_login"} 0', text)
+
+    def test_dump_snapshot(self):
+        metrics.enable()
+        problem3ab.load_weak_passwords()
+        path = Path(self.tmpdir.name) / "metrics.json"
+
+        metrics.dump_snapshot(path)
+
+        snap = json.loads(path.read_text(encoding="utf-8"))
+        self.assertTrue(snap["enabled"])
+        self.assertEqual(snap["stages"]["load_weak_passwords"]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import json
+import tempfile
+import unittest
+import unittest.mock
+from pathlib import Path
+
+import src.policy_file as policy_file
+import src.Problem1c as problem1c
+from src.Problem1c import Operations, Role, getAuthorizedOperations
+
+POLICY_FILE = Path(__file__).resolve().parents[1] / "data" / "policy.toml"
+
+
+class TestPolicyFile(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        self._orig = (
+            problem1c.BASE_PERMS,
+            problem1c.ROLE_PARENT,
+            problem1c.ROLE_AVAILABILITY,
+        )
+
+    def tearDown(self):
+        problem1c.install_policy(*self._orig)
+        self.tmpdir.cleanup()
+
+    def write(self, name, text):
+        path = self.dir / name
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    def test_shipped_policy_matches_built_in_tables(self):
+        built_in = problem1c.compile_policy(*self._orig)
+        _, policy = policy_file.load_policy(POLICY_FILE, self.dir / "policy.bin")
+
+        for role in Role:
+            self.assertEqual(
+                policy.operations_in(policy.role_masks[role]),
+                built_in.operations_in(built_in.role_masks[role]),
+                role,
+            )
+        self.assertEqual(policy.availability, built_in.availability)
+
+    def test_unchanged_file_is_loaded_from_snapshot(self):
+        path = self.write(
+            "policy.json",
+            json.dumps(
+                {
+                    "roles": {
+                        "Client": {"permissions": ["View own account balance"]},
+                        "PREMIUM_CLIENT": {"inherits": ["Client"]},
+                    }
+                }
+            ),
+        )
+        tables, first = policy_file.load_policy(path)
+        self.assertTrue(policy_file.snapshot_path(path).exists())
+
+        with unittest.mock.patch.object(
+            policy_file, "read_policy_file", side_effect=AssertionError
+        ):
+            cached_tables, cached = policy_file.load_policy(path)
+
+        self.assertEqual(cached_tables.base_perms, tables.base_perms)
+        self.assertEqual(cached_tables.role_parent, tables.role_parent)
+        self.assertEqual(
+            cached.operations_in(cached.role_masks[Role.PREMIUM_CLIENT]),
+            {Operations.VIEW_SELF_ACCOUNT_BALANCE},
+        )
+        self.assertEqual(cached.availability, first.availability)
+
+    def test_edited_file_rebuilds_snapshot(self):
+        path = self.write(
+            "policy.toml",
+            '[roles.Client]\npermissions = ["View own account balance"]\n',
+        )
+        policy_file.load_policy(path)
+        self.write(
+            "policy.toml",
+            '[roles.Client]\npermissions = ["View own investment portfolio"]\n',
+        )
+
+        _, policy = policy_file.load_policy(path)
+        self.assertEqual(
+            policy.operations_in(policy.role_masks[Role.CLIENT]),
+            {Operations.VIEW_SELF_INVESTMENT_PORTFOLIO},
+        )
+
+    def test_invalid_policies_are_rejected(self):
+        cases = {
+            "unknown role": "[roles.Janitor]\npermissions = []\n",
+            "unknown operation": '[roles.Client]\npermissions = ["Fly"]\n',
+            "unknown weekday": '[roles.Teller]\navailability = { xyz = ["09:00", "17:00"] }\n',
+            "bad time": '[roles.Teller]\navailability = ["9am", "17:00"]\n',
+            "unknown key": "[roles.Client]\npermission = []\n",
+            "cycle": '[roles.Client]\ninherits = ["Premium Client"]\n'
+            '[roles."Premium Client"]\ninherits = ["Client"]\n',
+        }
+        for name, text in cases.items():
+            with self.subTest(name):
+                path = self.write("bad.toml", text)
+                with self.assertRaises(ValueError):
+                    policy_file.load_policy(path)
+
+    def test_new_operations_are_rejected_with_a_hint(self):
+        path = self.write("new.toml", '[roles.Client]\npermissions = ["Fly"]\n')
+
+        with self.assertRaisesRegex(ValueError, "cannot add new operations"):
+            policy_file.load_policy(path)
+
+    def test_apply_swaps_the_running_policy(self):
+        self.assertNotIn(
+            Operations.VIEW_MONEY_MARKET_INSTRUMENTS,
+            getAuthorizedOperations({Role.CLIENT}),
+        )
+        path = self.write(
+            "policy.toml",
+            '[roles.Client]\npermissions = ["View money market instruments"]\n'
+            '[roles.Teller]\navailability = { sat = ["10:00", "12:00"] }\n',
+        )
+
+        policy_file.apply_policy_file(path)
+
+        self.assertEqual(
+            getAuthorizedOperations({Role.CLIENT}),
+            {Operations.VIEW_MONEY_MARKET_INSTRUMENTS},
+        )
+        self.assertEqual(getAuthorizedOperations({Role.EMPLOYEE}), set())
+        policy = problem1c.get_compiled_policy()
+        saturday = problem1c.minute_of_week(problem1c.datetime.datetime(2024, 1, 6, 11))
+        monday = problem1c.minute_of_week(problem1c.datetime.datetime(2024, 1, 8, 11))
+        self.assertTrue(policy.availability[Role.TELLER] >> saturday & 1)
+        self.assertFalse(policy.availability[Role.TELLER] >> monday & 1)
+
+    def test_failed_apply_keeps_current_policy(self):
+        before = problem1c.get_compiled_policy()
+        path = self.write("policy.toml", "[roles.Nobody]\n")
+
+        with self.assertRaises(ValueError):
+            policy_file.apply_policy_file(path)
+        self.assertIs(problem1c.get_compiled_policy(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
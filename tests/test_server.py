@@ -0,0 +1,199 @@
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import src.Problem2c as problem2c
+import src.Problem3ab as problem3ab
+from src.login_throttle import LoginThrottle
+from src.server import AuthServer, peer_source, request_source
+from src.sessions import SessionStore, set_session_store
+
+
+class TestAuthServer(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        data_dir = Path(self.tmpdir.name)
+
+        self._orig = (
+            problem2c.PASSWD_FILE,
+            problem3ab.ROLES_FILE,
+            problem3ab.WEAK_PASSWD_FILE,
+            problem2c.ph,
+            problem2c.throttle,
+        )
+        problem2c.PASSWD_FILE = data_dir / "passwd.txt"
+        problem3ab.ROLES_FILE = data_dir / "roles.txt"
+        problem3ab.WEAK_PASSWD_FILE = data_dir / "weak_passwords.txt"
+        for path in (problem2c.PASSWD_FILE, problem3ab.ROLES_FILE):
+            path.touch()
+        problem3ab.WEAK_PASSWD_FILE.write_text("Password1!\n", encoding="utf-8")
+        problem2c.configure_hasher(time_cost=1, memory_cost=8192, parallelism=1)
+        problem2c.throttle = LoginThrottle(burst=100, free_failures=1)
+        self._orig_sessions = set_session_store(SessionStore(b"test-secret"))
+
+        self.server = AuthServer(max_workers=2)
+
+    def tearDown(self):
+        self.server.close()
+        set_session_store(self._orig_sessions)
+        (
+            problem2c.PASSWD_FILE,
+            problem3ab.ROLES_FILE,
+            problem3ab.WEAK_PASSWD_FILE,
+            problem2c.ph,
+            problem2c.throttle,
+        ) = self._orig
+        self.tmpdir.cleanup()
+
+    async def asyncSetUp(self):
+        self.listener = await self.server.start_tcp("127.0.0.1", 0)
+        port = self.listener.sockets[0].getsockname()[1]
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", port)
+
+    async def asyncTearDown(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.listener.close()
+        await self.listener.wait_closed()
+        await self.server.wait_connections()
+
+    async def exchange(self, *requests):
+        # Send everything first, then read: exercises pipelining
+        for request in requests:
+            line = request if isinstance(request, bytes) else json.dumps(request)
+            self.writer.write(
+                (line if isinstance(line, bytes) else line.encode()) + b"\n"
+            )
+        await self.writer.drain()
+        return [json.loads(await self.reader.readline()) for _ in requests]
+
+    async def test_signup_login_authorize(self):
+        signup, login = await self.exchange(
+            {
+                "id": 1,
+                "op": "signup",
+                "username": "alice",
+                "password": "GoodPass1!",
+                "roles": ["Client"],
+            },
+            {"id": 2, "op": "login", "username": "alice", "password": "GoodPass1!"},
+        )
+        self.assertTrue(signup["ok"], signup)
+        self.assertEqual(signup["roles"], ["Client"])
+        self.assertTrue(login["ok"], login)
+
+        token = login["token"]
+        allowed, denied, listed = await self.exchange(
+            {
+                "id": 3,
+                "op": "authorize",
+                "token": token,
+                "operation": "VIEW_SELF_ACCOUNT_BALANCE",
+            },
+            {
+                "id": 4,
+                "op": "authorize",
+                "token": token,
+                "operation": "View money market instruments",
+            },
+            {"id": 5, "op": "list-operations", "token": token},
+        )
+        self.assertEqual((allowed["id"], allowed["allowed"]), (3, True))
+        self.assertEqual((denied["id"], denied["allowed"]), (4, False))
+        self.assertIn("reason", denied)
+        self.assertEqual(len(listed["operations"]), 3)
+
+    async def test_errors_are_reported_in_order(self):
+        responses = await self.exchange(
+            b"not json",
+            {"id": "a", "op": "login", "username": "nobody", "password": "x"},
+            {
+                "id": "b",
+                "op": "signup",
+                "username": "bob",
+                "password": "Password1!",
+                "roles": ["Client"],
+            },
+            {"id": "c", "op": "authorize", "token": "bad", "operation": "x"},
+            {"id": "d", "op": "frobnicate"},
+            {"id": "e", "op": "list-operations"},
+        )
+
+        self.assertEqual(
+            [r.get("id") for r in responses], [None, "a", "b", "c", "d", "e"]
+        )
+        self.assertEqual([r["ok"] for r in responses], [False] * 5 + [True])
+        self.assertIn("too common", responses[2]["error"])
+
+    async def test_login_is_throttled_by_source(self):
+        await self.exchange(
+            {
+                "op": "signup",
+                "username": "carol",
+                "password": "GoodPass1!",
+                "roles": ["Client"],
+            }
+        )
+        # A local proxy names its client; loopback itself is not a source
+        client = "203.0.113.7"
+        first, second = await self.exchange(
+            {
+                "op": "login",
+                "username": "carol",
+                "password": "WrongPass1!",
+                "client": client,
+            },
+            {
+                "op": "login",
+                "username": "dave",
+                "password": "GoodPass1!",
+                "client": client,
+            },
+        )
+        # Both attempts may run concurrently; once one failure is recorded,
+        # the source is locked out
+        third = (
+            await self.exchange(
+                {"op": "login", "username": "dave", "password": "x", "client": client}
+            )
+        )[0]
+        self.assertFalse(first["ok"])
+        self.assertFalse(second["ok"])
+        self.assertIn("retry_after", third)
+
+    async def test_loopback_callers_do_not_share_a_source(self):
+        for username in ("carol", "dave"):
+            await self.exchange(
+                {
+                    "op": "signup",
+                    "username": username,
+                    "password": "GoodPass1!",
+                    "roles": ["Client"],
+                }
+            )
+        for _ in range(2):
+            await self.exchange(
+                {"op": "login", "username": "carol", "password": "WrongPass1!"}
+            )
+
+        response = (
+            await self.exchange(
+                {"op": "login", "username": "dave", "password": "GoodPass1!"}
+            )
+        )[0]
+        self.assertTrue(response["ok"])
+
+    def test_peer_source(self):
+        self.assertIsNone(peer_source(("127.0.0.1", 5000)))
+        self.assertIsNone(peer_source(("::1", 5000, 0, 0)))
+        self.assertIsNone(peer_source(""))
+        self.assertEqual(peer_source(("192.0.2.1", 5000)), "192.0.2.1")
+        self.assertEqual(request_source({"client": "x"}, "192.0.2.1"), "192.0.2.1")
+        self.assertEqual(request_source({"client": "x"}, None), "client:x")
+        self.assertIsNone(request_source({}, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
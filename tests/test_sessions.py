@@ -0,0 +1,97 @@
+import unittest
+from pathlib import Path
+import tempfile
+
+from src.Problem1c import Operations, Role
+from src.sessions import SessionStore
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.store = SessionStore(b"secret", ttl=60, max_sessions=3, clock=self.clock)
+
+    def test_issue_and_validate(self):
+        token = self.store.issue("alice", {Role.CLIENT})
+
+        session = self.store.validate(token)
+        self.assertEqual(session.username, "alice")
+        self.assertEqual(session.roles, frozenset({Role.CLIENT}))
+        self.assertTrue(
+            self.store.authorize(token, Operations.VIEW_SELF_ACCOUNT_BALANCE)
+        )
+        self.assertFalse(
+            self.store.authorize(token, Operations.VIEW_MONEY_MARKET_INSTRUMENTS)
+        )
+
+    def test_forged_tokens_are_rejected(self):
+        token = self.store.issue("alice", {Role.CLIENT})
+        session_id, expiry, signature = token.split(".")
+
+        self.assertIsNone(self.store.validate(f"{session_id}.{expiry}.{'A' * 43}"))
+        self.assertIsNone(self.store.validate(f"{session_id}.9999999999.{signature}"))
+        self.assertIsNone(self.store.validate("garbage"))
+        self.assertIsNone(self.store.validate(f"{session_id}.{expiry}.{'é' * 43}"))
+        self.assertIsNone(self.store.validate(f"sé.{expiry}.{signature}"))
+        self.assertIsNone(self.store.validate(None))
+
+        other = SessionStore(b"other-secret", clock=self.clock)
+        self.assertIsNone(other.validate(token))
+
+    def test_sessions_expire(self):
+        token = self.store.issue("alice", {Role.CLIENT})
+
+        self.clock.now += 59
+        self.assertIsNotNone(self.store.validate(token))
+        self.clock.now += 1
+        self.assertIsNone(self.store.validate(token))
+        self.assertEqual(len(self.store), 0)
+
+    def test_least_recently_used_is_evicted(self):
+        tokens = [self.store.issue(f"user{i}", {Role.CLIENT}) for i in range(3)]
+        self.store.validate(tokens[0])
+
+        self.store.issue("user3", {Role.CLIENT})
+
+        self.assertIsNotNone(self.store.validate(tokens[0]))
+        self.assertIsNone(self.store.validate(tokens[1]))
+        self.assertEqual(len(self.store), 3)
+
+    def test_revoke(self):
+        token = self.store.issue("alice", {Role.CLIENT})
+        other = self.store.issue("alice", {Role.CLIENT})
+        self.store.issue("bob", {Role.TELLER})
+
+        self.assertTrue(self.store.revoke(token))
+        self.assertIsNone(self.store.validate(token))
+        self.assertEqual(self.store.revoke_user("alice"), 1)
+        self.assertIsNone(self.store.validate(other))
+        self.assertEqual(len(self.store), 1)
+
+    def test_snapshot_round_trip(self):
+        token = self.store.issue("alice", {Role.CLIENT, Role.TELLER})
+        expiring = self.store.issue("bob", {Role.CLIENT})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "sessions.json"
+            self.assertEqual(self.store.save(path), 2)
+
+            self.clock.now += 30
+            restored = SessionStore(b"secret", ttl=60, clock=self.clock)
+            self.assertEqual(restored.load(path), 2)
+
+        session = restored.validate(token)
+        self.assertEqual(session.roles, frozenset({Role.CLIENT, Role.TELLER}))
+        self.clock.now += 30
+        self.assertIsNone(restored.validate(expiring))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+import os
+import unittest
+from pathlib import Path
+import tempfile
+import threading
+
+import src.Problem2c as problem2c
+import src.Problem4ab as problem4ab
+from src.storage import FlatFileBackend, SQLiteBackend, migrate, set_backend
+
+
+class TestSQLiteBackend(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        self.backend = SQLiteBackend(self.dir / "users.db")
+
+    def tearDown(self):
+        self.backend.close()
+        self.tmpdir.cleanup()
+
+    def test_users_and_roles(self):
+        self.assertTrue(self.backend.add_user("alice", "hash-a"))
+        self.assertFalse(self.backend.add_user("alice", "hash-other"))
+        self.assertEqual(self.backend.get_hash("alice"), "hash-a")
+        self.assertTrue(self.backend.has_user("alice"))
+        self.assertFalse(self.backend.has_user("bob"))
+
+        self.assertTrue(self.backend.replace_hash("alice", "hash-new"))
+        self.assertEqual(self.backend.get_hash("alice"), "hash-new")
+        self.assertFalse(self.backend.replace_hash("bob", "hash-b"))
+        self.assertFalse(
+            self.backend.replace_hash("alice", "hash-x", expected="hash-a")
+        )
+        self.assertTrue(
+            self.backend.replace_hash("alice", "hash-x", expected="hash-new")
+        )
+        self.assertEqual(self.backend.get_hash("alice"), "hash-x")
+
+        self.assertEqual(
+            self.backend.add_users([("alice", "hash-y"), ("bob", "hash-b")]), ["bob"]
+        )
+        self.assertEqual(self.backend.get_hash("alice"), "hash-x")
+        self.backend.delete_user("bob")
+
+        self.backend.store_roles("alice", ["Premium Client", "Client"])
+        self.assertEqual(self.backend.get_roles("alice"), ["Premium Client", "Client"])
+        self.assertEqual(self.backend.get_roles("bob"), [])
+
+        self.assertTrue(self.backend.delete_user("alice"))
+        self.assertFalse(self.backend.delete_user("alice"))
+        self.assertIsNone(self.backend.get_hash("alice"))
+        self.assertEqual(self.backend.get_roles("alice"), [])
+
+    def test_bloom_filter_answers_misses(self):
+        self.backend.add_user("alice", "hash-a")
+        bloomed = SQLiteBackend(self.dir / "users.db", bloom_capacity=1000)
+        try:
+            self.assertTrue(bloomed.has_user("alice"))
+            self.assertFalse(bloomed.has_user("bob"))
+            self.assertTrue(bloomed.add_user("bob", "hash-b"))
+            self.assertTrue(bloomed.has_user("bob"))
+            self.assertFalse(bloomed.add_user("bob", "hash-b2"))
+        finally:
+            bloomed.close()
+
+    def test_uses_wal_mode(self):
+        mode = self.backend._connect().execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_close_after_use_from_another_thread(self):
+        self.backend.add_user("alice", "hash-a")
+        found = []
+        worker = threading.Thread(
+            target=lambda: found.append(self.backend.get_hash("alice"))
+        )
+        worker.start()
+        worker.join()
+
+        self.backend.close()
+        self.assertEqual(found, ["hash-a"])
+
+    def test_migrate_flat_files(self):
+        passwd = self.dir / "passwd.txt"
+        roles = self.dir / "roles.txt"
+        passwd.write_text(
+            "alice:hash-a\nbob:hash-b\nalice:hash-dup\n", encoding="utf-8"
+        )
+        roles.write_text("alice:Client\nbob:Employee,Teller\n", encoding="utf-8")
+
+        self.assertEqual(migrate(passwd, roles, self.backend), (2, 2))
+
+        flat = FlatFileBackend(passwd, roles)
+        for username in ["alice", "bob"]:
+            self.assertEqual(self.backend.get_hash(username), flat.get_hash(username))
+            self.assertEqual(self.backend.get_roles(username), flat.get_roles(username))
+
+    def test_migrate_counts_only_added_users(self):
+        passwd = self.dir / "passwd.txt"
+        roles = self.dir / "roles.txt"
+        passwd.write_text("alice:hash-a\nbob:hash-b\nalice:hash-a2\n", encoding="utf-8")
+        roles.touch()
+        self.backend.add_user("alice", "hash-old")
+
+        self.assertEqual(migrate(passwd, roles, self.backend, batch_size=1), (1, 0))
+        self.assertEqual(self.backend.get_hash("alice"), "hash-old")
+        self.assertEqual(self.backend.get_hash("bob"), "hash-b")
+
+    def test_migrate_replays_log(self):
+        passwd = self.dir / "passwd.txt"
+        roles = self.dir / "roles.txt"
+        passwd.write_text(
+            "alice:hash-a\nbob:hash-b\nalice:hash-a2\nbob:!\n", encoding="utf-8"
+        )
+        roles.write_text("alice:Client\nalice:Teller\nbob:!\n", encoding="utf-8")
+
+        self.assertEqual(migrate(passwd, roles, self.backend), (1, 1))
+        self.assertEqual(self.backend.get_hash("alice"), "hash-a2")
+        self.assertEqual(self.backend.get_roles("alice"), ["Teller"])
+        self.assertFalse(self.backend.has_user("bob"))
+
+    def test_login_through_selected_backend(self):
+        previous = set_backend(self.backend)
+        try:
+            self.assertTrue(problem2c.add_user("carol", "secret123"))
+            self.assertTrue(problem2c.verify_login("carol", "secret123"))
+            self.assertFalse(problem2c.verify_login("carol", "wrongpass"))
+
+            self.backend.store_roles("carol", ["Client"])
+            self.assertEqual(problem4ab.getUserRole("carol"), ["Client"])
+        finally:
+            set_backend(previous)
+
+
+class TestFlatFileBackend(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        self.passwd = self.dir / "passwd.txt"
+        self.roles = self.dir / "roles.txt"
+        self.passwd.write_text("alice:hash-a\nbob:hash-b\n", encoding="utf-8")
+        self.roles.write_text("alice:Client\nbob:Teller\n", encoding="utf-8")
+        self.backend = FlatFileBackend(self.passwd, self.roles)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_directory_is_shared_per_file_pair(self):
+        directory = self.backend.directory()
+
+        self.assertIs(FlatFileBackend(self.passwd, self.roles).directory(), directory)
+        self.assertIs(self.backend.credential_store(), directory.credentials)
+        self.assertIsNot(
+            FlatFileBackend(self.passwd, self.dir / "other.txt").directory(),
+            directory,
+        )
+
+    def test_directory_is_keyed_by_resolved_paths(self):
+        directory = self.backend.directory()
+        relative = FlatFileBackend(Path("passwd.txt"), Path("roles.txt"))
+        cwd = os.getcwd()
+        try:
+            os.chdir(self.dir)
+            self.assertIs(relative.directory(), directory)
+            os.chdir(self.dir.parent)
+            self.assertIsNot(relative.directory(), directory)
+        finally:
+            os.chdir(cwd)
+
+    def test_add_users_skips_taken_usernames(self):
+        added = self.backend.add_users(
+            [("alice", "hash-x"), ("carol", "hash-c"), ("carol", "hash-c2")]
+        )
+
+        self.assertEqual(added, ["carol"])
+        self.assertEqual(self.backend.get_hash("alice"), "hash-a")
+        self.assertEqual(self.backend.get_hash("carol"), "hash-c")
+
+    def test_set_roles_and_delete_are_logged(self):
+        self.backend.store_roles("alice", ["Employee", "Client"])
+        self.assertEqual(self.backend.get_roles("alice"), ["Client", "Employee"])
+
+        self.assertTrue(self.backend.delete_user("bob"))
+        self.assertFalse(self.backend.delete_user("bob"))
+        self.assertIsNone(self.backend.get_user("bob"))
+        self.assertEqual(self.backend.get_roles("bob"), [])
+        self.assertTrue(self.roles.read_text(encoding="utf-8").endswith("bob:!\n"))
+
+    def test_compact(self):
+        self.backend.replace_hash("alice", "hash-a2")
+        self.backend.store_roles("alice", ["Teller"])
+        self.backend.delete_user("bob")
+
+        self.assertEqual(self.backend.compact(), (1, 1))
+        self.assertEqual(self.passwd.read_text(encoding="utf-8"), "alice:hash-a2\n")
+        self.assertEqual(self.roles.read_text(encoding="utf-8"), "alice:Teller\n")
+        self.assertEqual(self.backend.get_user("alice")[0], "hash-a2")
+        self.assertEqual(self.backend.get_roles("alice"), ["Teller"])
+
+
+if __name__ == "__main__":
+    unittest.main()
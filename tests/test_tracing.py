@@ -0,0 +1,201 @@
+import json
+import pstats
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import questionary
+
+import src.Problem2c as problem2c
+import src.Problem3ab as problem3ab
+import src.Problem4ab as problem4ab
+import src.profiling as profiling
+import src.tracing as tracing
+from src.sessions import SessionStore, set_session_store
+from src.tracing import JsonlSink, RingBufferSink
+
+
+class _Prompt:
+    def __init__(self, value):
+        self.value = value
+
+    def ask(self):
+        return self.value
+
+
+class TestSpans(unittest.TestCase):
+    def setUp(self):
+        self.sink = RingBufferSink()
+        self._orig_sink = tracing.set_sink(self.sink)
+
+    def tearDown(self):
+        tracing.set_sink(self._orig_sink)
+
+    def test_nested_spans_share_a_trace(self):
+        with tracing.span("outer", op="x") as outer:
+            with tracing.span("inner") as inner:
+                inner.set(rows=3)
+        with tracing.span("other"):
+            pass
+
+        inner_span, outer_span, other = self.sink.spans()
+        self.assertEqual([s.name for s in (inner_span, outer_span)], ["inner", "outer"])
+        self.assertEqual(inner_span.parent_id, outer.span_id)
+        self.assertIsNone(outer_span.parent_id)
+        self.assertEqual(inner_span.trace_id, outer_span.trace_id)
+        self.assertNotEqual(other.trace_id, outer_span.trace_id)
+        self.assertEqual(inner_span.attrs, {"rows": 3})
+        self.assertGreaterEqual(outer_span.duration_ns, inner_span.duration_ns)
+        self.assertIsNone(tracing.current_span())
+
+    def test_errors_are_recorded(self):
+        with self.assertRaises(KeyError):
+            with tracing.span("failing"):
+                raise KeyError("x")
+        self.assertEqual(self.sink.spans()[0].error, "KeyError")
+
+    def test_no_sink_means_no_spans(self):
+        tracing.set_sink(None)
+        with tracing.span("ignored") as span:
+            span.set(a=1)
+        self.assertEqual(self.sink.spans(), [])
+
+    def test_jsonl_sink(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "trace.jsonl"
+            sink = JsonlSink(path)
+            tracing.set_sink(sink)
+            with tracing.span("outer"):
+                with tracing.span("inner", user="alice"):
+                    pass
+            sink.close()
+
+            records = [json.loads(line) for line in path.read_text().splitlines()]
+        self.assertEqual([r["name"] for r in records], ["inner", "outer"])
+        self.assertEqual(records[0]["parent"], records[1]["span"])
+        self.assertEqual(records[0]["attrs"], {"user": "alice"})
+
+
+class TestSignupAndLoginSpans(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        data_dir = Path(self.tmpdir.name)
+        self._orig = (
+            problem2c.PASSWD_FILE,
+            problem3ab.ROLES_FILE,
+            problem3ab.WEAK_PASSWD_FILE,
+            problem2c.ph,
+            questionary.text,
+            questionary.password,
+            questionary.checkbox,
+        )
+        problem2c.PASSWD_FILE = data_dir / "passwd.txt"
+        problem3ab.ROLES_FILE = data_dir / "roles.txt"
+        problem3ab.WEAK_PASSWD_FILE = data_dir / "weak_passwords.txt"
+        problem2c.configure_hasher(time_cost=1, memory_cost=8192, parallelism=1)
+        problem2c.throttle.reset()
+        self._orig_sessions = set_session_store(SessionStore(b"test-secret"))
+        self.sink = RingBufferSink()
+        self._orig_sink = tracing.set_sink(self.sink)
+
+    def tearDown(self):
+        tracing.set_sink(self._orig_sink)
+        set_session_store(self._orig_sessions)
+        (
+            problem2c.PASSWD_FILE,
+            problem3ab.ROLES_FILE,
+            problem3ab.WEAK_PASSWD_FILE,
+            problem2c.ph,
+            questionary.text,
+            questionary.password,
+            questionary.checkbox,
+        ) = self._orig
+        self.tmpdir.cleanup()
+
+    def children_of(self, name):
+        spans = self.sink.spans()
+        root = next(s for s in spans if s.name == name)
+        return [s for s in spans if s.parent_id == root.span_id]
+
+    def test_signup_stages(self):
+        questionary.text = lambda msg: _Prompt("alice")
+        questionary.checkbox = lambda msg, choices: _Prompt(["Client"])
+        questionary.password = lambda msg: _Prompt("GoodPass1!")
+
+        self.assertIsNotNone(problem3ab.signup())
+
+        children = self.children_of("signup")
+        self.assertEqual(
+            [s.name for s in children],
+            [
+                "prompt",
+                "validate_username",
+                "prompt",
+                "prompt",
+                "password_policy",
+                "hash",
+                "file_write",
+                "role_store",
+                "role_mapping",
+                "session",
+            ],
+        )
+        self.assertEqual(
+            [s.attrs["field"] for s in children if s.name == "prompt"],
+            ["username", "roles", "password"],
+        )
+
+    def test_login_stages(self):
+        problem3ab.register_user("bob", "GoodPass1!", ["Teller"])
+        questionary.text = lambda msg: _Prompt("bob")
+        questionary.password = lambda msg: _Prompt("GoodPass1!")
+
+        self.assertIsNotNone(problem4ab.login())
+
+        self.assertEqual(
+            [s.name for s in self.children_of("login")],
+            ["prompt", "prompt", "authenticate"],
+        )
+        self.assertEqual(
+            [s.name for s in self.children_of("authenticate")],
+            ["user_lookup", "hash", "role_mapping", "session"],
+        )
+
+
+class TestProfiling(unittest.TestCase):
+    def test_setting_is_parsed(self):
+        self.assertIsNone(profiling.parse_setting(""))
+        self.assertEqual(
+            profiling.parse_setting("cprofile"),
+            ("cprofile", Path("justinvest.prof")),
+        )
+        self.assertEqual(
+            profiling.parse_setting("sample:out.txt"), ("sample", Path("out.txt"))
+        )
+        with self.assertRaises(ValueError):
+            profiling.parse_setting("perf")
+
+    def test_cprofile_and_sampling_write_output(self):
+        def busy():
+            end = time.monotonic() + 0.05
+            while time.monotonic() < end:
+                pass
+
+        with tempfile.TemporaryDirectory() as tmp:
+            prof = Path(tmp) / "session.prof"
+            with profiling.profile_session(f"cprofile:{prof}"):
+                busy()
+            stats = pstats.Stats(str(prof))
+            self.assertTrue(any(f[2] == "busy" for f in stats.stats))
+
+            folded = Path(tmp) / "session.folded"
+            with profiling.profile_session(f"sample:{folded}"):
+                busy()
+            lines = folded.read_text().splitlines()
+            self.assertTrue(lines)
+            self.assertTrue(any("test_tracing.py:busy" in line for line in lines))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from pathlib import Path
+import tempfile
+
+from src.Problem1c import Role, RoleFlag
+from src.Problem3ab import CompactUser, User
+from src.storage import FlatFileBackend
+from src.user_table import UserTable
+
+
+class TestCompactUser(unittest.TestCase):
+    def test_round_trip_with_user(self):
+        user = User(username="alice", roles={Role.CLIENT, Role.TELLER})
+
+        compact = user.to_compact("hash-a")
+
+        self.assertEqual(compact.roles, RoleFlag.CLIENT | RoleFlag.TELLER)
+        self.assertEqual(compact.password_hash, "hash-a")
+        self.assertEqual(compact.to_user(), user)
+        self.assertFalse(hasattr(compact, "__dict__"))
+
+
+class TestUserTable(unittest.TestCase):
+    def test_add_and_lookup(self):
+        table = UserTable()
+        table.add("alice", "$argon2id$hash-a", RoleFlag.PREMIUM_CLIENT)
+        table.add_user(User(username="bob", roles={Role.EMPLOYEE}), "$argon2id$hash-b")
+        table.add("carol", None, 0)
+
+        self.assertEqual(len(table), 3)
+        self.assertIn("bob", table)
+        self.assertEqual(
+            table.get("alice"),
+            CompactUser("alice", RoleFlag.PREMIUM_CLIENT, "$argon2id$hash-a"),
+        )
+        self.assertEqual(table.get_user("bob").roles, {Role.EMPLOYEE})
+        self.assertIsNone(table.get("carol").password_hash)
+        self.assertIsNone(table.get("dave"))
+        self.assertEqual([u.username for u in table], ["alice", "bob", "carol"])
+
+        with self.assertRaises(ValueError):
+            table.add("alice", "other", 0)
+
+    def test_from_backend(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            passwd = Path(tmp) / "passwd.txt"
+            roles = Path(tmp) / "roles.txt"
+            passwd.write_text("alice:hash-a\nbob:hash-b\n", encoding="utf-8")
+            roles.write_text("alice:Client\nbob:Employee,Teller\n", encoding="utf-8")
+
+            table = UserTable.from_backend(FlatFileBackend(passwd, roles))
+
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table.get("bob").roles, RoleFlag.EMPLOYEE | RoleFlag.TELLER)
+        self.assertEqual(table.get("alice").password_hash, "hash-a")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+
+from src.username_index import BloomFilter
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(capacity=5000, error_rate=0.01)
+        names = [f"user{i}" for i in range(5000)]
+        bloom.update(names)
+
+        for name in names:
+            self.assertIn(name, bloom)
+
+    def test_false_positive_rate_near_target(self):
+        bloom = BloomFilter(capacity=5000, error_rate=0.01)
+        bloom.update(f"user{i}" for i in range(5000))
+
+        false_hits = sum(f"other{i}" in bloom for i in range(10000))
+        self.assertLess(false_hits / 10000, 0.03)
+
+    def test_rejects_bad_parameters(self):
+        with self.assertRaises(ValueError):
+            BloomFilter(capacity=0)
+        with self.assertRaises(ValueError):
+            BloomFilter(capacity=10, error_rate=1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
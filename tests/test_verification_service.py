@@ -0,0 +1,40 @@
+import unittest
+from pathlib import Path
+import tempfile
+
+import src.Problem2c as problem2c
+from src.verification_service import VerificationService
+
+
+class TestVerificationService(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self._orig_passwd_file = problem2c.PASSWD_FILE
+        problem2c.PASSWD_FILE = Path(self.tmpdir.name) / "passwd.txt"
+        problem2c.PASSWD_FILE.touch()
+
+        problem2c.add_user("alice", "Secret1!aa")
+        problem2c.add_user("bob", "Secret2!bb")
+
+    def tearDown(self):
+        problem2c.PASSWD_FILE = self._orig_passwd_file
+        self.tmpdir.cleanup()
+
+    def test_verify_many_preserves_order(self):
+        pairs = [
+            ("alice", "Secret1!aa"),
+            ("bob", "wrong"),
+            ("bob", "Secret2!bb"),
+            ("nobody", "Secret1!aa"),
+        ]
+        with VerificationService(max_workers=2, max_pending=2) as service:
+            self.assertEqual(service.verify_many(pairs), [True, False, True, False])
+
+    def test_submit_returns_future(self):
+        with VerificationService(max_workers=1) as service:
+            future = service.submit("alice", "Secret1!aa")
+            self.assertTrue(future.result(timeout=30))
+
+
+if __name__ == "__main__":
+    unittest.main()